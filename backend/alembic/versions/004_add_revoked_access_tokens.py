@@ -0,0 +1,35 @@
+"""Add revoked_access_tokens table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """アクセストークン失効テーブルを作成"""
+    op.create_table(
+        "revoked_access_tokens",
+        sa.Column("jti", sa.String(length=36), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index("idx_revoked_access_tokens_expires_at", "revoked_access_tokens", ["expires_at"])
+
+
+def downgrade() -> None:
+    """アクセストークン失効テーブルを削除"""
+    op.drop_index("idx_revoked_access_tokens_expires_at", table_name="revoked_access_tokens")
+    op.drop_table("revoked_access_tokens")
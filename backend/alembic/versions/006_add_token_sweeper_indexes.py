@@ -0,0 +1,62 @@
+"""Add indexes for expired/revoked token sweeping
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """トークン削除用インデックスを作成（稼働中テーブルをロックしないよう CONCURRENTLY）"""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_refresh_tokens_expires_at",
+            "refresh_tokens",
+            ["expires_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "idx_refresh_tokens_revoked_at",
+            "refresh_tokens",
+            ["revoked_at"],
+            postgresql_where=sa.text("revoked_at IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "idx_password_reset_tokens_expires_at",
+            "password_reset_tokens",
+            ["expires_at"],
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "idx_password_reset_tokens_used_at",
+            "password_reset_tokens",
+            ["used_at"],
+            postgresql_where=sa.text("used_at IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """トークン削除用インデックスを削除"""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "idx_password_reset_tokens_used_at", table_name="password_reset_tokens", postgresql_concurrently=True
+        )
+        op.drop_index(
+            "idx_password_reset_tokens_expires_at", table_name="password_reset_tokens", postgresql_concurrently=True
+        )
+        op.drop_index("idx_refresh_tokens_revoked_at", table_name="refresh_tokens", postgresql_concurrently=True)
+        op.drop_index("idx_refresh_tokens_expires_at", table_name="refresh_tokens", postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""Add partial indexes for paginated device listing
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """デバイス一覧用の部分インデックスを作成（稼働中テーブルをロックしないよう CONCURRENTLY）"""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_refresh_tokens_user_last_used",
+            "refresh_tokens",
+            ["user_id", sa.text("last_used_at DESC"), sa.text("id DESC")],
+            postgresql_where=sa.text("revoked_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "idx_refresh_tokens_user_device",
+            "refresh_tokens",
+            ["user_id", "device_id", sa.text("last_used_at DESC")],
+            postgresql_where=sa.text("revoked_at IS NULL"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """デバイス一覧用の部分インデックスを削除"""
+    with op.get_context().autocommit_block():
+        op.drop_index("idx_refresh_tokens_user_device", table_name="refresh_tokens", postgresql_concurrently=True)
+        op.drop_index("idx_refresh_tokens_user_last_used", table_name="refresh_tokens", postgresql_concurrently=True)
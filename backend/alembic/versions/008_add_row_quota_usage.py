@@ -0,0 +1,36 @@
+"""Add row_quota_usage table
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """行数クォータの共有使用量テーブルを作成"""
+    op.create_table(
+        "row_quota_usage",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("window_start", sa.BigInteger(), nullable=False),
+        sa.Column("rows", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("key", "window_start"),
+    )
+    op.create_index("ix_row_quota_usage_window_start", "row_quota_usage", ["window_start"])
+
+
+def downgrade() -> None:
+    """行数クォータの共有使用量テーブルを削除"""
+    op.drop_index("ix_row_quota_usage_window_start", table_name="row_quota_usage")
+    op.drop_table("row_quota_usage")
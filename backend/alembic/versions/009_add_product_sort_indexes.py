@@ -0,0 +1,67 @@
+"""Add composite keyset indexes for every product sort key
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 商品一覧のソート列（ProductListParams.sort_by）
+SORT_COLUMNS = ("created_at", "name", "price", "updated_at")
+
+# (ソート列, id) のインデックスで置き換える単一列インデックス
+# （残すとプランナーが単一列インデックス + Incremental Sort を選ぶことがある）
+REPLACED_INDEXES = ("idx_products_created_at_desc", "idx_products_name", "idx_products_price")
+
+
+def upgrade() -> None:
+    """ソート列ごとのキーセット用複合インデックスを作成（稼働中テーブルをロックしないよう CONCURRENTLY）"""
+    with op.get_context().autocommit_block():
+        for column in SORT_COLUMNS:
+            # created_at は 001 の idx_products_created_at_id を使う
+            if column != "created_at":
+                op.create_index(
+                    f"idx_products_{column}_id",
+                    "products",
+                    [column, "id"],
+                    postgresql_concurrently=True,
+                )
+            op.create_index(
+                f"idx_products_category_status_{column}_id",
+                "products",
+                ["category", "status", column, "id"],
+                postgresql_concurrently=True,
+            )
+        for name in REPLACED_INDEXES:
+            op.drop_index(name, table_name="products", postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """キーセット用複合インデックスを削除し、単一列インデックスを戻す"""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "idx_products_created_at_desc",
+            "products",
+            ["created_at"],
+            postgresql_using="btree",
+            postgresql_ops={"created_at": "DESC"},
+            postgresql_concurrently=True,
+        )
+        op.create_index("idx_products_name", "products", ["name"], postgresql_concurrently=True)
+        op.create_index("idx_products_price", "products", ["price"], postgresql_concurrently=True)
+        for column in reversed(SORT_COLUMNS):
+            op.drop_index(
+                f"idx_products_category_status_{column}_id", table_name="products", postgresql_concurrently=True
+            )
+            if column != "created_at":
+                op.drop_index(f"idx_products_{column}_id", table_name="products", postgresql_concurrently=True)
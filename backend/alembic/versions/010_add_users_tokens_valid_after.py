@@ -0,0 +1,28 @@
+"""Add users.tokens_valid_after
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """アクセストークンの有効開始時刻の列を追加（NULL 許可・既定値なしのためテーブルを書き換えない）"""
+    op.add_column("users", sa.Column("tokens_valid_after", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """アクセストークンの有効開始時刻の列を削除"""
+    op.drop_column("users", "tokens_valid_after")
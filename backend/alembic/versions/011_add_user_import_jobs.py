@@ -0,0 +1,43 @@
+"""Add user_import_jobs table
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """ユーザー一括インポートジョブのテーブルを作成"""
+    op.create_table(
+        "user_import_jobs",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("filename", sa.String(length=255), nullable=True),
+        sa.Column("format", sa.String(length=20), nullable=False),
+        sa.Column("report", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("idx_user_import_jobs_created_at", "user_import_jobs", ["created_at"])
+
+
+def downgrade() -> None:
+    """ユーザー一括インポートジョブのテーブルを削除"""
+    op.drop_index("idx_user_import_jobs_created_at", table_name="user_import_jobs")
+    op.drop_table("user_import_jobs")
@@ -0,0 +1,84 @@
+"""
+ユーザー一括インポートスクリプト
+
+CSV（username,email,password）または NDJSON のユーザー一覧を一括登録します。
+パスワードのハッシュ計算は全コアに分散し、PostgreSQL へは COPY で投入します。
+ファイルは1行ずつ読み込むため、全体をメモリに載せません。
+
+使い方:
+    uv run python scripts/import_users.py users.csv
+    uv run python scripts/import_users.py users.ndjson --workers 8 --batch-size 10000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+# プロジェクトルートをパスに追加
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + "/src")
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.admin.service import IMPORT_BATCH_SIZE, UserImportService, hashing_executor
+
+# データベース接続URL
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+asyncpg://postgres:postgres@db:5432/ultra_fast_db")
+
+
+def parse_args() -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="ユーザー一括インポート")
+    parser.add_argument("path", help="CSV または NDJSON ファイル")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="省略時は拡張子から判定")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="ハッシュ計算プロセス数")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="1トランザクションの件数")
+    return parser.parse_args()
+
+
+async def import_users(args: argparse.Namespace) -> None:
+    """ユーザーをインポート"""
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+
+    print("=" * 80)
+    print("👥 ユーザー一括インポート開始")
+    print("=" * 80)
+    print(f"📄 ファイル: {args.path} ({fmt})")
+    print(f"🧮 ハッシュ計算プロセス数: {args.workers}")
+    print(f"📦 バッチサイズ: {args.batch_size:,}件")
+    print()
+
+    engine = create_async_engine(DATABASE_URL, echo=False)
+    async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    with hashing_executor(args.workers) as executor:
+        async with async_session() as session:
+            service = UserImportService(session, executor, workers=args.workers, batch_size=args.batch_size)
+            report = await service.import_users(args.path, fmt)
+
+    await engine.dispose()
+
+    for row in report.invalid[:20]:
+        print(f"⚠️  {row['line']}行目: {', '.join(row['errors'])}")
+    for row in report.conflicts[:20]:
+        print(f"⚠️  {row['line']}行目: 既存ユーザーと重複 ({row['username']} / {row['email']})")
+
+    print()
+    print("=" * 80)
+    print("✅ インポート完了")
+    print("=" * 80)
+    print(f"📊 入力行数: {report.total:,}件")
+    print(f"✅ 作成: {report.created:,}件")
+    print(f"🔁 重複: {len(report.conflicts):,}件")
+    print(f"❌ 検証エラー: {len(report.invalid):,}件")
+    print(f"⏱️  所要時間: {report.elapsed_seconds:.1f}秒（うちハッシュ計算 {report.hash_seconds:.1f}秒）")
+    print(f"⚡ スループット: {report.users_per_second:,.1f}件/秒")
+    print(f"⚡ 1コアあたり: {report.users_per_second_per_core:,.1f}件/秒/コア")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(import_users(parse_args()))
+    except KeyboardInterrupt:
+        print("\n\n⚠️  処理が中断されました")
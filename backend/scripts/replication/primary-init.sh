@@ -0,0 +1,3 @@
+#!/bin/sh
+# プライマリの初期化時に実行: レプリカからのストリーミングレプリケーション接続を許可
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
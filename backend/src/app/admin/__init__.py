@@ -0,0 +1,3 @@
+"""
+admin package - 運用・インシデント対応向け管理機能
+"""
@@ -0,0 +1,29 @@
+"""
+admin/dependencies.py - 管理API認証依存性注入
+"""
+
+import secrets
+
+from fastapi import Header, HTTPException, status
+
+from app.config import settings
+
+
+async def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    """
+    管理APIトークンを検証
+
+    Raises:
+        HTTPException: 管理APIが無効、またはトークンが一致しない場合
+    """
+    if not settings.admin_api_key:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found",
+        )
+
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.admin_api_key):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="管理者権限がありません",
+        )
@@ -0,0 +1,146 @@
+"""
+admin/jobs.py - ユーザー一括インポートのバックグラウンドジョブ
+
+POST /admin/users/import はアップロードを一時ファイルに保存してジョブを登録し、
+取り込み自体はリクエストとは独立したタスクで実行します。
+
+- ハッシュ計算のプロセスプールは起動時に1つだけ作成し、全ジョブで再利用
+- 同時に実行するジョブ数を制限（超過分は queued のまま待機）
+- ジョブごとに専用のセッション（接続の既定のステートメントタイムアウト）を使い、
+  バッチごとに commit するため、リクエストのタイムアウトやクライアント切断の影響を受けない
+- 状態と結果は user_import_jobs テーブルに保存し、どのワーカーからも参照可能
+"""
+
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.admin.service import IMPORT_BATCH_SIZE, UserImportService, hashing_executor
+from app.config import settings
+from app.database.db import async_session_maker
+from app.database.models.user_import import UserImportJob
+
+logger = logging.getLogger(__name__)
+
+# 停止時に実行中・待機中だったジョブに記録するエラー
+_INTERRUPTED_ERROR = "サーバーの停止により中断されました"
+
+
+class UserImportJobRunner:
+    """ユーザー一括インポートジョブの実行管理"""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        workers: int = 2,
+        max_concurrent_jobs: int = 1,
+        batch_size: int = IMPORT_BATCH_SIZE,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self._slots = asyncio.Semaphore(max_concurrent_jobs)
+        self._executor: ProcessPoolExecutor | None = None
+        self._tasks: dict[UUID, asyncio.Task[None]] = {}
+
+    def start(self) -> None:
+        """ハッシュ計算のプロセスプールを作成（bcrypt コストの設定後に呼ぶ）"""
+        if self._executor is None:
+            self._executor = hashing_executor(self.workers)
+
+    async def stop(self) -> None:
+        """実行中・待機中のジョブを中断し、プロセスプールを停止"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+
+    async def submit(self, path: Path, fmt: str, filename: str | None = None) -> UserImportJob:
+        """ジョブを登録して実行を開始
+
+        Args:
+            path: 取り込むファイル（ジョブの終了時に削除）
+            fmt: "csv" または "ndjson"
+            filename: アップロード時のファイル名
+        """
+        try:
+            if self._executor is None:
+                raise RuntimeError("ユーザー一括インポートのジョブ実行が開始されていません")
+            async with self.session_factory() as session:
+                job = UserImportJob(status="queued", filename=filename, format=fmt)
+                session.add(job)
+                await session.commit()
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+
+        # リクエストのコンテキスト（処理時間の内訳など）を引き継がないよう空のコンテキストで実行
+        task = asyncio.create_task(self._run(job.id, path, fmt), context=contextvars.Context())
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return job
+
+    async def get(self, job_id: UUID) -> UserImportJob | None:
+        """ジョブを取得"""
+        async with self.session_factory() as session:
+            return await session.get(UserImportJob, job_id)
+
+    async def _run(self, job_id: UUID, path: Path, fmt: str) -> None:
+        """ジョブを実行し、結果を記録"""
+        try:
+            async with self._slots:
+                await self._update(job_id, status="running", started_at=datetime.now(UTC))
+                async with self.session_factory() as session:
+                    service = UserImportService(
+                        session, self._executor, workers=self.workers, batch_size=self.batch_size
+                    )
+                    report = await service.import_users(path, fmt)
+            await self._update(job_id, status="succeeded", report=report.as_dict(), finished_at=datetime.now(UTC))
+            logger.info(
+                "ユーザー一括インポートが完了しました: job=%s created=%d conflicts=%d invalid=%d (%.1f件/秒)",
+                job_id,
+                report.created,
+                len(report.conflicts),
+                len(report.invalid),
+                report.users_per_second,
+            )
+        except asyncio.CancelledError:
+            await self._fail(job_id, _INTERRUPTED_ERROR)
+            raise
+        except Exception as e:
+            logger.exception("ユーザー一括インポートに失敗しました: job=%s", job_id)
+            await self._fail(job_id, str(e))
+        finally:
+            path.unlink(missing_ok=True)
+
+    async def _fail(self, job_id: UUID, error: str) -> None:
+        """ジョブを失敗として記録（記録自体の失敗はログのみ）"""
+        try:
+            await self._update(job_id, status="failed", error=error, finished_at=datetime.now(UTC))
+        except Exception:
+            logger.exception("インポートジョブの状態を更新できませんでした: job=%s", job_id)
+
+    async def _update(self, job_id: UUID, **values: Any) -> None:
+        """ジョブの状態を更新"""
+        async with self.session_factory() as session:
+            await session.execute(update(UserImportJob).where(UserImportJob.id == job_id).values(**values))
+            await session.commit()
+
+
+user_import_jobs = UserImportJobRunner(
+    async_session_maker,
+    workers=settings.user_import_workers,
+    max_concurrent_jobs=settings.user_import_max_concurrent_jobs,
+)
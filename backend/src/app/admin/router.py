@@ -0,0 +1,102 @@
+"""
+admin/router.py - 管理APIエンドポイント
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.admin.dependencies import require_admin
+from app.admin.jobs import user_import_jobs
+from app.admin.schemas import (
+    RevokeSessionsRequest,
+    RevokeSessionsResponse,
+    SlowQueriesResponse,
+    SlowQueryEntry,
+    UserImportJobResponse,
+)
+from app.admin.service import IMPORT_FORMATS
+from app.auth.service import AuthService
+from app.database.db import get_session
+from app.database.slowlog import slow_query_log
+
+# アップロードを一時ファイルへ書き出す単位（バイト）
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+@router.post("/sessions/revoke", response_model=RevokeSessionsResponse)
+async def revoke_sessions(
+    request: RevokeSessionsRequest,
+    db: AsyncSession = Depends(get_session),
+) -> RevokeSessionsResponse:
+    """指定ユーザーの全セッションを無効化（管理者専用）"""
+    service = AuthService(db)
+    revoked = await service.revoke_all_sessions(request.user_ids)
+    return RevokeSessionsResponse(user_count=len(request.user_ids), revoked_count=revoked)
+
+
+@router.post("/users/import", response_model=UserImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_users(
+    file: UploadFile = File(..., description="CSV（username,email,password）または NDJSON"),
+    fmt: str | None = Query(None, alias="format", description="csv / ndjson（省略時は拡張子から判定）"),
+) -> UserImportJobResponse:
+    """ユーザー一括インポートを開始（管理者専用）
+
+    取り込みはバックグラウンドのジョブで実行します。
+    進捗と結果は GET /admin/users/import/{job_id} で取得してください。
+    """
+    fmt = fmt or ("csv" if (file.filename or "").endswith(".csv") else "ndjson")
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"未対応のフォーマットです: {fmt}",
+        )
+
+    path = await _save_upload(file)
+    job = await user_import_jobs.submit(path, fmt, file.filename)
+    return UserImportJobResponse.model_validate(job)
+
+
+@router.get("/users/import/{job_id}", response_model=UserImportJobResponse)
+async def get_import_job(job_id: UUID) -> UserImportJobResponse:
+    """ユーザー一括インポートジョブの状態と結果を取得（管理者専用）"""
+    job = await user_import_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="インポートジョブが見つかりません",
+        )
+    return UserImportJobResponse.model_validate(job)
+
+
+async def _save_upload(file: UploadFile) -> Path:
+    """アップロードをチャンク単位で一時ファイルに書き出す（全体をメモリに載せない）"""
+    fd, name = tempfile.mkstemp(prefix="user_import_")
+    path = Path(name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            await asyncio.to_thread(shutil.copyfileobj, file.file, f, UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path
+
+
+@router.get("/slow-queries", response_model=SlowQueriesResponse)
+async def list_slow_queries(
+    limit: int = Query(50, ge=1, le=1000, description="取得件数"),
+) -> SlowQueriesResponse:
+    """直近のスロークエリを取得（管理者専用）"""
+    return SlowQueriesResponse(
+        threshold_ms=slow_query_log.threshold_ms,
+        total=len(slow_query_log),
+        entries=[SlowQueryEntry(**entry.as_dict()) for entry in slow_query_log.entries(limit)],
+    )
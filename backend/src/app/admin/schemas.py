@@ -0,0 +1,90 @@
+"""
+admin/schemas.py - 管理APIスキーマ
+"""
+
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class RevokeSessionsRequest(BaseModel):
+    """全セッション無効化リクエスト"""
+
+    user_ids: list[UUID] = Field(..., min_length=1, description="対象ユーザーID")
+
+
+class RevokeSessionsResponse(BaseModel):
+    """全セッション無効化レスポンス"""
+
+    user_count: int
+    revoked_count: int
+
+
+class ImportConflict(BaseModel):
+    """既存ユーザーと重複した行"""
+
+    line: int
+    username: str
+    email: str
+
+
+class ImportInvalidRow(BaseModel):
+    """検証エラーの行"""
+
+    line: int
+    errors: list[str]
+
+
+class UserImportReport(BaseModel):
+    """ユーザー一括インポート結果"""
+
+    total: int = Field(..., description="入力行数")
+    created: int = Field(..., description="作成件数")
+    conflicts: list[ImportConflict]
+    invalid: list[ImportInvalidRow]
+    workers: int = Field(..., description="ハッシュ計算プロセス数")
+    elapsed_seconds: float
+    hash_seconds: float
+    users_per_second: float
+    users_per_second_per_core: float
+
+
+class UserImportJobResponse(BaseModel):
+    """ユーザー一括インポートジョブ"""
+
+    id: UUID
+    status: str = Field(..., description="queued / running / succeeded / failed")
+    filename: str | None
+    format: str
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    error: str | None = Field(None, description="failed の場合のエラー")
+    report: UserImportReport | None = Field(None, description="succeeded の場合のインポート結果")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class SlowQueryEntry(BaseModel):
+    """スロークエリ1件"""
+
+    id: int
+    occurred_at: datetime
+    duration_ms: float
+    endpoint: str | None = Field(None, description="呼び出し元（リクエスト外は null）")
+    statement: str = Field(..., description="正規化した SQL")
+    parameters: Any = Field(None, description="マスク済みのパラメータ")
+    explain: str = Field(..., description="skipped / pending / captured / failed")
+    plan: Any = Field(None, description="EXPLAIN (FORMAT JSON) の結果（analyzed なら ANALYZE, BUFFERS 付き）")
+    analyzed: bool = Field(False, description="ANALYZE 付きで取得したか（false は実行しない推定のみの計画）")
+    explain_error: str | None = None
+
+
+class SlowQueriesResponse(BaseModel):
+    """スロークエリ一覧（新しい順）"""
+
+    threshold_ms: float | None
+    total: int = Field(..., description="バッファ内の件数")
+    entries: list[SlowQueryEntry]
@@ -0,0 +1,168 @@
+"""
+auth/activity.py - デバイス利用状況（last_used_at）の遅延書き込み
+
+認証済みリクエストのたびに `refresh_tokens.last_used_at` を更新すると
+リクエストごとに書き込みが発生するため、メモリ上のバッファで
+(user_id, device_id) ごとに最新時刻へまとめ、一定間隔で
+UPDATE ... FROM (VALUES ...) の1文で反映します。
+
+- バッファは上限件数を持ち、超過時は即時フラッシュを要求して新規キーを破棄
+- アプリ終了時に残りをフラッシュ
+"""
+
+import asyncio
+import contextlib
+import logging
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import DateTime, String, bindparam, column, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.database.db import engine
+from app.database.models.token import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# 1文の UPDATE に含める最大件数（バインドパラメータ数の上限 32767 / 3列）
+_FLUSH_CHUNK = 5000
+
+
+class DeviceActivityBuffer:
+    """デバイス利用時刻の書き込みバッファ"""
+
+    def __init__(self, engine: AsyncEngine, flush_interval_seconds: float = 30.0, max_entries: int = 100_000):
+        self.engine = engine
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_entries = max_entries
+        # (user_id, device_id) -> 最終利用時刻
+        self._pending: dict[tuple[UUID, str], datetime] = {}
+        self._flush_requested = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.flushed = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, user_id: UUID, device_id: str, at: datetime | None = None) -> None:
+        """デバイスの利用を記録（同じデバイスへの記録は最新時刻にまとめる）"""
+        key = (user_id, device_id)
+        at = at or datetime.now(UTC)
+        if key not in self._pending and len(self._pending) >= self.max_entries:
+            # 上限超過時はメモリを増やさず、次のフラッシュを前倒しする
+            self.dropped += 1
+            self._flush_requested.set()
+            return
+        previous = self._pending.get(key)
+        if previous is None or previous < at:
+            self._pending[key] = at
+
+    # ーーーーーー ライフサイクル ーーーーーー
+
+    def start(self) -> None:
+        """定期フラッシュを開始"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever(), name="device-activity-flusher")
+
+    async def stop(self) -> None:
+        """定期フラッシュを停止し、残りを反映
+
+        最後の反映に失敗してもログに記録するだけで例外は送出しません
+        （シャットダウンの後続処理を止めないため）。
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("停止時のデバイス利用時刻の反映に失敗しました（%d 件を破棄）", len(self._pending))
+
+    async def _run_forever(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval_seconds)
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("デバイス利用時刻の反映に失敗しました")
+
+    # ーーーーーー 反映処理 ーーーーーー
+
+    async def flush(self) -> int:
+        """バッファの内容を1文の UPDATE で反映
+
+        Returns:
+            反映したデバイス数
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        rows = [(user_id, device_id, at) for (user_id, device_id), at in pending.items()]
+
+        try:
+            async with self.engine.begin() as conn:
+                if conn.dialect.name == "postgresql":
+                    for start in range(0, len(rows), _FLUSH_CHUNK):
+                        await conn.execute(self._bulk_update(rows[start : start + _FLUSH_CHUNK]))
+                else:
+                    # UPDATE ... FROM (VALUES ...) の列名指定に未対応の方言は executemany で反映
+                    await conn.execute(
+                        self._row_update(),
+                        [{"p_user_id": u, "p_device_id": d, "p_last_used_at": at} for u, d, at in rows],
+                    )
+        except Exception:
+            # 反映できなかった分は戻し、次回に再試行（その間の新しい記録を優先）
+            for key, at in pending.items():
+                self._pending.setdefault(key, at)
+            raise
+
+        self.flushed += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _bulk_update(rows: list[tuple[UUID, str, datetime]]):
+        activity = values(
+            column("user_id", PG_UUID(as_uuid=True)),
+            column("device_id", String),
+            column("last_used_at", DateTime(timezone=True)),
+            name="activity",
+        ).data(rows)
+        return (
+            update(RefreshToken)
+            .where(
+                RefreshToken.user_id == activity.c.user_id,
+                RefreshToken.device_id == activity.c.device_id,
+                RefreshToken.revoked_at.is_(None),
+                or_(RefreshToken.last_used_at.is_(None), RefreshToken.last_used_at < activity.c.last_used_at),
+            )
+            .values(last_used_at=activity.c.last_used_at)
+        )
+
+    @staticmethod
+    def _row_update():
+        return (
+            update(RefreshToken)
+            .where(
+                RefreshToken.user_id == bindparam("p_user_id"),
+                RefreshToken.device_id == bindparam("p_device_id"),
+                RefreshToken.revoked_at.is_(None),
+                or_(RefreshToken.last_used_at.is_(None), RefreshToken.last_used_at < bindparam("p_last_used_at")),
+            )
+            .values(last_used_at=bindparam("p_last_used_at"))
+        )
+
+
+device_activity = DeviceActivityBuffer(
+    engine,
+    flush_interval_seconds=settings.device_activity_flush_interval_seconds,
+    max_entries=settings.device_activity_max_entries,
+)
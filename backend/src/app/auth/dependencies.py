@@ -2,27 +2,41 @@
 auth/dependencies.py - 認証依存性注入
 """
 
-from fastapi import Depends, HTTPException, status
+from datetime import UTC, datetime
+from uuid import UUID
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.activity import device_activity
+from app.auth.revocation import revocation_list
 from app.auth.security import verify_access_token
 from app.auth.service import AuthService
-from app.database.db import get_session
+from app.database.db import engine_router, get_read_session, get_session, lazy_session_maker
 from app.database.models.user import User
+from app.timing import span
 
 # HTTPベアラー認証スキーム
 security = HTTPBearer()
 
+# 認証処理（トークン検証・ユーザー取得）の区間名
+AUTH_SPAN = "auth"
+
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_session),
 ) -> User:
     """
     現在の認証済みユーザーを取得
 
+    ユーザーはプライマリから取得するため、無効化（is_active）や
+    全セッション無効化（tokens_valid_after）は直ちに反映されます。
+
     Args:
+        request: リクエスト（read-your-writes 用にユーザーIDを記録）
         credentials: JWTトークン
         db: データベースセッション
 
@@ -32,19 +46,66 @@ async def get_current_user(
     Raises:
         HTTPException: 認証失敗時
     """
-    token = credentials.credentials
+    with span(AUTH_SPAN):
+        return await _authenticate(request, credentials.credentials, db)
+
+
+async def get_current_read_user(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_session),
+) -> User:
+    """
+    現在の認証済みユーザーをリードレプリカから取得（読み取り専用エンドポイント用）
+
+    見つからない場合（登録直後でレプリカに未反映など）はプライマリで再確認します。
+    無効化・全セッション無効化の反映はレプリカの遅延（replica_max_lag_seconds）だけ遅れるため、
+    書き込みを伴うエンドポイントでは get_current_user を使ってください。
+
+    Args:
+        request: リクエスト（read-your-writes 用にユーザーIDを記録）
+        credentials: JWTトークン
+        db: データベースセッション（読み取り用）
+
+    Returns:
+        User: 認証済みユーザー
+
+    Raises:
+        HTTPException: 認証失敗時
+    """
+    with span(AUTH_SPAN):
+        return await _authenticate(request, credentials.credentials, db)
 
+
+async def _authenticate(request: Request, token: str, db: AsyncSession) -> User:
+    """アクセストークンを検証し、ユーザーを取得"""
     # トークンを検証してuser_idを取得
     try:
         payload = verify_access_token(token)
-        user_id = payload.get("sub")
+        subject = payload.get("sub")
 
-        if not user_id:
+        if not subject:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="無効なトークン: ユーザーIDが見つかりません",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+        try:
+            user_id = UUID(subject)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="無効なトークン: ユーザーIDが不正です",
+                headers={"WWW-Authenticate": "Bearer"},
+            ) from None
+
+        # 失効リストを確認（失効していない場合は Bloom フィルタのみで判定完了）
+        if revocation_list.is_revoked(payload.get("jti")):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="トークンは無効化されています",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,6 +117,10 @@ async def get_current_user(
     service = AuthService(db)
     user = await service.get_user_by_id(user_id)
 
+    if not user and db.bind is not engine_router.primary:
+        async with lazy_session_maker() as primary_db:
+            user = await AuthService(primary_db).get_user_by_id(user_id)
+
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -69,9 +134,34 @@ async def get_current_user(
             detail="ユーザーアカウントが無効です",
         )
 
+    # 全セッション無効化より前に発行されたトークンを拒否
+    if _issued_before(payload, user.tokens_valid_after):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="トークンは無効化されています",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    request.state.user_id = user.id
+
+    # デバイスの利用時刻を記録（DB への反映はバッファでまとめて遅延実行）
+    device_id = payload.get("device_id")
+    if device_id:
+        device_activity.touch(user.id, device_id)
+
     return user
 
 
+def _issued_before(payload: dict, cutoff: datetime | None) -> bool:
+    """トークンの発行時刻（iat）が cutoff より前か（iat のないトークンは前とみなす）"""
+    if cutoff is None:
+        return False
+    if cutoff.tzinfo is None:
+        # SQLite はタイムゾーン情報を保持しないため UTC として扱う
+        cutoff = cutoff.replace(tzinfo=UTC)
+    return float(payload.get("iat", 0)) < cutoff.timestamp()
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
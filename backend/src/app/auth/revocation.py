@@ -0,0 +1,285 @@
+"""
+auth/revocation.py - アクセストークン失効リスト（Bloomフィルタ付きインメモリ集合）
+
+アクセストークンの `jti` をメモリ上の失効集合で管理します。
+集合の手前に Bloom フィルタを置くことで、大多数を占める「失効していない」
+トークンの判定はハッシュ計算とビット参照のみで完了します。
+
+- 起動時に `revoked_access_tokens` テーブルから有効期限内の jti をロード
+- PostgreSQL の LISTEN/NOTIFY で他ワーカーの失効を受信して同期
+- 購読接続が切断されたら再接続して LISTEN し直し、切断中の失効をテーブルから補完
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import math
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.config import settings
+from app.database.models.token import RevokedAccessToken
+from app.database.slowlog import NO_EXPLAIN_OPTION
+
+logger = logging.getLogger(__name__)
+
+# 失効通知チャネル名
+REVOCATION_CHANNEL = "access_token_revocations"
+
+# 購読接続の再接続間隔（秒。失敗するたびに倍にして上限まで延ばす）
+RECONNECT_INITIAL_DELAY_SECONDS = 1.0
+RECONNECT_MAX_DELAY_SECONDS = 30.0
+
+
+class BloomFilter:
+    """ダブルハッシングによる固定サイズの Bloom フィルタ"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # m = -n ln(p) / (ln 2)^2, k = (m / n) ln 2
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> list[int]:
+        """キーに対応するビット位置を計算"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        """キーを追加"""
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def estimated_false_positive_rate(self) -> float:
+        """現在の要素数に対する理論上の偽陽性率"""
+        return float((1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes)
+
+
+class RevocationList:
+    """アクセストークン失効リスト"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        # jti -> 有効期限
+        self._entries: dict[str, datetime] = {}
+        # 偽陽性率の実測用カウンタ
+        self._bloom_hits = 0
+        self._false_positives = 0
+        self._listener_conn: AsyncConnection | None = None
+        # 購読中のエンジン（None なら購読停止中）と再接続タスク
+        self._listener_engine: AsyncEngine | None = None
+        self._reconnect_task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ーーーーーー 判定・追加 ーーーーーー
+
+    def is_revoked(self, jti: str | None) -> bool:
+        """jti が失効済みか判定"""
+        if not jti or not self._entries:
+            return False
+        if jti not in self._bloom:
+            return False
+
+        self._bloom_hits += 1
+        expires_at = self._entries.get(jti)
+        if expires_at is None:
+            self._false_positives += 1
+            return False
+        return expires_at > datetime.now(UTC)
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        """失効済み jti を追加（冪等）"""
+        if jti in self._entries:
+            return
+        self._entries[jti] = expires_at
+        self._bloom.add(jti)
+        # 想定容量を超えたら偽陽性率を維持するためにフィルタを作り直す
+        if self._bloom.count > self._bloom.capacity:
+            self.prune()
+
+    def prune(self) -> int:
+        """期限切れエントリを除去してフィルタを再構築
+
+        Returns:
+            int: 除去したエントリ数
+        """
+        now = datetime.now(UTC)
+        live = {jti: exp for jti, exp in self._entries.items() if exp > now}
+        removed = len(self._entries) - len(live)
+
+        capacity = max(self.capacity, len(live) * 2)
+        self._bloom = BloomFilter(capacity, self.error_rate)
+        for jti in live:
+            self._bloom.add(jti)
+        self._entries = live
+        return removed
+
+    def clear(self) -> None:
+        """全エントリを破棄"""
+        self._entries = {}
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._bloom_hits = 0
+        self._false_positives = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Bloom フィルタの統計情報"""
+        return {
+            "entries": len(self._entries),
+            "bloom_bits": self._bloom.num_bits,
+            "bloom_hashes": self._bloom.num_hashes,
+            "bloom_hits": self._bloom_hits,
+            "false_positives": self._false_positives,
+            "observed_false_positive_rate": (self._false_positives / self._bloom_hits if self._bloom_hits else 0.0),
+            "estimated_false_positive_rate": self._bloom.estimated_false_positive_rate(),
+        }
+
+    # ーーーーーー DB同期 ーーーーーー
+
+    async def load(self, db: AsyncSession) -> int:
+        """失効テーブルから有効期限内の jti をロード
+
+        Returns:
+            int: ロードしたエントリ数
+        """
+        rows = await self._fetch_live(db)
+        self.clear()
+        for jti, expires_at in rows:
+            self.add(jti, _as_aware(expires_at))
+        return len(self._entries)
+
+    async def _fetch_live(self, db: AsyncSession) -> list[Any]:
+        """失効テーブルの有効期限内の (jti, 有効期限)"""
+        result = await db.execute(
+            select(RevokedAccessToken.jti, RevokedAccessToken.expires_at).where(
+                RevokedAccessToken.expires_at > datetime.now(UTC)
+            )
+        )
+        return list(result.all())
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: datetime) -> None:
+        """jti をテーブルに記録して他ワーカーへ通知
+
+        コミットは呼び出し元のトランザクションに委ねます。
+        NOTIFY はコミット時に配信されます。ロールバックされた失効がこのワーカーにだけ
+        残らないよう、メモリへの追加（add）はコミット後に呼び出し元が行います。
+        """
+        db.add(RevokedAccessToken(jti=jti, expires_at=expires_at))
+        if db.bind is not None and db.bind.dialect.name == "postgresql":
+            await db.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": REVOCATION_CHANNEL, "payload": f"{jti}|{expires_at.isoformat()}"},
+                # 通知の送信は EXPLAIN の対象外（別の接続で実行させない）
+                execution_options={NO_EXPLAIN_OPTION: True},
+            )
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        """NOTIFY 受信時のコールバック"""
+        try:
+            jti, expires_iso = payload.split("|", 1)
+            self.add(jti, _as_aware(datetime.fromisoformat(expires_iso)))
+        except ValueError:
+            logger.warning("不正な失効通知を無視しました: %s", payload)
+
+    async def start_listener(self, engine: AsyncEngine) -> None:
+        """失効通知の購読を開始（PostgreSQLのみ）"""
+        if engine.dialect.name != "postgresql" or self._listener_engine is not None:
+            return
+        self._listener_engine = engine
+        await self._listen(engine)
+
+    async def _listen(self, engine: AsyncEngine) -> None:
+        """購読用の接続を取得して LISTEN し、切断時に再接続するよう登録"""
+        conn = await engine.connect()
+        try:
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.add_listener(REVOCATION_CHANNEL, self._on_notification)
+            raw.driver_connection.add_termination_listener(self._on_termination)
+        except BaseException:
+            await conn.invalidate()
+            raise
+        self._listener_conn = conn
+
+    def _on_termination(self, connection: Any) -> None:
+        """購読接続の切断時のコールバック（フェイルオーバー・再起動・アイドルタイムアウトなど）"""
+        if self._listener_engine is None or self._reconnect_task is not None:
+            return
+        logger.warning("失効通知の購読接続が切断されました。再接続します")
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        """購読を再開し、切断中に通知を受け取れなかった失効をテーブルから補完"""
+        try:
+            if self._listener_conn is not None:
+                conn, self._listener_conn = self._listener_conn, None
+                with contextlib.suppress(Exception):
+                    await conn.invalidate()
+
+            delay = RECONNECT_INITIAL_DELAY_SECONDS
+            while self._listener_engine is not None:
+                engine = self._listener_engine
+                try:
+                    await self._listen(engine)
+                    # LISTEN の後に読むことで、再接続の前後どちらで失効しても取りこぼさない
+                    async with AsyncSession(engine) as db:
+                        rows = await self._fetch_live(db)
+                    for jti, expires_at in rows:
+                        self.add(jti, _as_aware(expires_at))
+                    logger.info("失効通知の購読を再開しました（%d 件を補完）", len(rows))
+                    return
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("失効通知の購読の再開に失敗しました（%.0f 秒後に再試行）", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RECONNECT_MAX_DELAY_SECONDS)
+        finally:
+            self._reconnect_task = None
+
+    async def stop_listener(self) -> None:
+        """失効通知の購読を停止"""
+        self._listener_engine = None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reconnect_task
+            self._reconnect_task = None
+        if self._listener_conn is None:
+            return
+        conn, self._listener_conn = self._listener_conn, None
+        raw = await conn.get_raw_connection()
+        raw.driver_connection.remove_termination_listener(self._on_termination)
+        await raw.driver_connection.remove_listener(REVOCATION_CHANNEL, self._on_notification)
+        await conn.close()
+
+
+def _as_aware(value: datetime) -> datetime:
+    """タイムゾーン情報のない日時をUTCとして扱う（SQLite対策）"""
+    return value if value.tzinfo is not None else value.replace(tzinfo=UTC)
+
+
+revocation_list = RevocationList(
+    capacity=settings.revocation_bloom_capacity,
+    error_rate=settings.revocation_bloom_error_rate,
+)
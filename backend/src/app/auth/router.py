@@ -2,10 +2,13 @@
 auth/router.py - 認証APIエンドポイント
 """
 
+from datetime import UTC, datetime
+
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.dependencies import get_current_active_user
+from app.auth.dependencies import get_current_active_user, get_current_read_user, security
 from app.auth.schemas import (
     AuthTokens,
     PasswordChange,
@@ -16,6 +19,7 @@ from app.auth.schemas import (
     UserRegisterSchema,
     UserResponse,
 )
+from app.auth.security import verify_access_token
 from app.auth.service import AuthService
 from app.config import settings
 from app.database.db import get_session
@@ -54,9 +58,10 @@ async def login(
         user = await service.login_user(credentials)
 
         # JWTトークンを生成
-        access_token = service.create_access_token(user.id)
         # TODO: 実際のデバイス情報を取得
-        refresh_token = service.create_refresh_token(user.id, device_id="web-client")
+        device_id = "web-client"
+        access_token = service.create_access_token(user.id, device_id=device_id)
+        refresh_token = service.create_refresh_token(user.id, device_id=device_id)
 
         from app.config import settings
 
@@ -99,7 +104,7 @@ async def change_password(
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(
-    current_user: User = Depends(get_current_active_user),
+    current_user: User = Depends(get_current_read_user),
 ) -> UserResponse:
     """現在のユーザー情報を取得（認証必須）"""
     return UserResponse.model_validate(current_user)
@@ -117,8 +122,6 @@ async def refresh_token(
         new_access_token, new_refresh_token = await service.refresh_access_token(token_data.refresh_token)
 
         # ユーザー情報を取得（トークンからuser_idを抽出）
-        from app.auth.security import verify_access_token
-
         payload = verify_access_token(new_access_token)
         user_id = payload.get("sub")
 
@@ -146,14 +149,22 @@ async def refresh_token(
 
 @router.post("/logout", status_code=status.HTTP_200_OK)
 async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_session),
 ) -> dict[str, str]:
     """ログアウト（認証必須）
 
+    使用中のアクセストークンを即時失効させ、
     現在のユーザーのすべてのリフレッシュトークンを無効化します。
     """
     service = AuthService(db)
+
+    payload = verify_access_token(credentials.credentials) or {}
+    jti, exp = payload.get("jti"), payload.get("exp")
+    if jti and exp:
+        await service.revoke_access_token(jti, datetime.fromtimestamp(exp, UTC))
+
     await service.logout(current_user.id)
     return {"message": "Logged out successfully"}
 
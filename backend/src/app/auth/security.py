@@ -2,28 +2,110 @@
 auth/security.py - JWT・パスワードハッシング処理
 """
 
+import logging
+import statistics
+import time
 from datetime import UTC, datetime, timedelta
 from typing import Any, cast
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import jwt
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
 
 from app.config import settings
+from app.metrics import password_hash_seconds
+from app.timing import add_span
 
-# パスワードハッシング設定
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# パスワードハッシング設定（アプリ全体で唯一の CryptContext）
+_CRYPT_CONFIG = {"schemes": ["bcrypt"], "deprecated": "auto"}
+pwd_context = CryptContext(**_CRYPT_CONFIG)
+
+# コスト計測に使うダミーパスワード
+_CALIBRATION_SECRET = "calibration-password"
 
 
 def hash_password(password: str) -> str:
     """パスワードをbcryptでハッシング"""
-    return cast(str, pwd_context.hash(password))
+    started = time.perf_counter()
+    hashed = cast(str, pwd_context.hash(password))
+    elapsed = time.perf_counter() - started
+    password_hash_seconds.observe(elapsed, operation="hash")
+    add_span("bcrypt", elapsed)
+    return hashed
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """パスワード検証"""
-    return cast(bool, pwd_context.verify(plain_password, hashed_password))
+    started = time.perf_counter()
+    verified = cast(bool, pwd_context.verify(plain_password, hashed_password))
+    elapsed = time.perf_counter() - started
+    password_hash_seconds.observe(elapsed, operation="verify")
+    add_span("bcrypt", elapsed)
+    return verified
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """ハッシュのコストが現在の設定より低いか判定"""
+    return cast(bool, pwd_context.needs_update(hashed_password))
+
+
+def configure_bcrypt_rounds(rounds: int) -> None:
+    """bcrypt コストを設定
+
+    設定より低いコストのハッシュだけが `password_needs_rehash` で更新対象になります。
+    上限は設けないため、ワーカーごとの計測差で高いコストのハッシュが下げられることはありません。
+    """
+    pwd_context.load({**_CRYPT_CONFIG, "bcrypt__default_rounds": rounds, "bcrypt__min_rounds": rounds})
+
+
+def current_bcrypt_rounds() -> int:
+    """現在の bcrypt コストを取得"""
+    return cast(int, pwd_context.handler("bcrypt").default_rounds)
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float = settings.bcrypt_target_ms,
+    min_rounds: int = settings.bcrypt_min_rounds,
+    max_rounds: int = settings.bcrypt_max_rounds,
+    samples: int = 3,
+) -> int:
+    """目標時間に収まる最大の bcrypt コストを計測して選択
+
+    bcrypt はコストを1上げるごとに処理時間が2倍になるため、
+    最小コストでの計測値から各コストの処理時間を推定します。
+    最小コストでも目標を超える場合は最小コストを返します。
+
+    Args:
+        target_ms: 1回のハッシュ計算の目標時間（ミリ秒）
+        min_rounds: 選択するコストの下限
+        max_rounds: 選択するコストの上限
+        samples: 計測回数（中央値を採用）
+
+    Returns:
+        選択した bcrypt コスト
+    """
+    handler = pwd_context.handler("bcrypt").using(rounds=min_rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        handler.hash(_CALIBRATION_SECRET)
+        timings.append((time.perf_counter() - started) * 1000)
+    base_ms = statistics.median(timings)
+
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+
+    logger.info(
+        "bcrypt コストを調整しました: rounds=%d（推定 %.0fms / 目標 %dms）",
+        rounds,
+        base_ms * 2 ** (rounds - min_rounds),
+        target_ms,
+    )
+    return rounds
 
 
 def create_jwt_token(data: dict, expires_delta: timedelta | None = None) -> str:
@@ -37,13 +119,15 @@ def create_jwt_token(data: dict, expires_delta: timedelta | None = None) -> str:
         JWT トークン文字列
     """
     to_encode = data.copy()
+    now = datetime.now(UTC)
 
     if expires_delta:
-        expire = datetime.now(UTC) + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.now(UTC) + timedelta(hours=24)
+        expire = now + timedelta(hours=24)
 
-    to_encode.update({"exp": expire})
+    # iat は全セッション無効化（tokens_valid_after）との比較に使うため小数秒まで含める
+    to_encode.update({"exp": expire, "iat": now.timestamp()})
 
     encoded_jwt = jwt.encode(
         to_encode,
@@ -99,6 +183,7 @@ def create_access_token(
         "sub": str(user_id),
         "username": username,
         "token_type": "access",
+        "jti": str(uuid4()),
     }
 
     token = create_jwt_token(to_encode, expires_delta)
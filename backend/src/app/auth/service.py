@@ -2,19 +2,41 @@
 auth/service.py - 認証ビジネスロジック（TDD実装）
 """
 
+import asyncio
 import re
 from datetime import UTC, datetime, timedelta
 from typing import cast
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from sqlalchemy import select
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.revocation import revocation_list
 from app.auth.schemas import UserLoginSchema, UserRegisterSchema
-from app.auth.security import create_jwt_token, hash_password, verify_access_token, verify_password
+from app.auth.security import (
+    create_jwt_token,
+    hash_password,
+    password_needs_rehash,
+    verify_access_token,
+    verify_password,
+)
 from app.config import settings
 from app.database.models.token import PasswordResetToken, RefreshToken
 from app.database.models.user import User
+from app.database.utils import dialect_insert, unique_violation_column
+
+# revoke_all_sessions で1つの IN 句に含めるユーザー数
+_USER_ID_CHUNK = 1000
+
+# 一意制約違反の列 -> エラーメッセージ
+_UNIQUE_VIOLATION_MESSAGES = {
+    "username": "ユーザー名は既に使用されています",
+    "email": "メールアドレスは既に使用されています",
+}
+
+# 実行中のバックグラウンド再ハッシュ（タスクが途中で破棄されないよう参照を保持）
+_rehash_tasks: set[asyncio.Task[bool]] = set()
 
 
 class AuthService:
@@ -51,35 +73,40 @@ class AuthService:
     # ーーーーーー ユーザー登録 ーーーーーー
 
     async def register_user(self, schema: UserRegisterSchema) -> User:
-        """ユーザーを登録"""
+        """ユーザーを登録
+
+        INSERT ... ON CONFLICT DO NOTHING RETURNING の1文で重複チェックと作成を行います。
+        bcrypt のハッシュ計算はトランザクション開始前にスレッドで実行します。
+        """
         # パスワード要件の検証
         if not self._validate_password(schema.password):
             raise ValueError("パスワードが要件を満たしていません")
 
-        # ユーザー名の重複チェック
-        existing_user = await self.get_user_by_username(schema.username)
-        if existing_user:
-            raise ValueError("ユーザー名は既に使用されています")
-
-        # メールアドレスの重複チェック
-        existing_email = await self.get_user_by_email(schema.email)
-        if existing_email:
-            raise ValueError("メールアドレスは既に使用されています")
-
-        # ユーザー作成
-        new_user = User(
-            username=schema.username,
-            email=schema.email,
-            password_hash=hash_password(schema.password),
-            is_active=True,
+        password_hash = await asyncio.to_thread(hash_password, schema.password)
+
+        # ユーザー作成（ユーザー名・メールアドレスの重複時は行が返らない）
+        stmt = (
+            dialect_insert(self.db, User)
+            .values(username=schema.username, email=schema.email, password_hash=password_hash, is_active=True)
+            .on_conflict_do_nothing()
+            .returning(User)
         )
+        new_user = (await self.db.scalars(stmt)).first()
 
-        self.db.add(new_user)
-        await self.db.commit()
-        await self.db.refresh(new_user)
+        if new_user is None:
+            await self.db.rollback()
+            raise ValueError(await self._conflict_message(schema.username, schema.email))
 
+        await self.db.commit()
         return new_user
 
+    async def _conflict_message(self, username: str, email: str) -> str:
+        """登録時の重複原因を特定してエラーメッセージを返す（重複時のみ実行）"""
+        result = await self.db.execute(select(User.username).where(or_(User.username == username, User.email == email)))
+        if username in result.scalars().all():
+            return _UNIQUE_VIOLATION_MESSAGES["username"]
+        return _UNIQUE_VIOLATION_MESSAGES["email"]
+
     # ーーーーーー ユーザー取得 ーーーーーー
 
     async def get_user_by_username(self, username: str) -> User | None:
@@ -106,24 +133,62 @@ class AuthService:
         if not user:
             raise ValueError("メールアドレスまたはパスワードが不正です")
 
-        if not verify_password(schema.password, user.password_hash):
+        if not await asyncio.to_thread(verify_password, schema.password, user.password_hash):
             raise ValueError("メールアドレスまたはパスワードが不正です")
 
         if not user.is_active:
             raise ValueError("ユーザーが無効化されています")
 
+        # 現在のコストと異なるハッシュはレスポンスを待たせずに更新
+        if password_needs_rehash(user.password_hash):
+            self._schedule_rehash(user.id, schema.password, user.password_hash)
+
         return user
 
+    def _schedule_rehash(self, user_id: UUID, password: str, old_hash: str) -> asyncio.Task[bool]:
+        """パスワードの再ハッシュをバックグラウンドで実行"""
+        task = asyncio.create_task(self._rehash_password(user_id, password, old_hash))
+        _rehash_tasks.add(task)
+        task.add_done_callback(_rehash_tasks.discard)
+        return task
+
+    async def _rehash_password(self, user_id: UUID, password: str, old_hash: str) -> bool:
+        """現在のコストで再ハッシュして保存
+
+        リクエストのセッションは閉じられるため別セッションで更新します。
+        並行してパスワードが変更された場合は上書きしません。
+
+        Returns:
+            更新した場合 True
+        """
+        new_hash = await asyncio.to_thread(hash_password, password)
+        async with AsyncSession(self.db.bind, expire_on_commit=False) as session:
+            result = await session.execute(
+                update(User)
+                .where(User.id == user_id, User.password_hash == old_hash)
+                .values(password_hash=new_hash)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        return bool(result.rowcount)
+
     # ーーーーーー JWTトークン ーーーーーー
 
-    def create_access_token(self, user_id: str, expires_delta: timedelta | None = None) -> str:
-        """アクセストークンを作成"""
+    def create_access_token(
+        self, user_id: str, expires_delta: timedelta | None = None, device_id: str | None = None
+    ) -> str:
+        """アクセストークンを作成
+
+        device_id を指定するとクレームに含め、リクエストごとのデバイス利用時刻の記録に使います。
+        """
         if expires_delta is None:
             expires_delta = timedelta(hours=settings.access_token_expire_hours)
 
-        return cast(
-            str, create_jwt_token(data={"sub": str(user_id), "token_type": "access"}, expires_delta=expires_delta)
-        )
+        data = {"sub": str(user_id), "token_type": "access", "jti": str(uuid4())}
+        if device_id:
+            data["device_id"] = device_id
+
+        return cast(str, create_jwt_token(data=data, expires_delta=expires_delta))
 
     def create_refresh_token(self, user_id: str, device_id: str, expires_delta: timedelta | None = None) -> str:
         """リフレッシュトークンを作成"""
@@ -221,7 +286,7 @@ class AuthService:
         db_token.revoked_at = datetime.now(UTC)
 
         # 新しいトークンを生成
-        new_access_token = self.create_access_token(str(user.id))
+        new_access_token = self.create_access_token(str(user.id), device_id=device_id)
         new_refresh_token = self.create_refresh_token(str(user.id), device_id)
 
         # 新しいリフレッシュトークンをDBに保存
@@ -253,23 +318,75 @@ class AuthService:
         Returns:
             bool: 成功した場合True
         """
-        query = select(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        query = update(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
 
         if device_id:
             query = query.where(RefreshToken.device_id == device_id)
 
-        result = await self.db.execute(query)
-        tokens = result.scalars().all()
+        # 1文のUPDATEで無効化し、対象デバイスを返す
+        result = await self.db.execute(
+            query.values(revoked_at=datetime.now(UTC)).returning(RefreshToken.device_id),
+            execution_options={"synchronize_session": False},
+        )
+        revoked_devices = result.scalars().all()
 
-        if not tokens:
-            return False
+        await self.db.commit()
+        return bool(revoked_devices)
+
+    async def revoke_all_sessions(self, user_ids: list[UUID], chunk_size: int = 10_000) -> int:
+        """
+        複数ユーザーの全セッションを無効化（インシデント対応用）
 
-        # すべてのトークンを無効化
-        for token in tokens:
-            token.revoked_at = datetime.now(UTC)
+        ユーザーIDをチャンクに分け、さらに1トランザクションあたり chunk_size 件ずつ
+        UPDATE することで、数百万件のトークンでも長時間ロックを保持しません。
+        発行済みのアクセストークンは、ユーザーの tokens_valid_after を現在時刻にして
+        それ以前に発行されたもの（iat）を get_current_user で拒否します。
 
+        Args:
+            user_ids: 対象ユーザーIDのリスト
+            chunk_size: 1トランザクションで無効化する最大トークン数
+
+        Returns:
+            int: 無効化したトークン数
+        """
+        total = 0
+        for start in range(0, len(user_ids), _USER_ID_CHUNK):
+            chunk = user_ids[start : start + _USER_ID_CHUNK]
+            await self.db.execute(
+                update(User).where(User.id.in_(chunk)).values(tokens_valid_after=datetime.now(UTC)),
+                execution_options={"synchronize_session": False},
+            )
+            await self.db.commit()
+            while True:
+                batch = (
+                    select(RefreshToken.id)
+                    .where(RefreshToken.user_id.in_(chunk), RefreshToken.revoked_at.is_(None))
+                    .limit(chunk_size)
+                    .scalar_subquery()
+                )
+                result = await self.db.execute(
+                    update(RefreshToken).where(RefreshToken.id.in_(batch)).values(revoked_at=datetime.now(UTC)),
+                    execution_options={"synchronize_session": False},
+                )
+                count = int(result.rowcount or 0)
+                await self.db.commit()
+
+                total += count
+                if count < chunk_size:
+                    break
+        return total
+
+    async def revoke_access_token(self, jti: str, expires_at: datetime) -> None:
+        """
+        アクセストークンを即時失効させる
+
+        Args:
+            jti: アクセストークンの jti クレーム
+            expires_at: アクセストークンの有効期限（以降は失効リストから除去可能）
+        """
+        await revocation_list.revoke(self.db, jti, expires_at)
         await self.db.commit()
-        return True
+        revocation_list.add(jti, expires_at)
 
     # ーーーーーー パスワードリセット ーーーーーー
 
@@ -374,28 +491,33 @@ class AuthService:
     # ーーーーーー ユーザー情報更新 ーーーーーー
 
     async def update_user_profile(self, user_id: UUID, username: str | None = None, email: str | None = None) -> User:
-        """ユーザープロフィールを更新"""
-        user = await self.get_user_by_id(user_id)
-        if not user:
-            raise ValueError("ユーザーが見つかりません")
+        """ユーザープロフィールを更新
 
-        # ユーザー名変更時
-        if username and username != user.username:
-            existing_user = await self.get_user_by_username(username)
-            if existing_user:
-                raise ValueError("ユーザー名は既に使用されています")
-            user.username = username
+        重複チェックは一意制約に任せ、UPDATE ... RETURNING の1文で更新します。
+        """
+        changes: dict[str, str] = {}
+        if username:
+            changes["username"] = username
+        if email:
+            changes["email"] = email
+
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**changes, updated_at=datetime.now(UTC))
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
 
-        # メールアドレス変更時
-        if email and email != user.email:
-            existing_user = await self.get_user_by_email(email)
-            if existing_user:
-                raise ValueError("メールアドレスは既に使用されています")
-            user.email = email
+        try:
+            user = (await self.db.scalars(stmt)).first()
+        except IntegrityError as e:
+            await self.db.rollback()
+            column = unique_violation_column(e, User.__table__)
+            raise ValueError(_UNIQUE_VIOLATION_MESSAGES.get(column or "", "ユーザー情報が重複しています")) from e
 
-        user.updated_at = datetime.now(UTC)
-        self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
+        if not user:
+            raise ValueError("ユーザーが見つかりません")
 
+        await self.db.commit()
         return user
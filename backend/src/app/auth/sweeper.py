@@ -0,0 +1,200 @@
+"""
+auth/sweeper.py - 期限切れ・無効化済みトークンのバックグラウンド削除
+
+`refresh_tokens` / `password_reset_tokens` / `revoked_access_tokens` から
+不要になった行を小さなバッチで削除します。
+
+- 削除条件ごとに専用インデックス（expires_at / revoked_at / used_at）を使う
+- バッチ間に待機を入れて削除レートを制限
+- PostgreSQL のアドバイザリロックでリーダーを選出し、1ワーカーのみが実行
+  （ロックはセッション単位のため、PgBouncer 経由の場合は直接接続のエンジンで取得）
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import ColumnElement, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.auth.revocation import revocation_list
+from app.config import settings
+from app.database.db import engine, session_engine
+from app.database.models.token import PasswordResetToken, RefreshToken, RevokedAccessToken
+from app.database.slowlog import NO_EXPLAIN_OPTION
+
+logger = logging.getLogger(__name__)
+
+# アドバイザリロックのキー（任意の64bit整数）
+SWEEPER_LOCK_KEY = 0x5357_4545_5045_52  # "SWEEPER"
+
+
+@dataclass
+class SweeperStats:
+    """スイーパーの実行統計"""
+
+    runs: int = 0
+    skipped_not_leader: int = 0
+    errors: int = 0
+    deleted: dict[str, int] = field(default_factory=dict)
+    last_run_at: datetime | None = None
+    last_run_seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """統計を辞書で返す"""
+        return {
+            "runs": self.runs,
+            "skipped_not_leader": self.skipped_not_leader,
+            "errors": self.errors,
+            "deleted": dict(self.deleted),
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+class TokenSweeper:
+    """期限切れトークンのバッチ削除タスク"""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        interval_seconds: float = 300.0,
+        batch_size: int = 1000,
+        batch_pause_seconds: float = 0.1,
+        max_batches_per_run: int = 100,
+        retention: timedelta = timedelta(days=7),
+        lock_engine: AsyncEngine | None = None,
+    ):
+        self.engine = engine
+        # リーダー選出のロックを保持する接続のエンジン
+        self.lock_engine = lock_engine or engine
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.batch_pause_seconds = batch_pause_seconds
+        self.max_batches_per_run = max_batches_per_run
+        self.retention = retention
+        self.stats = SweeperStats()
+        self._task: asyncio.Task | None = None
+
+    # ーーーーーー ライフサイクル ーーーーーー
+
+    def start(self) -> None:
+        """バックグラウンドタスクを開始"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever(), name="token-sweeper")
+
+    async def stop(self) -> None:
+        """バックグラウンドタスクを停止"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats.errors += 1
+                logger.exception("トークンの削除に失敗しました")
+            await asyncio.sleep(self.interval_seconds)
+
+    # ーーーーーー 削除処理 ーーーーーー
+
+    async def sweep_once(self) -> dict[str, int] | None:
+        """1回分の削除を実行
+
+        Returns:
+            テーブルごとの削除件数。リーダーでない場合は None
+        """
+        async with self.lock_engine.connect() as lock_conn:
+            # ロックの取得・解放は EXPLAIN の対象外（セッション単位のロックを別の接続で実行させない）
+            await lock_conn.execution_options(**{NO_EXPLAIN_OPTION: True})
+            if not await self._try_lock(lock_conn):
+                self.stats.skipped_not_leader += 1
+                return None
+            try:
+                return await self._sweep()
+            finally:
+                await self._unlock(lock_conn)
+
+    async def _sweep(self) -> dict[str, int]:
+        started = time.perf_counter()
+        now = datetime.now(UTC)
+        cutoff = now - self.retention
+
+        targets: list[tuple[str, Any, ColumnElement[bool]]] = [
+            ("refresh_tokens_expired", RefreshToken, RefreshToken.expires_at < now),
+            ("refresh_tokens_revoked", RefreshToken, RefreshToken.revoked_at < cutoff),
+            ("password_reset_tokens_expired", PasswordResetToken, PasswordResetToken.expires_at < now),
+            ("password_reset_tokens_used", PasswordResetToken, PasswordResetToken.used_at < cutoff),
+        ]
+
+        deleted: dict[str, int] = {}
+        for name, model, condition in targets:
+            deleted[name] = await self._delete_in_batches(model, model.id, condition)
+
+        deleted["revoked_access_tokens"] = await self._delete_in_batches(
+            RevokedAccessToken, RevokedAccessToken.jti, RevokedAccessToken.expires_at < now
+        )
+        if deleted["revoked_access_tokens"]:
+            revocation_list.prune()
+
+        for name, count in deleted.items():
+            self.stats.deleted[name] = self.stats.deleted.get(name, 0) + count
+        self.stats.runs += 1
+        self.stats.last_run_at = now
+        self.stats.last_run_seconds = time.perf_counter() - started
+
+        if any(deleted.values()):
+            logger.info("期限切れトークンを削除しました: %s", deleted)
+        return deleted
+
+    async def _delete_in_batches(self, model: Any, pk: Any, condition: ColumnElement[bool]) -> int:
+        """主キーを batch_size 件ずつ選んで削除"""
+        total = 0
+        for _ in range(self.max_batches_per_run):
+            batch = select(pk).where(condition).limit(self.batch_size).with_for_update(skip_locked=True)
+            async with self.engine.begin() as conn:
+                result = await conn.execute(delete(model).where(pk.in_(batch.scalar_subquery())))
+            count = int(result.rowcount or 0)
+            total += count
+            if count < self.batch_size:
+                break
+            await asyncio.sleep(self.batch_pause_seconds)
+        return total
+
+    # ーーーーーー リーダー選出 ーーーーーー
+
+    async def _try_lock(self, conn: Any) -> bool:
+        if conn.dialect.name != "postgresql":
+            return True
+        result = await conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": SWEEPER_LOCK_KEY})
+        acquired = bool(result.scalar())
+        await conn.commit()
+        return acquired
+
+    async def _unlock(self, conn: Any) -> None:
+        if conn.dialect.name != "postgresql":
+            return
+        await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SWEEPER_LOCK_KEY})
+        await conn.commit()
+
+
+token_sweeper = TokenSweeper(
+    engine,
+    interval_seconds=settings.token_sweeper_interval_seconds,
+    batch_size=settings.token_sweeper_batch_size,
+    batch_pause_seconds=settings.token_sweeper_batch_pause_seconds,
+    max_batches_per_run=settings.token_sweeper_max_batches_per_run,
+    retention=timedelta(days=settings.token_sweeper_retention_days),
+    lock_engine=session_engine,
+)
@@ -0,0 +1,3 @@
+"""
+bootstrap package - アプリ起動時の初期データ一括取得
+"""
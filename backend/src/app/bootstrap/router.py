@@ -0,0 +1,44 @@
+"""
+bootstrap/router.py - 起動時初期データAPIエンドポイント
+"""
+
+from functools import partial
+
+from fastapi import APIRouter, Depends, Header, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.dependencies import get_current_active_user
+from app.bootstrap.schemas import BootstrapResponse
+from app.bootstrap.service import PRODUCTS_ENDPOINT, BootstrapService, response_etag
+from app.database.db import get_session, read_session
+from app.database.models.user import User
+
+router = APIRouter(prefix="/bootstrap", tags=["bootstrap"])
+
+
+@router.get("", response_model=BootstrapResponse)
+async def bootstrap(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_session),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """ユーザー・設定・商品リスト1ページ目を一括取得（認証必須）
+
+    ETag はユーザー・設定・商品の更新時刻から生成し、If-None-Match が一致する場合は
+    商品の本体を読まずに 304 を返します。商品は GET /products/ と同じく
+    リードレプリカから、同じラベル・ステートメントタイムアウトで読みます。
+    """
+    service = BootstrapService(db, partial(read_session, PRODUCTS_ENDPOINT, str(current_user.id)))
+
+    if if_none_match:
+        etag = await service.etag(current_user)
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+
+    payload = await service.load(current_user)
+    body = payload.model_dump_json().encode()
+    return Response(content=body, media_type="application/json", headers=_cache_headers(response_etag(payload)))
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
@@ -0,0 +1,24 @@
+"""
+bootstrap/schemas.py - 起動時初期データスキーマ
+"""
+
+from pydantic import BaseModel
+
+from app.auth.schemas import UserResponse
+from app.products.schemas import PaginationMeta, ProductResponse
+from app.settings.schemas import UserSettingsResponse
+
+
+class ProductPage(BaseModel):
+    """商品リストの1ページ目"""
+
+    items: list[ProductResponse]
+    pagination: PaginationMeta
+
+
+class BootstrapResponse(BaseModel):
+    """起動時初期データレスポンス（/auth/me・/settings・/products の1ページ目）"""
+
+    user: UserResponse
+    settings: UserSettingsResponse
+    products: ProductPage
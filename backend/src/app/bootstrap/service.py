@@ -0,0 +1,127 @@
+"""
+bootstrap/service.py - 起動時初期データ取得サービス
+
+Flutter クライアントが起動時に順に呼んでいた /auth/me・/settings・/products を
+1リクエストにまとめ、設定と商品リストを別々の接続で並行して取得します。
+
+ETag はレスポンス本体ではなく、ユーザー・設定の updated_at と1ページ目の商品の
+ID・updated_at（と次ページの有無）から計算します。If-None-Match の判定は
+商品の ID・updated_at だけを読んで行い、一致すれば本体を組み立てません。
+"""
+
+import asyncio
+import hashlib
+from collections.abc import Callable, Sequence
+from contextlib import AbstractAsyncContextManager
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.schemas import UserResponse
+from app.bootstrap.schemas import BootstrapResponse, ProductPage
+from app.database.models.product import Product
+from app.database.models.user import User
+from app.products.fastpath import ProductsFastPath
+from app.products.schemas import ProductListParams, ProductResponse
+from app.settings.schemas import UserSettingsResponse
+from app.settings.service import SettingsService
+
+# 1ページ目として先読みする件数（UserSettings.default_page_size の上限）
+_MAX_PAGE_SIZE = 100
+
+# 商品は一覧（GET /products/）と同じエンドポイントとして読む（ラベル・タイムアウト・レプリカ振り分け）
+PRODUCTS_ENDPOINT = "GET /products/"
+
+# ETag の計算方法・レスポンス形式を変えたら上げる
+_ETAG_VERSION = "1"
+
+
+class BootstrapService:
+    """起動時初期データ取得サービス"""
+
+    def __init__(self, db: AsyncSession, session_factory: Callable[[], AbstractAsyncContextManager[AsyncSession]]):
+        """初期化
+
+        Args:
+            db: リクエストのセッション（設定の取得に使用）
+            session_factory: 商品リストを並行取得するための別セッション（読み取り用）のファクトリ
+        """
+        self.db = db
+        self.session_factory = session_factory
+
+    async def load(self, user: User) -> BootstrapResponse:
+        """ユーザー・設定・商品リスト1ページ目を取得
+
+        商品リストはページサイズ（設定値）の取得を待たずに上限件数で並行取得し、
+        設定が揃ってから default_page_size 件に切り詰めます。
+        """
+        settings, products = await asyncio.gather(
+            SettingsService(self.db).get_or_create_user_settings(user.id),
+            self._load_products(_MAX_PAGE_SIZE),
+        )
+        return BootstrapResponse(
+            user=UserResponse.model_validate(user),
+            settings=settings,
+            products=self._first_page(products, settings),
+        )
+
+    async def etag(self, user: User) -> str:
+        """レスポンス本体を組み立てずに ETag を計算（If-None-Match の判定用）
+
+        商品は一覧と同じ並び順で ID と updated_at だけを読みます。
+        """
+        settings, versions = await asyncio.gather(
+            SettingsService(self.db).get_or_create_user_settings(user.id),
+            self._load_product_versions(_MAX_PAGE_SIZE + 1),
+        )
+        page_size = settings.default_page_size
+        return compute_etag(user, settings, versions[:page_size], has_more=len(versions) > page_size)
+
+    async def _load_products(self, limit: int) -> dict[str, Any]:
+        """別セッション（別接続）で商品リストを取得"""
+        async with self.session_factory() as session:
+            return await ProductsFastPath(session).list_products(ProductListParams(limit=limit))
+
+    async def _load_product_versions(self, limit: int) -> list[Any]:
+        """別セッションで商品リスト先頭の (id, updated_at) を取得（ProductsFastPath の既定の並び順）"""
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Product.id, Product.updated_at)
+                .order_by(Product.created_at.desc(), Product.id.desc())
+                .limit(limit)
+            )
+            return list(result.all())
+
+    @staticmethod
+    def _first_page(result: dict[str, Any], settings: UserSettingsResponse) -> ProductPage:
+        """先読みした商品リストを default_page_size 件に切り詰め"""
+        items = result["items"]
+        page_size = settings.default_page_size
+        has_more = len(items) > page_size or result["pagination"]["has_more"]
+        items = items[:page_size]
+
+        return ProductPage(
+            items=[ProductResponse.model_validate(item) for item in items],
+            pagination={
+                "next_cursor": str(items[-1].id) if items and has_more else None,
+                "has_more": has_more,
+                "returned_count": len(items),
+                "total_count_estimate": None,
+            },
+        )
+
+
+def compute_etag(user: Any, settings: Any, products: Sequence[Any], has_more: bool) -> str:
+    """ユーザー・設定・1ページ目の商品の ID と updated_at、次ページの有無から ETag を生成"""
+    parts = [_ETAG_VERSION, str(user.id), user.updated_at.isoformat(), settings.updated_at.isoformat()]
+    parts.extend(f"{product.id}:{product.updated_at.isoformat()}" for product in products)
+    parts.append("more" if has_more else "last")
+    return f'"{hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]}"'
+
+
+def response_etag(payload: BootstrapResponse) -> str:
+    """組み立て済みのレスポンスの ETag（BootstrapService.etag と同じ値）"""
+    return compute_etag(
+        payload.user, payload.settings, payload.products.items, has_more=payload.products.pagination.has_more
+    )
@@ -2,6 +2,9 @@
 config.py - アプリケーション設定
 """
 
+from typing import Self
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -16,12 +19,130 @@ class Settings(BaseSettings):
     # データベース
     database_url: str = "postgresql+asyncpg://postgres:postgres@db:5432/ultra_fast_db"
 
+    # コネクションプール（ワーカーごと。ワーカー数 × (pool_size + max_overflow) が
+    # PostgreSQL の max_connections を超えないように設定）
+    db_pool_size: int = 20
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+
+    # ステートメントタイムアウト（ミリ秒。0 は無制限）
+    # 接続ごとの既定値と、エンドポイント（"GET /products/" など）ごとの上書き
+    statement_timeout_ms: int = 30_000
+    statement_timeouts_ms: dict[str, int] = {}
+
+    # クライアント切断時に処理中のリクエスト（実行中のクエリを含む）をキャンセル
+    request_cancellation_enabled: bool = True
+
+    # アドミッション制御（ルートクラスごとの同時実行数。超過分は待ち行列へ、溢れたら 503）
+    admission_control_enabled: bool = True
+    admission_read_concurrency: int = 200
+    admission_search_concurrency: int = 16
+    admission_auth_concurrency: int = 8
+    admission_write_concurrency: int = 32
+    admission_queue_size: int = 100
+    admission_target_delay_ms: float = 5.0
+    admission_interval_ms: float = 100.0
+    # ルートクラス（"read" など）ごとの上書き: CoDel の target / interval と、過負荷でないときの待ち時間上限
+    # （未指定の待ち時間上限は interval。auth の既定は bcrypt_target_ms に合わせる）
+    admission_target_delays_ms: dict[str, float] = {}
+    admission_intervals_ms: dict[str, float] = {}
+    admission_queue_timeouts_ms: dict[str, float] = {}
+
+    # PgBouncer（transaction モード）経由で接続する場合に有効化
+    # プリペアドステートメントのキャッシュを無効化し、名前を接続ごとに一意にします。
+    # LISTEN / アドバイザリロックなどセッション単位の状態は database_direct_url
+    # （PostgreSQL へ直接接続）を使います。transaction モードでは必須、それ以外で未設定時は database_url を使います。
+    db_pgbouncer_transaction_mode: bool = False
+    database_direct_url: str | None = None
+
+    # プール上限の自動調整（待ち時間に応じて pool_size 〜 max_connections の範囲で増減）
+    db_pool_adaptive: bool = False
+    db_pool_adaptive_max_connections: int = 40
+    db_pool_adaptive_target_wait_ms: float = 10.0
+    db_pool_adaptive_interval_seconds: float = 15.0
+    db_pool_adaptive_step: int = 2
+
+    # リードレプリカ（未設定時はすべてプライマリで処理）
+    database_replica_urls: list[str] = []
+    replica_max_lag_seconds: float = 5.0
+    replica_health_check_interval_seconds: float = 5.0
+    read_your_writes_seconds: float = 10.0
+
     # JWT設定
     jwt_secret_key: str = "your-secret-key-change-in-production"
     jwt_algorithm: str = "HS256"
     access_token_expire_hours: int = 24
     refresh_token_expire_days: int = 30
 
+    # パスワードハッシュ（起動時に bcrypt コストを目標時間へ自動調整）
+    bcrypt_target_ms: int = 250
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 15
+    bcrypt_rounds: int | None = None  # 指定時は計測せず固定
+
+    # 管理API（X-Admin-Token ヘッダーで認証。未設定時は管理APIを無効化）
+    admin_api_key: str | None = None
+
+    # ユーザー一括インポート（POST /admin/users/import はバックグラウンドジョブとして実行）
+    # ハッシュ計算のプロセスプールは起動時に1つだけ作成し、同時に実行するジョブ数も制限します
+    # （大量の取り込みで全コアを使う場合は scripts/import_users.py を使用）
+    user_import_workers: int = 2
+    user_import_max_concurrent_jobs: int = 1
+
+    # アクセストークン失効リスト（Bloomフィルタ）
+    revocation_bloom_capacity: int = 100_000
+    revocation_bloom_error_rate: float = 0.001
+
+    # 期限切れトークンのバックグラウンド削除
+    token_sweeper_enabled: bool = True
+    token_sweeper_interval_seconds: int = 300
+    token_sweeper_batch_size: int = 1000
+    token_sweeper_batch_pause_seconds: float = 0.1
+    token_sweeper_max_batches_per_run: int = 100
+    token_sweeper_retention_days: int = 7
+
+    # デバイス利用時刻（last_used_at）の遅延書き込み
+    device_activity_flush_interval_seconds: int = 30
+    device_activity_max_entries: int = 100_000
+
+    # レート制限（認証エンドポイント）
+    rate_limit_enabled: bool = True
+    rate_limit_storage: str = "memory"  # memory / postgres
+    rate_limit_ip_per_minute: int = 30
+    rate_limit_email_per_minute: int = 5
+    rate_limit_user_per_minute: int = 5
+    rate_limit_compaction_interval_seconds: int = 60
+
+    # 商品エンドポイントの行数クォータ（返却行数 / ウィンドウ。rate_limit_storage=postgres で全ワーカー共有）
+    product_quota_enabled: bool = True
+    product_quota_user_rows: int = 100_000
+    product_quota_ip_rows: int = 200_000
+    product_quota_window_seconds: int = 3600
+    product_quota_sync_interval_seconds: float = 1.0
+
+    # ユーザー設定キャッシュ（プロセス内。他ワーカーでの更新は TTL 経過で反映）
+    settings_cache_ttl_seconds: int = 60
+    settings_cache_max_entries: int = 10_000
+
+    # メトリクス（GET /metrics で Prometheus 形式を公開）
+    # 複数ワーカー時は共有ディレクトリを指定すると、各ワーカーの値を合算して返します
+    metrics_enabled: bool = True
+    metrics_multiprocess_dir: str | None = None
+    metrics_write_interval_seconds: float = 5.0
+
+    # 処理時間の内訳（Server-Timing ヘッダー）。閾値（ミリ秒）を設定すると超えたリクエストをログに出力
+    # ヘッダーは信頼できる呼び出し元（X-Admin-Token が admin_api_key と一致、または許可 IP / CIDR）にのみ返します
+    server_timing_enabled: bool = False
+    server_timing_allowed_ips: list[str] = []
+    server_timing_log_threshold_ms: float | None = None
+
+    # スロークエリログ（閾値未設定で無効。PostgreSQL の SELECT は一定割合で EXPLAIN ANALYZE を取得）
+    slow_query_threshold_ms: float | None = 200.0
+    slow_query_buffer_size: int = 200
+    slow_query_explain_sample_rate: float = 0.1
+    slow_query_explain_timeout_ms: int = 10_000
+
     # アプリケーション設定
     debug: bool = False
     app_name: str = "UltraFastAPI"
@@ -33,5 +154,13 @@ class Settings(BaseSettings):
     # ログ設定
     log_level: str = "INFO"
 
+    @model_validator(mode="after")
+    def _check_direct_url(self) -> Self:
+        # transaction モードの接続では失効通知の LISTEN・スイーパーのアドバイザリロックが
+        # エラーにならずに機能しなくなるため、起動時に設定漏れを検出する
+        if self.db_pgbouncer_transaction_mode and not self.database_direct_url:
+            raise ValueError("DB_PGBOUNCER_TRANSACTION_MODE を有効にする場合は DATABASE_DIRECT_URL を設定してください")
+        return self
+
 
 settings = Settings()
@@ -4,7 +4,15 @@ database/__init__.py - データベース設定のエクスポート
 
 from app.database.base import Base
 from app.database.db import close_db, get_session, init_db
-from app.database.models import PasswordResetToken, Product, RefreshToken, User, UserSettings
+from app.database.models import (
+    PasswordResetToken,
+    Product,
+    RateLimitBucket,
+    RefreshToken,
+    RevokedAccessToken,
+    User,
+    UserSettings,
+)
 
 __all__ = [
     "Base",
@@ -14,6 +22,8 @@ __all__ = [
     "User",
     "RefreshToken",
     "PasswordResetToken",
+    "RevokedAccessToken",
     "Product",
+    "RateLimitBucket",
     "UserSettings",
 ]
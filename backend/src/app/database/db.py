@@ -2,20 +2,87 @@
 database/db.py - 非同期データベース接続管理
 """
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
+from app.auth.security import verify_access_token
 from app.config import settings
 from app.database.base import Base
+from app.database.instrumentation import instrument_queries
+from app.database.pool import InstrumentedPool, PoolController, transaction_pooling_connect_args
+from app.database.routing import EngineRouter
+from app.database.session import LazySession
+from app.database.timeouts import statement_timeout_ms
+from app.metrics import endpoint_label
+
+
+def _create_engine(url: str, label: str, transaction_pooling: bool = False) -> AsyncEngine:
+    """計測付きプールを使う非同期エンジンを作成
+
+    接続時にステートメントタイムアウトの既定値を設定します（PgBouncer は起動パラメータを
+    転送しないため、transaction モードではロールの設定 `ALTER ROLE ... SET statement_timeout` を使用）。
+    """
+    if transaction_pooling:
+        connect_args = transaction_pooling_connect_args()
+    elif make_url(url).get_driver_name() == "asyncpg" and settings.statement_timeout_ms:
+        connect_args = {"server_settings": {"statement_timeout": str(settings.statement_timeout_ms)}}
+    else:
+        connect_args = {}
+    new_engine = create_async_engine(
+        url,
+        echo=settings.debug,
+        poolclass=InstrumentedPool,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        connect_args=connect_args,
+    )
+    new_engine.pool.instrument(label)
+    instrument_queries(new_engine)
+    return new_engine
+
 
 # 非同期エンジンを作成
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10,
+engine = _create_engine(settings.database_url, "primary", settings.db_pgbouncer_transaction_mode)
+
+# リードレプリカのエンジン（プライマリと同じプール設定）
+replica_engines = [
+    _create_engine(url, f"replica-{index}", settings.db_pgbouncer_transaction_mode)
+    for index, url in enumerate(settings.database_replica_urls, start=1)
+]
+
+# セッション単位の状態（LISTEN / アドバイザリロック）を使う処理用のエンジン
+# PgBouncer の transaction モードではトランザクションをまたいで同じサーバー接続を使えないため、
+# PostgreSQL へ直接接続します（常時保持するのは失効通知の購読とスイーパーのロック用の数本）
+# transaction モードで database_direct_url が未設定の場合は設定の読み込み時にエラーになります
+session_engine = (
+    create_async_engine(settings.database_direct_url, echo=settings.debug, pool_pre_ping=True, pool_size=2)
+    if settings.database_direct_url
+    else engine
+)
+
+# プール上限の自動調整（db_pool_adaptive 有効時に lifespan で開始）
+pool_controller = PoolController(
+    [engine, *replica_engines],
+    max_connections=settings.db_pool_adaptive_max_connections,
+    target_wait_seconds=settings.db_pool_adaptive_target_wait_ms / 1000,
+    interval_seconds=settings.db_pool_adaptive_interval_seconds,
+    step=settings.db_pool_adaptive_step,
+)
+
+# 読み取り/書き込みのエンジン選択
+engine_router = EngineRouter(
+    engine,
+    replica_engines,
+    max_lag_seconds=settings.replica_max_lag_seconds,
+    health_check_interval_seconds=settings.replica_health_check_interval_seconds,
+    sticky_seconds=settings.read_your_writes_seconds,
 )
 
 # 非同期セッションファクトリ
@@ -26,9 +93,67 @@ async_session_maker = async_sessionmaker(
 )
 
 
-async def get_session() -> AsyncGenerator[AsyncSession]:
-    """リクエストごとのセッション取得"""
-    async with async_session_maker() as session:
+# リクエスト用セッションファクトリ（読み取り後すぐに接続を返却）
+lazy_session_maker = async_sessionmaker(
+    bind=engine,
+    class_=LazySession,
+    expire_on_commit=False,
+)
+
+
+def request_user_key(request: Request) -> str | None:
+    """read-your-writes の判定に使うユーザーキー
+
+    認証済みなら get_current_user が設定したユーザーID、
+    認証前ならアクセストークンの sub を使います。
+    """
+    user_id = getattr(request.state, "user_id", None)
+    if user_id is not None:
+        return str(user_id)
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = verify_access_token(token)
+    return payload.get("sub") if payload else None
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession]:
+    """リクエストごとのセッション取得（プライマリ）
+
+    接続は最初のクエリ実行時にのみ取得し、読み取り専用の処理後すぐに返却します。
+    書き込みを commit すると、そのユーザーの読み取りを一定時間プライマリに固定します。
+    """
+    async with lazy_session_maker() as session:
+        session.endpoint = endpoint_label(request.scope)
+        session.statement_timeout_ms = statement_timeout_ms(session.endpoint)
+        session.on_write = lambda: engine_router.mark_write(request_user_key(request))
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession]:
+    """読み取り専用エンドポイント用のセッション取得（リードレプリカ）
+
+    レプリカ未設定・全レプリカ利用不可・直前に書き込んだユーザーの場合はプライマリを使います。
+    """
+    async with read_session(endpoint_label(request.scope), request_user_key(request)) as session:
+        yield session
+
+
+@asynccontextmanager
+async def read_session(endpoint: str, user_key: str | None) -> AsyncIterator[AsyncSession]:
+    """指定したエンドポイントとして読み取り用セッションを取得（リードレプリカ）
+
+    メトリクスのラベルとステートメントタイムアウトは endpoint のものを使います。
+    複数のエンドポイントの内容をまとめて返す処理（/bootstrap など）で、
+    元のエンドポイントと同じ振り分け・予算で読むために使います。
+    """
+    async with lazy_session_maker(bind=engine_router.reader(user_key)) as session:
+        session.endpoint = endpoint
+        session.statement_timeout_ms = statement_timeout_ms(endpoint)
         try:
             yield session
         finally:
@@ -43,4 +168,7 @@ async def init_db():
 
 async def close_db():
     """データベース接続をクローズ"""
+    await engine_router.dispose()
+    if session_engine is not engine:
+        await session_engine.dispose()
     await engine.dispose()
@@ -0,0 +1,67 @@
+"""
+database/instrumentation.py - リクエストごとのクエリ計測
+
+エンジンのカーソル実行イベントでクエリの実行時間を計り、
+現在のリクエストの処理時間の内訳（app/timing.py）へ区間 "db" として加算します。
+リクエスト外（バックグラウンドタスクなど）のクエリは内訳には記録しません。
+閾値を超えたクエリはリクエストの内外を問わずスロークエリログ（database/slowlog.py）へ記録します。
+
+asyncpg 接続を直接使う読み取りパス（products/fastpath.py）はイベントを経由しないため、
+`span(DB_SPAN)` で同じ区間へ記録します。
+"""
+
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.slowlog import NO_EXPLAIN_OPTION, SKIP_OPTION, slow_query_log
+from app.timing import add_span, current_timings
+
+# クエリ実行時間の区間名
+DB_SPAN = "db"
+
+# 接続の info に積むクエリ開始時刻のキー
+_STARTED_KEY = "query_started"
+
+
+def _before_cursor_execute(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool):
+    conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+
+def _handle_error(context: Any) -> None:
+    # 失敗したクエリも実行時間として記録する
+    conn = context.connection
+    if conn is not None and conn.info.get(_STARTED_KEY):
+        add_span(DB_SPAN, time.perf_counter() - conn.info[_STARTED_KEY].pop())
+
+
+def instrument_queries(engine: AsyncEngine) -> None:
+    """エンジンのクエリ実行を計測"""
+
+    def after_cursor_execute(
+        conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info[_STARTED_KEY].pop()
+        timings = current_timings()
+        if timings is not None:
+            timings.add(DB_SPAN, elapsed)
+        if elapsed >= slow_query_log.threshold_seconds and not conn.get_execution_options().get(SKIP_OPTION):
+            endpoint = timings.endpoint() if timings is not None else None
+            # 接続・クエリ単位の実行オプション（NO_EXPLAIN_OPTION）は context にまとめられている
+            options = context.execution_options if context is not None else conn.get_execution_options()
+            slow_query_log.record(
+                engine,
+                statement,
+                parameters,
+                executemany,
+                elapsed,
+                endpoint,
+                explain=not options.get(NO_EXPLAIN_OPTION),
+            )
+
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
@@ -3,14 +3,20 @@ database/models/__init__.py - モデルエクスポート
 """
 
 from app.database.models.product import Product
+from app.database.models.ratelimit import RateLimitBucket, RowQuotaUsage
 from app.database.models.settings import UserSettings
-from app.database.models.token import PasswordResetToken, RefreshToken
+from app.database.models.token import PasswordResetToken, RefreshToken, RevokedAccessToken
 from app.database.models.user import User
+from app.database.models.user_import import UserImportJob
 
 __all__ = [
     "User",
     "RefreshToken",
     "PasswordResetToken",
+    "RevokedAccessToken",
     "Product",
+    "RateLimitBucket",
+    "RowQuotaUsage",
     "UserSettings",
+    "UserImportJob",
 ]
@@ -22,7 +22,7 @@ class Product(Base):
     __tablename__ = "products"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    name = Column(String(255), nullable=False, index=True)
+    name = Column(String(255), nullable=False)
     description = Column(Text)
     category = Column(String(100), nullable=False, index=True)
     status = Column(String(50), nullable=False, index=True)
@@ -33,11 +33,17 @@ class Product(Base):
     updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now, nullable=False)
 
     __table_args__ = (
-        # 無限スクロール最適化
-        Index("idx_products_created_at_desc", "created_at", postgresql_using="desc"),
+        # 無限スクロール最適化（ソート列ごとのキーセット。降順は後方スキャン）
         Index("idx_products_created_at_id", "created_at", "id"),
+        Index("idx_products_name_id", "name", "id"),
+        Index("idx_products_price_id", "price", "id"),
+        Index("idx_products_updated_at_id", "updated_at", "id"),
+        # フィルタリング + ソート最適化
+        Index("idx_products_category_status_created_at_id", "category", "status", "created_at", "id"),
+        Index("idx_products_category_status_name_id", "category", "status", "name", "id"),
+        Index("idx_products_category_status_price_id", "category", "status", "price", "id"),
+        Index("idx_products_category_status_updated_at_id", "category", "status", "updated_at", "id"),
         # フィルタリング最適化
-        Index("idx_products_category_status", "category", "status"),
         Index("idx_products_category", "category"),
         Index("idx_products_status", "status"),
         # ユーザー検索
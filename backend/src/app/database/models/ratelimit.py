@@ -0,0 +1,27 @@
+"""
+database/models/ratelimit.py - レート制限バケット・行数クォータモデル（ノード間共有ストレージ用）
+"""
+
+from sqlalchemy import BigInteger, Column, DateTime, Float, String
+
+from app.database.base import Base
+
+
+class RateLimitBucket(Base):
+    """トークンバケット状態テーブル"""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String(255), primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class RowQuotaUsage(Base):
+    """行数クォータの使用量テーブル（固定ウィンドウごと）"""
+
+    __tablename__ = "row_quota_usage"
+
+    key = Column(String(255), primary_key=True)
+    window_start = Column(BigInteger, primary_key=True, index=True)  # ウィンドウ開始時刻（UNIX秒）
+    rows = Column(BigInteger, nullable=False)
@@ -35,6 +35,25 @@ class RefreshToken(Base):
     __table_args__ = (
         Index("idx_refresh_tokens_user_id", "user_id"),
         Index("idx_refresh_tokens_token_hash", "token_hash"),
+        # 期限切れ・無効化済みトークンの削除用
+        Index("idx_refresh_tokens_expires_at", "expires_at"),
+        Index("idx_refresh_tokens_revoked_at", "revoked_at", postgresql_where=revoked_at.isnot(None)),
+        # デバイス一覧のキーセットページネーション用（有効なトークンのみ）
+        Index(
+            "idx_refresh_tokens_user_last_used",
+            "user_id",
+            last_used_at.desc(),
+            id.desc(),
+            postgresql_where=revoked_at.is_(None),
+        ),
+        # デバイスごとの最新トークン判定用
+        Index(
+            "idx_refresh_tokens_user_device",
+            "user_id",
+            "device_id",
+            last_used_at.desc(),
+            postgresql_where=revoked_at.is_(None),
+        ),
     )
 
 
@@ -53,4 +72,18 @@ class PasswordResetToken(Base):
     __table_args__ = (
         Index("idx_password_reset_tokens_user_id", "user_id"),
         Index("idx_password_reset_tokens_token_hash", "token_hash"),
+        # 期限切れ・使用済みトークンの削除用
+        Index("idx_password_reset_tokens_expires_at", "expires_at"),
+        Index("idx_password_reset_tokens_used_at", "used_at", postgresql_where=used_at.isnot(None)),
     )
+
+
+class RevokedAccessToken(Base):
+    """失効済みアクセストークンテーブル（jtiのみ保持）"""
+
+    __tablename__ = "revoked_access_tokens"
+
+    jti = Column(String(36), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("idx_revoked_access_tokens_expires_at", "expires_at"),)
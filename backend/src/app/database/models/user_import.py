@@ -0,0 +1,34 @@
+"""
+database/models/user_import.py - ユーザー一括インポートジョブモデル
+"""
+
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from sqlalchemy import JSON, Column, DateTime, Index, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database.base import Base
+
+
+def utc_now():
+    """UTC現在時刻を返す"""
+    return datetime.now(UTC)
+
+
+class UserImportJob(Base):
+    """ユーザー一括インポートジョブテーブル（どのワーカーからでも状態を参照できるよう DB に保存）"""
+
+    __tablename__ = "user_import_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    status = Column(String(20), nullable=False)  # queued / running / succeeded / failed
+    filename = Column(String(255))
+    format = Column(String(20), nullable=False)
+    report = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), default=utc_now, nullable=False)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (Index("idx_user_import_jobs_created_at", "created_at"),)
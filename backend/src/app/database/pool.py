@@ -0,0 +1,219 @@
+"""
+database/pool.py - コネクションプールの計測と適応的なサイズ調整
+
+InstrumentedPool は AsyncAdaptedQueuePool に計測を加えたプールです。
+
+- チェックアウト所要時間（待ち時間 + 新規接続の確立時間）をヒストグラムへ記録
+- pool_timeout によるタイムアウト、接続の確立・切断回数をカウンタへ記録
+- 使用中 / 待機中 / オーバーフロー / 上限の接続数をゲージとして公開
+
+PoolController は一定間隔でプールの待ち時間を確認し、
+接続数の上限（pool_size + max_overflow）を設定した範囲内で増減します。
+常駐する接続数（pool_size）は変えず、オーバーフロー枠だけを調整するため、
+縮小時に余った接続は返却時に順次切断されます。
+
+transaction_pooling_connect_args は PgBouncer の transaction モード向けの
+asyncpg 接続引数です。トランザクションごとにサーバー側の接続が入れ替わるため、
+接続に紐づくプリペアドステートメントのキャッシュを使わず、名前の衝突も避けます。
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.metrics import (
+    db_pool_checkout_seconds,
+    db_pool_connections,
+    db_pool_connections_closed_total,
+    db_pool_connections_opened_total,
+    db_pool_timeouts_total,
+)
+
+logger = logging.getLogger(__name__)
+
+# QueuePool._do_get は内部で再帰するため、外側の呼び出しだけを計測する
+_in_checkout: ContextVar[bool] = ContextVar("pool_in_checkout", default=False)
+
+
+def _statement_name() -> str:
+    return f"__asyncpg_{uuid4().hex}__"
+
+
+def transaction_pooling_connect_args() -> dict[str, Any]:
+    """PgBouncer（transaction モード）経由で接続するための asyncpg 接続引数"""
+    return {
+        # asyncpg 自身のステートメントキャッシュ
+        "statement_cache_size": 0,
+        # SQLAlchemy の asyncpg アダプタのステートメントキャッシュ
+        "prepared_statement_cache_size": 0,
+        # 別クライアントが同じサーバー接続で準備した名前と衝突しないようにする
+        "prepared_statement_name_func": _statement_name,
+    }
+
+
+@dataclass
+class PoolWindow:
+    """前回の集計以降のチェックアウト統計"""
+
+    checkouts: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    timeouts: int = 0
+    peak_in_use: int = 0
+
+    @property
+    def wait_mean(self) -> float:
+        return self.wait_total / self.checkouts if self.checkouts else 0.0
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """計測付きの非同期キュープール"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.label = "default"
+        self._window = PoolWindow()
+
+    def instrument(self, label: str) -> None:
+        """メトリクスのラベルを設定し、接続数ゲージを登録"""
+        self.label = label
+        for state, function in (
+            ("in_use", self.checkedout),
+            ("idle", self.checkedin),
+            ("overflow", lambda: max(self.overflow(), 0)),
+            ("capacity", self.capacity),
+        ):
+            db_pool_connections.set_function(function, pool=label, state=state)
+
+    def capacity(self) -> int:
+        """同時に保持できる接続数の上限"""
+        return self.size() + max(self._max_overflow, 0)
+
+    def resize(self, capacity: int) -> None:
+        """接続数の上限を変更（pool_size 未満にはしない）"""
+        self._max_overflow = max(capacity - self.size(), 0)
+
+    def take_window(self) -> PoolWindow:
+        """前回の呼び出し以降の統計を取得してリセット"""
+        window, self._window = self._window, PoolWindow(peak_in_use=self.checkedout())
+        return window
+
+    def _do_get(self) -> Any:
+        if _in_checkout.get():
+            return super()._do_get()
+
+        token = _in_checkout.set(True)
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self._window.timeouts += 1
+            db_pool_timeouts_total.inc(pool=self.label)
+            raise
+        finally:
+            _in_checkout.reset(token)
+
+        elapsed = time.perf_counter() - started
+        db_pool_checkout_seconds.observe(elapsed, pool=self.label)
+        window = self._window
+        window.checkouts += 1
+        window.wait_total += elapsed
+        window.wait_max = max(window.wait_max, elapsed)
+        window.peak_in_use = max(window.peak_in_use, self.checkedout())
+        return record
+
+    def _create_connection(self) -> Any:
+        record = super()._create_connection()
+        db_pool_connections_opened_total.inc(pool=self.label)
+        return record
+
+    def _close_connection(self, connection: Any, *, terminate: bool = False) -> None:
+        super()._close_connection(connection, terminate=terminate)
+        db_pool_connections_closed_total.inc(pool=self.label)
+
+    def recreate(self) -> "InstrumentedPool":
+        # engine.dispose() で作り直したプールにもラベルと現在の上限を引き継ぐ
+        pool = super().recreate()
+        pool.instrument(self.label)
+        return pool
+
+
+class PoolController:
+    """待ち時間に応じてプールの接続数上限を増減するコントローラ"""
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        max_connections: int,
+        target_wait_seconds: float = 0.01,
+        interval_seconds: float = 15.0,
+        step: int = 2,
+    ):
+        self.engines = engines
+        self.max_connections = max_connections
+        self.target_wait_seconds = target_wait_seconds
+        self.interval_seconds = interval_seconds
+        self.step = step
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """定期調整を開始"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever(), name="pool-controller")
+
+    async def stop(self) -> None:
+        """定期調整を停止"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            self.adjust()
+
+    def adjust(self) -> None:
+        """各プールの直近の統計から上限を1段階調整"""
+        for engine in self.engines:
+            pool = engine.pool
+            if isinstance(pool, InstrumentedPool):
+                self._adjust_pool(pool)
+
+    def _adjust_pool(self, pool: InstrumentedPool) -> None:
+        window = pool.take_window()
+        capacity = pool.capacity()
+        minimum = pool.size()
+        maximum = max(self.max_connections, minimum)
+
+        if window.timeouts or window.wait_mean > self.target_wait_seconds:
+            # 待ちが発生している: 上限を引き上げる
+            new_capacity = min(capacity + self.step, maximum)
+        elif window.wait_max <= self.target_wait_seconds and window.peak_in_use + self.step < capacity:
+            # 待ちがなく、上限まで使われていない: 余分なオーバーフロー枠を減らす
+            new_capacity = max(capacity - self.step, minimum)
+        else:
+            return
+
+        if new_capacity != capacity:
+            pool.resize(new_capacity)
+            logger.info(
+                "接続数の上限を変更しました: %s %d -> %d (平均待ち %.1fms, タイムアウト %d, 最大使用数 %d)",
+                pool.label,
+                capacity,
+                new_capacity,
+                window.wait_mean * 1000,
+                window.timeouts,
+                window.peak_in_use,
+            )
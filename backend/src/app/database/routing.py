@@ -0,0 +1,175 @@
+"""
+database/routing.py - 読み取り/書き込みエンジンのルーティング
+
+書き込みはプライマリ、読み取り専用のエンドポイントはリードレプリカへ振り分けます。
+
+- ヘルスチェック済みのレプリカをラウンドロビンで選択
+- レプリケーション遅延が閾値を超えたレプリカ・応答しないレプリカは除外し、
+  利用できるレプリカがなければプライマリへフォールバック
+- ユーザーが書き込んだ直後の一定時間はそのユーザーの読み取りをプライマリに固定
+  （read-your-writes。スティッキー状態はプロセス内で保持）
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# レプリカの状態: リカバリ中か、WAL レシーバーの状態、遅延（秒。受信済みの WAL をすべて適用済みなら 0）
+# WAL レシーバーが切断されると受信位置と適用位置が同じまま止まり遅延 0 に見えるため、
+# status が streaming でないレプリカは除外する（status の参照には pg_read_all_stats 権限が必要）
+_LAG_QUERY = text(
+    "SELECT pg_is_in_recovery() AS in_recovery, "
+    "(SELECT status FROM pg_stat_wal_receiver) AS receiver_status, "
+    "CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END AS lag"
+)
+
+# スティッキー状態をまとめて掃除する件数の目安
+_STICKY_PRUNE_THRESHOLD = 10_000
+
+
+@dataclass
+class ReplicaState:
+    """レプリカの状態"""
+
+    engine: AsyncEngine
+    healthy: bool = True
+    lag_seconds: float = 0.0
+    last_error: str | None = None
+
+    @property
+    def name(self) -> str:
+        """ログ・統計用の名前（パスワードを含まない接続先）"""
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class EngineRouter:
+    """プライマリ / リードレプリカのエンジン選択"""
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine] | None = None,
+        max_lag_seconds: float = 5.0,
+        health_check_interval_seconds: float = 5.0,
+        sticky_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.primary = primary
+        self.replicas = [ReplicaState(replica) for replica in replicas or []]
+        self.max_lag_seconds = max_lag_seconds
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self.sticky_seconds = sticky_seconds
+        self._clock = clock
+        self._round_robin = itertools.count()
+        # ユーザーキー -> プライマリに固定する期限
+        self._sticky_until: dict[str, float] = {}
+        self._task: asyncio.Task | None = None
+        self.primary_fallbacks = 0
+
+    # ーーーーーー エンジン選択 ーーーーーー
+
+    @property
+    def engines(self) -> list[AsyncEngine]:
+        """プライマリとすべてのレプリカのエンジン（プライマリが先頭）"""
+        return [self.primary, *(replica.engine for replica in self.replicas)]
+
+    def reader(self, user_key: str | None = None) -> AsyncEngine:
+        """読み取り用のエンジンを選択"""
+        if not self.replicas:
+            return self.primary
+
+        if user_key is not None:
+            until = self._sticky_until.get(user_key)
+            if until is not None:
+                if until > self._clock():
+                    return self.primary
+                del self._sticky_until[user_key]
+
+        available = [r for r in self.replicas if r.healthy and r.lag_seconds <= self.max_lag_seconds]
+        if not available:
+            self.primary_fallbacks += 1
+            return self.primary
+        return available[next(self._round_robin) % len(available)].engine
+
+    def writer(self) -> AsyncEngine:
+        """書き込み用のエンジン（プライマリ）"""
+        return self.primary
+
+    def mark_write(self, user_key: str | None) -> None:
+        """ユーザーの書き込みを記録し、一定時間そのユーザーの読み取りをプライマリに固定"""
+        if user_key is None or not self.replicas:
+            return
+        now = self._clock()
+        if len(self._sticky_until) >= _STICKY_PRUNE_THRESHOLD:
+            self._sticky_until = {key: until for key, until in self._sticky_until.items() if until > now}
+        self._sticky_until[user_key] = now + self.sticky_seconds
+
+    # ーーーーーー ヘルスチェック ーーーーーー
+
+    def start(self) -> None:
+        """レプリカの定期ヘルスチェックを開始"""
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run_forever(), name="replica-health-check")
+
+    async def stop(self) -> None:
+        """定期ヘルスチェックを停止"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run_forever(self) -> None:
+        while True:
+            await self.check_replicas()
+            await asyncio.sleep(self.health_check_interval_seconds)
+
+    async def check_replicas(self) -> None:
+        """すべてのレプリカの疎通と遅延を確認"""
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def _check(self, replica: ReplicaState) -> None:
+        try:
+            async with asyncio.timeout(self.health_check_interval_seconds):
+                async with replica.engine.connect() as conn:
+                    row = (await conn.execute(_LAG_QUERY)).one()
+            if row.in_recovery and row.receiver_status != "streaming":
+                raise RuntimeError(f"WAL レシーバーがストリーミング中ではありません（status={row.receiver_status}）")
+            lag = float(row.lag or 0.0)
+        except Exception as e:
+            if replica.healthy:
+                logger.warning("レプリカを除外しました: %s (%s)", replica.name, e)
+            replica.healthy, replica.last_error = False, str(e)
+            return
+
+        if not replica.healthy:
+            logger.info("レプリカが復帰しました: %s", replica.name)
+        replica.healthy, replica.lag_seconds, replica.last_error = True, lag, None
+
+    def stats(self) -> dict[str, Any]:
+        """レプリカの状態を返す"""
+        return {
+            "replicas": [
+                {"name": r.name, "healthy": r.healthy, "lag_seconds": r.lag_seconds, "last_error": r.last_error}
+                for r in self.replicas
+            ],
+            "primary_fallbacks": self.primary_fallbacks,
+            "sticky_users": len(self._sticky_until),
+        }
+
+    async def dispose(self) -> None:
+        """レプリカのエンジンを破棄（プライマリは close_db で破棄）"""
+        for replica in self.replicas:
+            await replica.engine.dispose()
@@ -0,0 +1,112 @@
+"""
+database/session.py - 接続を必要な間だけ保持するリクエスト用セッション
+
+AsyncSession は最初のクエリ実行時に接続を取得しますが、一度取得した接続は
+commit / rollback / close までトランザクションごと保持し続けます。
+そのため読み取り後に bcrypt 計算やレスポンス生成などの DB 以外の await を挟むと、
+その間もプールの接続を占有します。
+
+LazySession は書き込みを伴わない読み取りクエリの直後にトランザクションを終了し、
+接続をすぐにプールへ返却します（次のクエリで改めて取得）。
+接続取得までの待ち時間はエンドポイントごとにヒストグラムへ記録します。
+エンドポイント固有のステートメントタイムアウトはトランザクション開始時に `SET LOCAL` で設定します。
+読み取りごとにトランザクションを終了するため、設定するセッションではクエリごとに1往復増えます
+（asyncpg の高速パスは acquire(set_statement_timeout=False) で省略し、ドライバー側で打ち切ります）。
+"""
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Select, event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.timeouts import set_local_statement_timeout
+from app.metrics import db_pool_wait_seconds
+
+
+class LazySession(AsyncSession):
+    """読み取り専用の処理後すぐに接続を返却するセッション"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # メトリクスのラベル（get_session がリクエストのルートを設定）
+        self.endpoint = "unknown"
+        # 現在のトランザクションで書き込みを行ったか
+        self._wrote = False
+        # 書き込みを commit した後に呼ぶコールバック（read-your-writes 用）
+        self.on_write: Callable[[], None] | None = None
+        # トランザクションごとに設定するステートメントタイムアウト（None は接続の既定値）
+        self.statement_timeout_ms: int | None = None
+        # 次のトランザクション開始時に SET LOCAL を省略するか（acquire が設定）
+        self._skip_statement_timeout = False
+        event.listen(self.sync_session, "after_begin", self._apply_statement_timeout)
+        event.listen(self.sync_session, "after_flush", self._mark_written)
+        event.listen(self.sync_session, "after_transaction_end", self._reset_written)
+
+    def _apply_statement_timeout(self, session: Any, transaction: Any, connection: Any) -> None:
+        if self.statement_timeout_ms is not None and not self._skip_statement_timeout:
+            set_local_statement_timeout(connection, self.statement_timeout_ms)
+
+    def _mark_written(self, *_: Any) -> None:
+        self._wrote = True
+
+    def _reset_written(self, session: Any, transaction: Any) -> None:
+        if transaction.parent is None:
+            self._wrote = False
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        """クエリを実行し、読み取り専用なら接続を返却"""
+        read_only = self._is_read_only(statement)
+        await self.acquire()
+        result = await super().execute(statement, *args, **kwargs)
+        if not read_only:
+            self._wrote = True
+        # AsyncSession.execute の結果はバッファ済みのため、返却後も読み出せる
+        await self.release()
+        return result
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        """クエリを実行して先頭行の先頭列を返す"""
+        return (await self.execute(statement, *args, **kwargs)).scalar()
+
+    async def commit(self) -> None:
+        """コミットし、書き込みがあればコールバックを呼ぶ"""
+        wrote = self._wrote or bool(self.new or self.dirty or self.deleted)
+        await super().commit()
+        if wrote and self.on_write is not None:
+            self.on_write()
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        """主キーで取得（識別マップにあればクエリなし）"""
+        await self.acquire()
+        instance = await super().get(*args, **kwargs)
+        await self.release()
+        return instance
+
+    async def acquire(self, *, set_statement_timeout: bool = True) -> None:
+        """トランザクション外なら接続を取得し、待ち時間を記録
+
+        Args:
+            set_statement_timeout: False なら SET LOCAL を省略（呼び出し側がドライバーで打ち切る場合）
+        """
+        if self.in_transaction():
+            return
+        started = time.perf_counter()
+        self._skip_statement_timeout = not set_statement_timeout
+        try:
+            await self.connection()
+        finally:
+            self._skip_statement_timeout = False
+        db_pool_wait_seconds.observe(time.perf_counter() - started, endpoint=self.endpoint)
+
+    async def release(self) -> None:
+        """未確定の書き込みがなければトランザクションを終了して接続を返却"""
+        if self._wrote or self.new or self.dirty or self.deleted or not self.in_transaction():
+            return
+        await self.commit()
+
+    @staticmethod
+    def _is_read_only(statement: Any) -> bool:
+        """行ロックを取らない SELECT か判定"""
+        return isinstance(statement, Select) and statement._for_update_arg is None
@@ -0,0 +1,259 @@
+"""
+database/slowlog.py - スロークエリログ
+
+閾値（slow_query_threshold_ms）以上かかったクエリを、正規化した SQL・
+マスクしたパラメータ・呼び出し元のエンドポイントとともにリングバッファへ記録し、
+構造化ログ（JSON）を出力します。記録は管理API（GET /admin/slow-queries）で参照できます。
+
+PostgreSQL のクエリは一定の割合（slow_query_explain_sample_rate）で EXPLAIN を
+バックグラウンドで実行し、実行計画を記録に追加します。
+
+- EXPLAIN はリクエストとは別の接続で実行し、終了後にロールバックします
+- ANALYZE はクエリを再実行するため、テーブルから読むだけの SELECT（関数呼び出し・行ロックなし）に限り
+  `EXPLAIN (ANALYZE, BUFFERS)` とし、それ以外は実行しない `EXPLAIN` で推定の計画のみ取得します
+  （アドバイザリロック・pg_notify・nextval などはロールバックしても取り消せません）
+- NO_EXPLAIN_OPTION を付けた接続・クエリは記録のみで EXPLAIN しません
+- 負荷を増やさないよう同時に実行する EXPLAIN は1件までとし、実行中は取得を見送ります
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import UTC, date, datetime
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# この実行オプションを付けた接続のクエリは記録しない
+SKIP_OPTION = "skip_slow_query_log"
+# この実行オプションを付けた接続・クエリは記録するが EXPLAIN しない（セッション単位の状態を扱う処理用）
+NO_EXPLAIN_OPTION = "skip_slow_query_explain"
+
+# 正規化: 文字列リテラル・プレースホルダ・数値を "?" に置き換え、IN リストと空白をまとめる
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\?")
+_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# EXPLAIN できる文（ANALYZE なしなら実行されない）
+_EXPLAINABLE = re.compile(r"^\s*(?:SELECT|WITH|VALUES|INSERT|UPDATE|DELETE|MERGE)\b", re.I)
+
+# EXPLAIN ANALYZE で再実行してよい文の判定用
+_SELECT_FROM = re.compile(r"^\s*SELECT\b.*\bFROM\b", re.I | re.S)
+_ROW_LOCK = re.compile(r"\bFOR\s+(?:UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b", re.I)
+# 識別子の直後の "("（"::" の後は VARCHAR(255) などの型）
+_CALL = re.compile(r'(::\s*)?([A-Za-z_][\w$]*|"[^"]+")\s*\(')
+# 直後に "(" が続いても関数呼び出しではないキーワード
+_PAREN_KEYWORDS = frozenset(
+    (
+        "all and any array as between by cast else except exists from having ilike in intersect is join "
+        "lateral like limit not offset on or over row select some then union using values when where"
+    ).split()
+)
+
+
+def normalize_sql(statement: str) -> str:
+    """値を取り除いて同じ形のクエリが同じ文字列になるように正規化"""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def is_analyzable(statement: str) -> bool:
+    """EXPLAIN ANALYZE で再実行しても副作用のない文か
+
+    テーブルから読むだけの SELECT（FROM あり・関数呼び出しなし・行ロックなし）のみ True。
+    関数は揮発性（pg_try_advisory_lock・pg_notify・nextval など）を SQL から判別できないため、
+    集約関数を含めてすべて対象外にします。
+    """
+    sql = _STRING_LITERAL.sub("''", statement)
+    if not _SELECT_FROM.match(sql) or _ROW_LOCK.search(sql):
+        return False
+    for match in _CALL.finditer(sql):
+        if match.group(1) is None and match.group(2).lower() not in _PAREN_KEYWORDS:
+            return False
+    return True
+
+
+def _redact_value(value: Any) -> Any:
+    if value is None or isinstance(value, bool | int | float):
+        return value
+    if isinstance(value, UUID | datetime | date | Decimal):
+        return str(value)
+    if isinstance(value, str | bytes):
+        # メールアドレス・パスワードハッシュ・検索語などを含みうるため値は残さない
+        return f"<redacted {type(value).__name__}({len(value)})>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> Any:
+    """パラメータの文字列・バイト列をマスク（ID・数値・日時は再現用に残す）"""
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, list | tuple):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+@dataclass
+class SlowQuery:
+    """スロークエリ1件"""
+
+    id: int
+    occurred_at: datetime
+    duration_ms: float
+    endpoint: str | None
+    statement: str
+    parameters: Any
+    plan: Any = None
+    explain_error: str | None = None
+    # EXPLAIN の状態（skipped / pending / captured / failed）
+    explain: str = "skipped"
+    # ANALYZE 付きで取得したか（False は実行しない推定のみの計画）
+    analyzed: bool = False
+
+    def as_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        data["occurred_at"] = self.occurred_at.isoformat()
+        return data
+
+
+class SlowQueryLog:
+    """スロークエリのリングバッファと EXPLAIN の取得"""
+
+    def __init__(
+        self,
+        threshold_ms: float | None = 200.0,
+        max_entries: int = 200,
+        explain_sample_rate: float = 0.1,
+        explain_timeout_ms: int = 10_000,
+    ):
+        self.threshold_ms = threshold_ms
+        # None は無効（比較だけで済むよう秒に変換しておく）
+        self.threshold_seconds = threshold_ms / 1000 if threshold_ms is not None else float("inf")
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self._entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        self._next_id = 1
+        self._explaining: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def entries(self, limit: int | None = None) -> list[SlowQuery]:
+        """新しい順の記録"""
+        entries = list(reversed(self._entries))
+        return entries[:limit] if limit is not None else entries
+
+    def clear(self) -> None:
+        """記録を破棄"""
+        self._entries.clear()
+
+    async def stop(self) -> None:
+        """実行中の EXPLAIN を中止（エンジンの破棄前に呼ぶ）"""
+        if self._explaining is not None and not self._explaining.done():
+            self._explaining.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._explaining
+        self._explaining = None
+
+    def record(
+        self,
+        engine: AsyncEngine | None,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        duration_seconds: float,
+        endpoint: str | None,
+        explain: bool = True,
+    ) -> SlowQuery:
+        """スロークエリを記録し、サンプリングされた場合は EXPLAIN を開始
+
+        Args:
+            explain: False なら EXPLAIN しない（NO_EXPLAIN_OPTION 付きのクエリ）
+        """
+        entry = SlowQuery(
+            id=self._next_id,
+            occurred_at=datetime.now(UTC),
+            duration_ms=round(duration_seconds * 1000, 3),
+            endpoint=endpoint,
+            statement=normalize_sql(statement),
+            parameters=redact_parameters(parameters, executemany),
+        )
+        self._next_id += 1
+        self._entries.append(entry)
+        logger.warning("スロークエリ: %s", json.dumps(entry.as_dict(), ensure_ascii=False, default=str))
+
+        if (
+            explain
+            and engine is not None
+            and not executemany
+            and engine.dialect.name == "postgresql"
+            and _EXPLAINABLE.match(statement)
+            and (self._explaining is None or self._explaining.done())
+            and random.random() < self.explain_sample_rate
+        ):
+            entry.explain = "pending"
+            entry.analyzed = is_analyzable(statement)
+            self._explaining = asyncio.get_running_loop().create_task(
+                self._explain(engine, entry, statement, parameters), name="slow-query-explain"
+            )
+        return entry
+
+    async def _explain(self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        """別の接続で EXPLAIN（再実行してよい文は ANALYZE, BUFFERS 付き）を実行して実行計画を記録"""
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if entry.analyzed else "FORMAT JSON"
+        started = time.perf_counter()
+        try:
+            async with engine.connect() as conn:
+                # EXPLAIN 自身はスロークエリとして記録しない
+                await conn.execution_options(**{SKIP_OPTION: True})
+                await conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN ({options}) {statement}",
+                    tuple(parameters) if isinstance(parameters, list | tuple) else parameters,
+                )
+                plan = result.scalar()
+                await conn.rollback()
+        except Exception as error:
+            entry.explain = "failed"
+            entry.explain_error = f"{type(error).__name__}: {error}"
+            logger.warning("スロークエリの EXPLAIN に失敗しました: id=%d %s", entry.id, entry.explain_error)
+            return
+
+        entry.plan = json.loads(plan) if isinstance(plan, str) else plan
+        entry.explain = "captured"
+        logger.info(
+            "スロークエリの実行計画: %s",
+            json.dumps(
+                {"id": entry.id, "explain_ms": round((time.perf_counter() - started) * 1000, 3), "plan": entry.plan},
+                ensure_ascii=False,
+                default=str,
+            ),
+        )
+
+
+# アプリ全体で共有するスロークエリログ
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.slow_query_threshold_ms,
+    max_entries=settings.slow_query_buffer_size,
+    explain_sample_rate=settings.slow_query_explain_sample_rate,
+    explain_timeout_ms=settings.slow_query_explain_timeout_ms,
+)
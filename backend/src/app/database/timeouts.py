@@ -0,0 +1,92 @@
+"""
+database/timeouts.py - エンドポイントごとのステートメントタイムアウト
+
+すべての接続に接続時の既定値（statement_timeout_ms）を設定し、
+既定値と異なる予算を持つエンドポイントだけトランザクション開始時に
+`SET LOCAL statement_timeout` を発行します。
+SET LOCAL はトランザクション内でのみ有効なため、PgBouncer の transaction モードでも
+他のクライアントに設定が漏れませんが、LazySession は読み取りのたびにトランザクションを
+終了するため、クエリごとに1往復増えます。
+最も呼ばれる商品の読み取り（products/fastpath.py）は SET LOCAL を発行せず、
+既定値より短い予算を asyncpg の呼び出しごとのタイムアウト（driver_timeout_seconds）で適用します。
+
+タイムアウトしたクエリ（SQLSTATE 57014）は 504、プールから接続を取得できない場合は 503 に変換します。
+"""
+
+import logging
+from typing import Any
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy import exc
+
+from app.config import settings
+from app.metrics import db_pool_exhausted_total, db_statement_timeouts_total, endpoint_label
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL の query_canceled（statement_timeout / キャンセル要求）
+QUERY_CANCELED_SQLSTATE = "57014"
+
+# エンドポイント（"METHOD /path"）ごとのタイムアウト（ミリ秒。0 は無制限）
+# 設定値 statement_timeouts_ms で上書きできます
+STATEMENT_TIMEOUTS_MS: dict[str, int] = {
+    # 検索（ILIKE）は条件次第で長時間化するため短めに打ち切る
+    "GET /products/": 5_000,
+    "GET /products/{product_id}": 1_000,
+}
+
+# プール枯渇時にクライアントへ再試行を促す秒数
+POOL_EXHAUSTED_RETRY_AFTER_SECONDS = 1
+
+
+def statement_timeout_ms(endpoint: str) -> int | None:
+    """エンドポイントのタイムアウト（接続の既定値と同じなら None）"""
+    timeout = settings.statement_timeouts_ms.get(endpoint, STATEMENT_TIMEOUTS_MS.get(endpoint))
+    if timeout is None or timeout == settings.statement_timeout_ms:
+        return None
+    return timeout
+
+
+def driver_timeout_seconds(timeout_ms: int | None) -> float | None:
+    """ドライバーの呼び出しごとのタイムアウト（秒）で代替できる予算なら秒数、できなければ None
+
+    クライアント側のタイムアウトは接続の既定値を短くすることしかできないため、
+    既定値より短い（0 以外の）予算のみ対象にします。
+    """
+    if not timeout_ms:
+        return None
+    if settings.statement_timeout_ms and timeout_ms >= settings.statement_timeout_ms:
+        return None
+    return timeout_ms / 1000
+
+
+def set_local_statement_timeout(connection: Any, timeout_ms: int) -> None:
+    """現在のトランザクションのステートメントタイムアウトを設定（PostgreSQL のみ）"""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+
+
+def is_statement_timeout(error: BaseException) -> bool:
+    """ステートメントタイムアウトによるエラーか判定（SQLAlchemy / asyncpg の例外）"""
+    return getattr(getattr(error, "orig", error), "sqlstate", None) == QUERY_CANCELED_SQLSTATE
+
+
+async def database_error_handler(request: Request, error: Exception) -> JSONResponse:
+    """タイムアウト系のデータベースエラーを 503 / 504 に変換（それ以外は再送出）"""
+    if isinstance(error, exc.TimeoutError):
+        db_pool_exhausted_total.inc(endpoint=endpoint_label(request.scope))
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "データベースが混雑しています。しばらくしてから再試行してください"},
+            headers={"Retry-After": str(POOL_EXHAUSTED_RETRY_AFTER_SECONDS)},
+        )
+    if is_statement_timeout(error):
+        endpoint = endpoint_label(request.scope)
+        db_statement_timeouts_total.inc(endpoint=endpoint)
+        logger.warning("ステートメントタイムアウト: %s", endpoint)
+        return JSONResponse(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            content={"detail": "データベースの処理がタイムアウトしました"},
+        )
+    raise error
@@ -0,0 +1,59 @@
+"""
+database/utils.py - データベース操作ユーティリティ
+"""
+
+from typing import Any
+
+from sqlalchemy import Table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(db: AsyncSession, model: Any) -> Any:
+    """ON CONFLICT 句を使える方言別の INSERT 文を作成
+
+    本番は PostgreSQL、ユニットテストは SQLite で動作するため、
+    セッションの接続先に応じて構築関数を切り替えます。
+    """
+    bind = db.get_bind()
+    if bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def _unique_constraint_columns(table: Table) -> dict[str, str]:
+    """一意制約・一意インデックスの名前 -> 列名（単一列のもの。主キーは除く）"""
+    names: dict[str, str] = {}
+    for index in table.indexes:
+        columns = list(index.columns)
+        if len(columns) == 1 and not columns[0].primary_key and index.name:
+            names[index.name] = columns[0].name
+    for constraint in table.constraints:
+        columns = list(getattr(constraint, "columns", ()))
+        if len(columns) == 1 and not columns[0].primary_key and isinstance(constraint.name, str):
+            names[constraint.name] = columns[0].name
+    for column in table.columns:
+        # unique=True の無名制約は PostgreSQL が <テーブル>_<列>_key と命名する
+        if column.unique and not column.primary_key:
+            names.setdefault(f"{table.name}_{column.name}_key", column.name)
+    return names
+
+
+def unique_violation_column(exc: IntegrityError, table: Table) -> str | None:
+    """一意制約違反の原因となった列名を特定
+
+    PostgreSQL（asyncpg）は制約名（例: users_email_key / idx_users_email）の完全一致で、
+    SQLite はメッセージ中の "users.email" を手掛かりにします。
+    主キーの重複は列を特定せず None を返します。
+    """
+    orig = exc.orig
+    constraint = getattr(orig, "constraint_name", None) or getattr(orig.__cause__, "constraint_name", None)
+    if constraint:
+        return _unique_constraint_columns(table).get(constraint)
+
+    message = str(orig)
+    for column in table.columns:
+        if column.unique and not column.primary_key and f"{table.name}.{column.name}" in message:
+            return column.name
+    return None
@@ -0,0 +1,248 @@
+"""
+database/warmup.py - 起動時のコネクションプール・ステートメントのウォームアップ
+
+デプロイ直後のリクエストが接続確立とクエリのコンパイルを負担しないよう、
+起動時に以下を行います。
+
+- プライマリとすべてのリードレプリカで、プールサイズ分の接続を同時に確立してプールに戻す
+- 各接続でホットなクエリ（商品一覧の各バリエーション・カーソル付きの続きのページ・
+  商品ID検索・ユーザーID検索）を実行し、SQLAlchemy のコンパイル済みキャッシュと
+  asyncpg のプリペアドステートメントキャッシュを埋める（商品は ProductsFastPath と同じ SQL）
+
+プライマリが完了するまで readiness プローブは not ready を返します。
+失敗したレプリカは ready 後もバックグラウンドで再試行します（その間の読み取りは準備なしで処理）。
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+from uuid import uuid4
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.auth.service import AuthService
+from app.database.db import engine_router
+from app.products.fastpath import ProductsFastPath, build_list_sql
+from app.products.schemas import ProductListParams
+
+logger = logging.getLogger(__name__)
+
+# 商品一覧で事前に準備するソート・フィルタの組み合わせ
+_SORT_FIELDS = ("created_at", "name", "price", "updated_at")
+_SORT_ORDERS = ("desc", "asc")
+# 検索語 "_" は "%_%"（1文字以上）となり先頭の行で LIMIT に達するため、全件走査になりません
+_FILTERS: tuple[dict[str, str], ...] = (
+    {},
+    {"category": "warmup"},
+    {"status": "warmup"},
+    {"category": "warmup", "status": "warmup"},
+    {"search": "_"},
+)
+# カーソル（Seek Method）の準備に使うソート列ごとの値（型が合えば値は任意）
+_CURSOR_VALUES: dict[str, Any] = {
+    "created_at": datetime(2000, 1, 1, tzinfo=UTC),
+    "name": "",
+    "price": 0.0,
+    "updated_at": datetime(2000, 1, 1, tzinfo=UTC),
+}
+
+# 失敗時の再試行間隔（秒）
+_RETRY_SECONDS = 5.0
+
+
+@dataclass
+class WarmupState:
+    """ウォームアップの進捗"""
+
+    ready: bool = False
+    connections: int = 0
+    statements: int = 0
+    attempts: int = 0
+    last_error: str | None = None
+    finished_at: datetime | None = None
+    elapsed_seconds: float = 0.0
+    # まだ完了していないエンジン（パスワードを含まない接続先）
+    pending_engines: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, Any]:
+        """状態を辞書で返す"""
+        return {
+            "ready": self.ready,
+            "connections": self.connections,
+            "statements": self.statements,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "elapsed_seconds": self.elapsed_seconds,
+            "pending_engines": self.pending_engines,
+        }
+
+
+def _pool_size(engine: AsyncEngine) -> int:
+    """エンジンのプールサイズ（サイズ指定のないプールは1）"""
+    size = getattr(engine.pool, "size", None)
+    return size() if callable(size) else 1
+
+
+def _engine_name(engine: AsyncEngine) -> str:
+    return engine.url.render_as_string(hide_password=True)
+
+
+class DatabaseWarmup:
+    """起動時ウォームアップ"""
+
+    def __init__(self, engines: Sequence[AsyncEngine], connections: int | None = None):
+        """初期化
+
+        Args:
+            engines: 対象のエンジン（先頭はプライマリ。完了すると ready）
+            connections: エンジンごとの接続数（None ならプールサイズ）
+        """
+        self.engines = list(engines)
+        self.connections = connections
+        self.state = WarmupState(pending_engines=[_engine_name(engine) for engine in self.engines])
+        self._pending = list(self.engines)
+        self._task: asyncio.Task | None = None
+
+    # ーーーーーー ライフサイクル ーーーーーー
+
+    def start(self) -> None:
+        """バックグラウンドでウォームアップを開始（すべてのエンジンが成功するまで再試行）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_until_ready(), name="database-warmup")
+
+    async def stop(self) -> None:
+        """実行中のウォームアップを中断"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run_until_ready(self) -> None:
+        while self._pending:
+            try:
+                await self.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.state.last_error = str(e)
+                logger.exception("データベースのウォームアップに失敗しました")
+                await asyncio.sleep(_RETRY_SECONDS)
+
+    # ーーーーーー ウォームアップ処理 ーーーーーー
+
+    async def run(self) -> WarmupState:
+        """未完了のエンジンを同時にウォームアップ
+
+        Raises:
+            RuntimeError: いずれかのエンジンが失敗した場合（成功したエンジンは完了扱い）
+        """
+        started = time.perf_counter()
+        self.state.attempts += 1
+
+        engines = list(self._pending)
+        results = await asyncio.gather(*(self._warm(engine) for engine in engines), return_exceptions=True)
+
+        errors = []
+        for engine, result in zip(engines, results, strict=True):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                errors.append(f"{_engine_name(engine)}: {result}")
+                continue
+            connections, statements = result
+            self.state.connections += connections
+            self.state.statements += statements
+            self._pending.remove(engine)
+        self.state.pending_engines = [_engine_name(engine) for engine in self._pending]
+        self.state.last_error = "; ".join(errors) or None
+
+        if not self.state.ready and self.engines[0] not in self._pending:
+            self.state.elapsed_seconds = time.perf_counter() - started
+            self.state.finished_at = datetime.now(UTC)
+            self.state.ready = True
+            logger.info(
+                "データベースのウォームアップが完了しました: 接続 %d / ステートメント %d（%.2f秒）",
+                self.state.connections,
+                self.state.statements,
+                self.state.elapsed_seconds,
+            )
+        if errors:
+            raise RuntimeError(self.state.last_error)
+        return self.state
+
+    async def _warm(self, engine: AsyncEngine) -> tuple[int, int]:
+        """プールサイズ分の接続を同時に確立し、各接続でホットなクエリを準備
+
+        Returns:
+            (接続数, ステートメント数)
+        """
+        async with contextlib.AsyncExitStack() as stack:
+            # 同時に保持しないとプールが同じ接続を使い回すため、すべて確立してから返却する
+            conns = await asyncio.gather(
+                *(stack.enter_async_context(engine.connect()) for _ in range(self.connections or _pool_size(engine)))
+            )
+            counts = await asyncio.gather(*(self._prepare(conn) for conn in conns))
+        return len(conns), sum(counts)
+
+    @staticmethod
+    async def _prepare(conn: AsyncConnection) -> int:
+        """接続上でホットなクエリを実行（結果は破棄）
+
+        実際のサービスと同じ経路でクエリを組み立てるため、SQL 文字列が一致し
+        本番リクエストでキャッシュがそのまま使われます。
+        """
+        await conn.execute(text("SELECT 1"))
+        count = 1
+
+        async with AsyncSession(bind=conn) as session:
+            products = ProductsFastPath(session)
+            for sort_by, sort_order, filters in itertools.product(_SORT_FIELDS, _SORT_ORDERS, _FILTERS):
+                await products.list_products(
+                    ProductListParams(sort_by=sort_by, sort_order=sort_order, limit=1, **filters)
+                )
+                count += 1
+
+            # カーソルの商品のソート列の値を引くクエリ（見つからないため先頭ページの SQL も再実行）
+            for sort_by in _SORT_FIELDS:
+                await products.list_products(ProductListParams(sort_by=sort_by, cursor=str(uuid4()), limit=1))
+                count += 2
+
+            await products.get_product_by_id(uuid4())
+            await AuthService(session).get_user_by_id(uuid4())
+            count += 2
+
+        if conn.dialect.driver == "asyncpg":
+            count += await DatabaseWarmup._prepare_cursor_pages(conn)
+
+        await conn.rollback()
+        return count
+
+    @staticmethod
+    async def _prepare_cursor_pages(conn: AsyncConnection) -> int:
+        """カーソル付きの続きのページ（(ソート列, id) の行値比較）を asyncpg 接続で準備
+
+        カーソルの商品が存在しないと ProductsFastPath は先頭ページの SQL を使うため、
+        build_list_sql にソート列の値を直接渡して同じ SQL を実行します。
+        """
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        count = 0
+        for sort_by, sort_order, filters in itertools.product(_SORT_FIELDS, _SORT_ORDERS, _FILTERS):
+            params = ProductListParams(sort_by=sort_by, sort_order=sort_order, limit=1, **filters)
+            sql, args = build_list_sql(params, (_CURSOR_VALUES[sort_by], uuid4()))
+            await driver.fetch(sql, *args)
+            count += 1
+        return count
+
+
+database_warmup = DatabaseWarmup(engine_router.engines)
@@ -1,19 +1,124 @@
 """FastAPI application entry point."""
 
-from fastapi import FastAPI
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import asyncpg
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import exc
 
+from app.admin.jobs import user_import_jobs
+from app.admin.router import router as admin_router
+from app.auth.activity import device_activity
+from app.auth.revocation import revocation_list
 from app.auth.router import router as auth_router
+from app.auth.security import calibrate_bcrypt_rounds, configure_bcrypt_rounds
+from app.auth.sweeper import token_sweeper
+from app.bootstrap.router import router as bootstrap_router
+from app.config import settings
+from app.database.db import async_session_maker, close_db, engine, engine_router, pool_controller, session_engine
+from app.database.slowlog import slow_query_log
+from app.database.timeouts import database_error_handler
+from app.database.warmup import database_warmup
+from app.metrics import CONTENT_TYPE, multiprocess_exporter, render
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.cancellation import RequestCancellationMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
 from app.products.router import router as products_router
+from app.ratelimit.middleware import RateLimitMiddleware
+from app.ratelimit.quota import product_quota
+from app.ratelimit.storage import MemoryBucketStorage, PostgresBucketStorage
 from app.settings.router import router as settings_router
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Application startup and shutdown."""
+    # Pick the bcrypt cost that meets the hashing latency target on this hardware
+    configure_bcrypt_rounds(settings.bcrypt_rounds or await asyncio.to_thread(calibrate_bcrypt_rounds))
+
+    # One bounded hashing pool for bulk user imports, reused by every import job (inherits the bcrypt cost above)
+    user_import_jobs.start()
+
+    # Open pool_size connections and prepare hot statements; /health/ready waits for this
+    database_warmup.start()
+
+    # Health-check read replicas (lag / reachability) for read routing
+    await engine_router.check_replicas()
+    engine_router.start()
+
+    # Grow / shrink the pool's overflow capacity based on observed checkout wait
+    if settings.db_pool_adaptive:
+        pool_controller.start()
+
+    # Load revoked access tokens and subscribe to revocation notifications
+    async with async_session_maker() as session:
+        await revocation_list.load(session)
+    await revocation_list.start_listener(session_engine)
+
+    # Periodically delete expired / revoked tokens (one leader across workers)
+    if settings.token_sweeper_enabled:
+        token_sweeper.start()
+
+    # Batch last_used_at updates for devices instead of writing on every request
+    device_activity.start()
+
+    # Sync per-user / per-IP product row quotas with the shared table (postgres storage only)
+    product_quota.start()
+
+    # Share this worker's metrics with the other workers (metrics_multiprocess_dir only)
+    multiprocess_exporter.start()
+
+    yield
+
+    await database_warmup.stop()
+    await engine_router.stop()
+    await pool_controller.stop()
+    await device_activity.stop()
+    await product_quota.stop()
+    await token_sweeper.stop()
+    await revocation_list.stop_listener()
+    await user_import_jobs.stop()
+    await slow_query_log.stop()
+    await close_db()
+    await multiprocess_exporter.stop()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="UltraFastAPI",
     description="Ultra-fast API with FastAPI, PostgreSQL, and Flutter",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Map statement timeouts to 504 and pool exhaustion to 503 instead of a generic 500
+app.add_exception_handler(exc.TimeoutError, database_error_handler)
+app.add_exception_handler(exc.DBAPIError, database_error_handler)
+app.add_exception_handler(asyncpg.QueryCanceledError, database_error_handler)
+
+# Per-route-class concurrency limits; shed load with 503 + Retry-After instead of queueing forever
+if settings.admission_control_enabled:
+    app.add_middleware(AdmissionControlMiddleware)
+
+# Cancel the handler (and its in-flight query) when the client disconnects (also frees queued requests)
+if settings.request_cancellation_enabled:
+    app.add_middleware(RequestCancellationMiddleware)
+
+# Rate limiting for bcrypt-heavy auth endpoints (added before CORS so CORS headers wrap 429 responses)
+if settings.rate_limit_enabled:
+    app.add_middleware(
+        RateLimitMiddleware,
+        storage=(
+            PostgresBucketStorage(engine, settings.rate_limit_compaction_interval_seconds)
+            if settings.rate_limit_storage == "postgres"
+            else MemoryBucketStorage(settings.rate_limit_compaction_interval_seconds)
+        ),
+    )
+
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -23,18 +128,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Server-Timing header with the db / auth / serialize / bcrypt breakdown (trusted callers only)
+if settings.server_timing_enabled:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Per-route latency / in-flight / per-request query metrics (outermost, so shed and rate-limited requests count too)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(products_router)
 app.include_router(settings_router)
+app.include_router(admin_router)
+app.include_router(bootstrap_router)
 
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check() -> dict[str, str]:
-    """Health check endpoint."""
+    """Liveness probe: the process is up and serving requests."""
     return {"status": "ok"}
 
 
+@app.get("/health/ready")
+async def readiness_check(response: Response) -> dict:
+    """Readiness probe: not ready (503) until database warm-up has finished."""
+    if not database_warmup.state.ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "warming_up", "warmup": database_warmup.state.as_dict()}
+    return {"status": "ready", "warmup": database_warmup.state.as_dict()}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint (aggregated across workers when metrics_multiprocess_dir is set)."""
+    if not settings.metrics_enabled:
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return Response(render(multiprocess_exporter.collect()), media_type=CONTENT_TYPE)
+
+
 @app.get("/")
 async def root() -> dict[str, str]:
     """Root endpoint."""
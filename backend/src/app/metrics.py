@@ -0,0 +1,507 @@
+"""
+metrics.py - アプリケーションメトリクス
+
+外部依存なしの軽量なメトリクス実装です。
+値はプロセス内に保持し、`snapshot()` で取得します。
+記録はロックなしの辞書・リスト操作のみで、バケットは作成時に確定します。
+
+`render()` は Prometheus のテキスト形式（0.0.4）に変換します。
+複数ワーカーで動かす場合は MultiProcessExporter が各プロセスの値を共有ディレクトリへ
+定期的に書き出し、スクレイプを受けたワーカーがそれらを合算して返します。
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 秒単位のレイテンシ向けデフォルトバケット
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """バケット累積型ヒストグラム（ラベル付き）"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # ラベル値 -> [バケットごとの件数（+Inf を含む）, 合計, 件数]
+        self._series: dict[tuple[str, ...], list[Any]] = {}
+        registry[name] = self
+
+    def observe(self, value: float, **labels: str) -> None:
+        """値を記録"""
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """ラベルごとの累積バケット・合計・件数を取得"""
+        result = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative, running = {}, 0
+            for bound, bucket_count in zip((*self.buckets, float("inf")), counts, strict=True):
+                running += bucket_count
+                cumulative[bound] = running
+            result.append(
+                {
+                    "labels": dict(zip(self.labelnames, key, strict=True)),
+                    "buckets": cumulative,
+                    "sum": total,
+                    "count": count,
+                }
+            )
+        return result
+
+    def clear(self) -> None:
+        """記録済みの値を破棄"""
+        self._series.clear()
+
+
+class Counter:
+    """単調増加カウンタ（ラベル付き）
+
+    `inc()` で加算するほか、他のオブジェクトが数えている累計値を
+    `set_function()` で取得時に読み出すこともできます。
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float | Callable[[], float]] = {}
+        registry[name] = self
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """値を加算"""
+        key = tuple(str(labels.get(label, "")) for label in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        """取得時に累計値を読み出す関数を登録"""
+        self._values[tuple(str(labels.get(label, "")) for label in self.labelnames)] = function
+
+    def value(self, **labels: str) -> float:
+        """ラベルの現在値を取得"""
+        value = self._values.get(tuple(str(labels.get(label, "")) for label in self.labelnames), 0.0)
+        return float(value() if callable(value) else value)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """ラベルごとの値を取得"""
+        return [
+            {
+                "labels": dict(zip(self.labelnames, key, strict=True)),
+                "value": float(value() if callable(value) else value),
+            }
+            for key, value in self._values.items()
+        ]
+
+    def clear(self) -> None:
+        """記録済みの値を破棄"""
+        self._values.clear()
+
+
+class Gauge:
+    """現在値ゲージ（ラベル付き）
+
+    `set()` で値を設定するほか、`set_function()` で取得時に評価する関数を登録できます。
+    """
+
+    type = "gauge"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float | Callable[[], float]] = {}
+        registry[name] = self
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels.get(label, "")) for label in self.labelnames)
+
+    def set(self, value: float, **labels: str) -> None:
+        """値を設定"""
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """値を加算"""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount  # type: ignore[operator]
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """値を減算"""
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        """取得時に値を計算する関数を登録"""
+        self._values[self._key(labels)] = function
+
+    def remove(self, **labels: str) -> None:
+        """ラベルの値を削除"""
+        self._values.pop(self._key(labels), None)
+
+    def value(self, **labels: str) -> float:
+        """ラベルの現在値を取得"""
+        value = self._values.get(self._key(labels), 0.0)
+        return float(value() if callable(value) else value)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """ラベルごとの値を取得"""
+        return [
+            {
+                "labels": dict(zip(self.labelnames, key, strict=True)),
+                "value": float(value() if callable(value) else value),
+            }
+            for key, value in self._values.items()
+        ]
+
+    def clear(self) -> None:
+        """記録済みの値を破棄"""
+        self._values.clear()
+
+
+def endpoint_label(scope: dict[str, Any]) -> str:
+    """ASGI スコープからエンドポイントのラベル（"METHOD /route/template"）を作成
+
+    ルーティング前はテンプレートが分からないため実際のパスを使います。
+    """
+    route = scope.get("route")
+    return f"{scope.get('method', '')} {getattr(route, 'path', scope.get('path', ''))}"
+
+
+def route_label(scope: dict[str, Any]) -> str:
+    """ASGI スコープからルートテンプレートのラベルを作成
+
+    どのルートにも一致しなかったリクエスト（404 など）は、ラベルの種類が
+    無制限に増えないよう実際のパスではなく "unmatched" にまとめます。
+    """
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+# ーーーーーー 収集・出力 ーーーーーー
+
+
+def collect() -> list[dict[str, Any]]:
+    """登録済みメトリクスの現在値を取得（JSON に変換できる形式）
+
+    ヒストグラムのバケットは (上限, 累積件数) のリストにします。
+    """
+    families = []
+    for metric in registry.values():
+        samples = metric.snapshot()
+        if metric.type == "histogram":
+            samples = [{**sample, "buckets": list(sample["buckets"].items())} for sample in samples]
+        families.append({"name": metric.name, "type": metric.type, "help": metric.description, "samples": samples})
+    return families
+
+
+def merge(collections: Sequence[list[dict[str, Any]]]) -> list[dict[str, Any]]:
+    """複数プロセスの collect() の結果をラベルごとに合算"""
+    merged: dict[str, dict[str, Any]] = {}
+    for families in collections:
+        for family in families:
+            target = merged.setdefault(family["name"], {**family, "samples": {}})
+            series = target["samples"]
+            for sample in family["samples"]:
+                key = tuple(sorted(sample["labels"].items()))
+                current = series.get(key)
+                if current is None:
+                    series[key] = (
+                        {**sample, "buckets": list(sample["buckets"])} if "buckets" in sample else dict(sample)
+                    )
+                elif "buckets" in sample:
+                    counts = dict(current["buckets"])
+                    for bound, count in sample["buckets"]:
+                        counts[bound] = counts.get(bound, 0) + count
+                    current["buckets"] = sorted(counts.items())
+                    current["sum"] += sample["sum"]
+                    current["count"] += sample["count"]
+                else:
+                    current["value"] += sample["value"]
+    return [{**family, "samples": list(family["samples"].values())} for family in merged.values()]
+
+
+# Prometheus テキスト形式の Content-Type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(value)
+
+
+def _escape(text: str, quote: bool = False) -> str:
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
+
+
+def _format_labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value), quote=True)}"' for name, value in labels.items()) + "}"
+
+
+def render(families: list[dict[str, Any]] | None = None) -> str:
+    """Prometheus のテキスト形式に変換（省略時はこのプロセスの現在値）"""
+    lines: list[str] = []
+    for family in collect() if families is None else families:
+        name = family["name"]
+        lines.append(f"# HELP {name} {_escape(family['help'])}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for sample in family["samples"]:
+            labels = sample["labels"]
+            if family["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(sample['value'])}")
+                continue
+            for bound, count in sample["buckets"]:
+                lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {sample['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 別ユーザーのプロセスとして存在する
+        pass
+    return True
+
+
+class MultiProcessExporter:
+    """複数ワーカーのメトリクスを共有ディレクトリ経由で集約
+
+    各ワーカーは一定間隔で自プロセスの値を `<pid>.json` に書き出します。
+    `collect()` は自プロセスの最新値と他ワーカーのファイルを合算します。
+    終了したワーカーのカウンタ・ヒストグラムは累計値を保つため残し、
+    ゲージ（現在値）は除外します。ディレクトリ未設定時は自プロセスの値のみを返します。
+    """
+
+    def __init__(self, directory: str | None, interval_seconds: float = 5.0):
+        self.directory = Path(directory) if directory else None
+        self.interval_seconds = interval_seconds
+        self._task: asyncio.Task | None = None
+
+    def _path(self, pid: int) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{pid}.json"
+
+    def write(self) -> None:
+        """自プロセスの現在値をファイルへ書き出す（置き換えはアトミック）"""
+        if self.directory is None:
+            return
+        pid = os.getpid()
+        path = self._path(pid)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps({"pid": pid, "families": collect()}))
+        os.replace(temporary, path)
+
+    def collect(self) -> list[dict[str, Any]]:
+        """全ワーカーの値を合算"""
+        collections = [collect()]
+        if self.directory is None:
+            return collections[0]
+        own = self._path(os.getpid())
+        for path in self.directory.glob("*.json"):
+            if path == own:
+                continue
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                logger.warning("メトリクスファイルを読み込めませんでした: %s", path)
+                continue
+            families = data["families"]
+            if not _is_alive(data["pid"]):
+                families = [family for family in families if family["type"] != "gauge"]
+            collections.append(families)
+        return merge(collections)
+
+    def start(self) -> None:
+        """定期書き出しを開始（ディレクトリ未設定時は何もしない）"""
+        if self.directory is not None and self._task is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._task = asyncio.create_task(self._run_forever(), name="metrics-exporter")
+
+    async def stop(self) -> None:
+        """定期書き出しを停止し、最終値を書き出す"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self.write()
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                self.write()
+            except OSError:
+                logger.exception("メトリクスの書き出しに失敗しました")
+            await asyncio.sleep(self.interval_seconds)
+
+
+# メトリクス名 -> メトリクス
+registry: dict[str, Histogram | Counter | Gauge] = {}
+
+# パスワードハッシュ処理時間（operation: hash / verify）
+password_hash_seconds = Histogram(
+    "password_hash_seconds",
+    "bcrypt によるパスワードハッシュ・検証の処理時間（秒）",
+    labelnames=("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75, 1.0, 2.0),
+)
+
+# 接続プールからの接続取得待ち時間（endpoint: "METHOD /path"）
+db_pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds",
+    "リクエストがプールから接続を取得するまでの待ち時間（秒）",
+    labelnames=("endpoint",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# プールからの接続チェックアウト所要時間（pool: primary / replica-N。新規接続の確立時間を含む）
+db_pool_checkout_seconds = Histogram(
+    "db_pool_checkout_seconds",
+    "コネクションプールからの接続チェックアウト所要時間（秒）",
+    labelnames=("pool",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# プールのチェックアウトタイムアウト回数
+db_pool_timeouts_total = Counter(
+    "db_pool_timeouts_total",
+    "pool_timeout までに接続を取得できなかった回数",
+    labelnames=("pool",),
+)
+
+# 接続の確立・切断回数（オーバーフロー接続の増減が多いとプールサイズ不足）
+db_pool_connections_opened_total = Counter(
+    "db_pool_connections_opened_total",
+    "プールが確立したデータベース接続数",
+    labelnames=("pool",),
+)
+db_pool_connections_closed_total = Counter(
+    "db_pool_connections_closed_total",
+    "プールが切断したデータベース接続数",
+    labelnames=("pool",),
+)
+
+# プールの状態（state: in_use / idle / overflow / capacity）
+db_pool_connections = Gauge(
+    "db_pool_connections",
+    "コネクションプールの接続数（in_use: 使用中 / idle: 待機中 / overflow: 超過 / capacity: 上限）",
+    labelnames=("pool", "state"),
+)
+
+# ステートメントタイムアウト（504）の回数
+db_statement_timeouts_total = Counter(
+    "db_statement_timeouts_total",
+    "statement_timeout によって打ち切られたクエリの数",
+    labelnames=("endpoint",),
+)
+
+# プール枯渇（接続を取得できず 503）の回数
+db_pool_exhausted_total = Counter(
+    "db_pool_exhausted_total",
+    "プールから接続を取得できず 503 を返したリクエスト数",
+    labelnames=("endpoint",),
+)
+
+# クライアント切断によるリクエスト処理のキャンセル回数
+http_requests_cancelled_total = Counter(
+    "http_requests_cancelled_total",
+    "クライアントの切断によって処理を中断したリクエスト数",
+    labelnames=("endpoint",),
+)
+
+# アドミッション制御（route_class: read / search / auth / write）
+admission_requests = Gauge(
+    "admission_requests",
+    "ルートクラスごとの実行中（in_flight）・待機中（queued）のリクエスト数",
+    labelnames=("route_class", "state"),
+)
+admission_queue_seconds = Histogram(
+    "admission_queue_seconds",
+    "アドミッション制御の待ち行列での待ち時間（秒）",
+    labelnames=("route_class",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+admission_rejected_total = Counter(
+    "admission_rejected_total",
+    "アドミッション制御で 503 を返したリクエスト数（reason: queue_full / timeout）",
+    labelnames=("route_class", "reason"),
+)
+
+# HTTP リクエスト（route: ルートテンプレート。status: ステータスコード。499 は応答前のクライアント切断）
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "HTTP リクエストの処理時間（秒）",
+    labelnames=("method", "route", "status"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "処理中の HTTP リクエスト数",
+    labelnames=("method",),
+)
+
+# リクエストあたりのクエリ数・クエリ実行時間（N+1 やクエリ時間の偏りの検出用）
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "1リクエストで実行したデータベースクエリ数",
+    labelnames=("method", "route"),
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "1リクエストでのデータベースクエリ実行時間の合計（秒）",
+    labelnames=("method", "route"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+# プロセス内キャッシュの参照結果（cache: settings。result: hit / miss）
+cache_requests_total = Counter(
+    "cache_requests_total",
+    "プロセス内キャッシュの参照回数（result: hit / miss）",
+    labelnames=("cache", "result"),
+)
+
+# 複数ワーカーの集約（metrics_multiprocess_dir 設定時のみ書き出し）
+multiprocess_exporter = MultiProcessExporter(
+    settings.metrics_multiprocess_dir,
+    interval_seconds=settings.metrics_write_interval_seconds,
+)
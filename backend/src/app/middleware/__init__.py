@@ -0,0 +1,3 @@
+"""
+middleware package - リクエスト処理全体にかかわる ASGI ミドルウェア
+"""
@@ -0,0 +1,242 @@
+"""
+middleware/admission.py - アドミッション制御（過負荷時の早期 503）
+
+過負荷時にリクエストを無制限に待たせると、すべてのエンドポイントのレイテンシが
+一緒に悪化します。ルートを負荷特性ごとのクラスに分け、クラスごとに
+同時実行数と待ち行列の長さを制限します。
+
+- read: 主キー取得などの軽い読み取り
+- search: 商品検索（ILIKE）
+- auth: bcrypt を伴う認証処理
+- write: 書き込み
+
+待ち行列のタイムアウトは CoDel 方式で調整します。一定間隔（interval）の間に
+待ち時間の最小値が目標（target）を超え続けた場合は過負荷とみなし、
+タイムアウトを target まで短くして、待ち行列を LIFO で処理します
+（先に来たリクエストはクライアント側で諦めている可能性が高いため）。
+過負荷でなければタイムアウトは待ち時間上限（既定は interval）、処理順は FIFO です。
+
+target・interval・待ち時間上限はクラスの処理時間に合わせてクラスごとに設定できます。
+auth は1件が bcrypt 1回分（bcrypt_target_ms）かかるため、既定で target を bcrypt 1回分、
+interval と待ち時間上限をその4倍にしています（数ミリ秒の target では少し並んだだけで過負荷と判定されます）。
+
+待ち行列が満杯、または待ち時間がタイムアウトを超えた場合は
+503 と Retry-After を返します。
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from collections.abc import Callable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import admission_queue_seconds, admission_rejected_total, admission_requests
+
+# bcrypt によるハッシュ計算・検証を伴うエンドポイント
+_AUTH_PATHS = frozenset({"/auth/login", "/auth/register", "/auth/change-password", "/auth/confirm-password-reset"})
+
+# 制御の対象外（ヘルスチェック・メトリクスは過負荷時も応答させる）
+_EXEMPT_PREFIXES = ("/health", "/metrics", "/docs", "/redoc", "/openapi.json")
+
+# 拒否時にクライアントへ再試行を促す秒数
+RETRY_AFTER_SECONDS = 1
+
+
+def classify_route(scope: Scope) -> str | None:
+    """リクエストのルートクラスを判定（None は制御対象外）"""
+    method, path = scope["method"], scope["path"].rstrip("/") or "/"
+    if method == "OPTIONS" or path == "/" or path.startswith(_EXEMPT_PREFIXES):
+        return None
+    if method == "POST" and path in _AUTH_PATHS:
+        return "auth"
+    if method in ("GET", "HEAD"):
+        if path == "/products" and b"search=" in scope.get("query_string", b""):
+            return "search"
+        return "read"
+    return "write"
+
+
+class AdmissionQueue:
+    """同時実行数の制限と CoDel 方式のタイムアウトを持つ待ち行列"""
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int,
+        target_delay_seconds: float = 0.005,
+        interval_seconds: float = 0.1,
+        max_wait_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.target_delay_seconds = target_delay_seconds
+        self.interval_seconds = interval_seconds
+        # 過負荷でないときの待ち時間上限（None は interval）
+        self.max_wait_seconds = max_wait_seconds if max_wait_seconds is not None else interval_seconds
+        self._clock = clock
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        # CoDel: 現在の区間で観測した待ち時間の最小値と、過負荷状態
+        self._interval_started = clock()
+        self._min_delay: float | None = None
+        self.overloaded = False
+        admission_requests.set_function(lambda: self.in_flight, route_class=name, state="in_flight")
+        admission_requests.set_function(lambda: len(self._waiters), route_class=name, state="queued")
+
+    @property
+    def queue_timeout(self) -> float:
+        """待ち行列での最大待ち時間"""
+        return self.target_delay_seconds if self.overloaded else self.max_wait_seconds
+
+    @property
+    def queued(self) -> int:
+        """待ち行列の長さ"""
+        return len(self._waiters)
+
+    def _observe(self, delay: float) -> None:
+        """待ち時間を記録し、区間の終わりに過負荷かどうかを判定"""
+        admission_queue_seconds.observe(delay, route_class=self.name)
+        now = self._clock()
+        if now - self._interval_started >= self.interval_seconds:
+            self.overloaded = self._min_delay is not None and self._min_delay > self.target_delay_seconds
+            self._interval_started = now
+            self._min_delay = delay
+        elif self._min_delay is None or delay < self._min_delay:
+            self._min_delay = delay
+
+    async def acquire(self) -> str | None:
+        """実行枠を取得
+
+        Returns:
+            取得できれば None、拒否した場合はその理由（"queue_full" / "timeout"）
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._observe(0.0)
+            return None
+        if len(self._waiters) >= self.max_queue:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        enqueued = self._clock()
+        try:
+            await asyncio.wait((waiter,), timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # 枠を受け取った直後にキャンセルされた: 次の待機者へ渡す
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+        # release() が枠を渡した場合は in_flight を引き継ぐ
+        if waiter.done():
+            self._observe(self._clock() - enqueued)
+            return None
+        self._waiters.remove(waiter)
+        self._observe(self._clock() - enqueued)
+        return "timeout"
+
+    def release(self) -> None:
+        """実行枠を返却（待機者がいれば枠をそのまま渡す）"""
+        while self._waiters:
+            waiter = self._waiters.pop() if self.overloaded else self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+def _queue_delays_ms(route_class: str) -> tuple[float, float, float]:
+    """ルートクラスの (target, interval, 待ち時間上限) ミリ秒"""
+    if route_class == "auth":
+        target_ms, interval_ms = float(settings.bcrypt_target_ms), settings.bcrypt_target_ms * 4.0
+    else:
+        target_ms, interval_ms = settings.admission_target_delay_ms, settings.admission_interval_ms
+    target_ms = settings.admission_target_delays_ms.get(route_class, target_ms)
+    interval_ms = settings.admission_intervals_ms.get(route_class, interval_ms)
+    return target_ms, interval_ms, settings.admission_queue_timeouts_ms.get(route_class, interval_ms)
+
+
+def default_queues() -> dict[str, AdmissionQueue]:
+    """設定値からルートクラスごとの待ち行列を構築"""
+    limits = {
+        "read": settings.admission_read_concurrency,
+        "search": settings.admission_search_concurrency,
+        "auth": settings.admission_auth_concurrency,
+        "write": settings.admission_write_concurrency,
+    }
+    queues = {}
+    for name, limit in limits.items():
+        target_ms, interval_ms, max_wait_ms = _queue_delays_ms(name)
+        queues[name] = AdmissionQueue(
+            name,
+            limit,
+            max_queue=settings.admission_queue_size,
+            target_delay_seconds=target_ms / 1000,
+            interval_seconds=interval_ms / 1000,
+            max_wait_seconds=max_wait_ms / 1000,
+        )
+    return queues
+
+
+class AdmissionControlMiddleware:
+    """ルートクラスごとに同時実行数を制限する ASGI ミドルウェア"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        queues: dict[str, AdmissionQueue] | None = None,
+        classify: Callable[[Scope], str | None] = classify_route,
+    ):
+        self.app = app
+        self.queues = queues if queues is not None else default_queues()
+        self.classify = classify
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.classify(scope)
+        queue = self.queues.get(route_class) if route_class is not None else None
+        if queue is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejected = await queue.acquire()
+        if rejected is not None:
+            admission_rejected_total.inc(route_class=route_class, reason=rejected)
+            await _reject(send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            queue.release()
+
+
+async def _reject(send: Send) -> None:
+    """503 Service Unavailable を返す"""
+    body = json.dumps(
+        {"detail": "サーバーが混雑しています。しばらくしてから再試行してください"}, ensure_ascii=False
+    ).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(RETRY_AFTER_SECONDS).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
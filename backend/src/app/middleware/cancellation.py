@@ -0,0 +1,74 @@
+"""
+middleware/cancellation.py - クライアント切断時のリクエストキャンセル
+
+クライアントが応答を待たずに切断しても、ハンドラは最後まで実行され、
+実行中のクエリはプールの接続を保持し続けます。
+
+このミドルウェアは receive を監視し、応答の送信完了前に `http.disconnect` を
+受け取るとハンドラを実行中のタスクをキャンセルします。asyncpg は待機中のクエリが
+キャンセルされると PostgreSQL へキャンセル要求を送るため、実行中のクエリも中断されます。
+
+ハンドラは呼び出し元と同じタスクで実行するため、コンテキスト変数はそのまま引き継がれます。
+"""
+
+import asyncio
+import contextlib
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import endpoint_label, http_requests_cancelled_total
+
+
+class RequestCancellationMiddleware:
+    """クライアント切断で処理中のリクエストをキャンセルする ASGI ミドルウェア"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        task = asyncio.current_task()
+        assert task is not None
+        # ボディは1メッセージずつ受け渡す（アプリが読むまで次を受信しない）
+        messages: asyncio.Queue[Message] = asyncio.Queue(maxsize=1)
+        response_complete = False
+        disconnected = False
+
+        async def watch() -> None:
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        disconnected = True
+                        task.cancel()
+                    with contextlib.suppress(asyncio.QueueFull):
+                        messages.put_nowait(message)
+                    return
+                await messages.put(message)
+
+        async def receive_message() -> Message:
+            return await messages.get()
+
+        async def send_message(message: Message) -> None:
+            nonlocal response_complete
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await self.app(scope, receive_message, send_message)
+        except asyncio.CancelledError:
+            if not disconnected:
+                raise
+        finally:
+            watcher.cancel()
+
+        if disconnected:
+            # 切断によるキャンセルはここで打ち切る（サーバー停止などのキャンセルは伝播させる）
+            task.uncancel()
+            http_requests_cancelled_total.inc(endpoint=endpoint_label(scope))
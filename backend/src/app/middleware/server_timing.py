@@ -0,0 +1,92 @@
+"""
+middleware/server_timing.py - Server-Timing ヘッダー
+
+リクエストの処理時間の内訳（db / auth / serialize / bcrypt / total）を
+`Server-Timing` ヘッダーで返します。ブラウザの開発者ツールや curl で
+「遅い」と報告されたリクエストが SQL・変換・認証のどこで時間を使ったかを確認できます。
+
+ヘッダーは応答開始時点の値です（ストリーミング中の処理は含みません）。
+server_timing_log_threshold_ms を設定すると、それ以上かかったリクエストの内訳をログに出力します。
+
+内訳からは処理の分岐が分かるため（例: ログインで bcrypt を実行したか = アカウントが存在するか）、
+ヘッダーは信頼できる呼び出し元（X-Admin-Token が admin_api_key と一致、または
+server_timing_allowed_ips の IP / CIDR）にのみ返し、/auth/ では bcrypt の区間を常に除外します。
+"""
+
+import ipaddress
+import logging
+import secrets
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.metrics import endpoint_label
+from app.timing import collect_timings
+
+logger = logging.getLogger(__name__)
+
+# 認証エンドポイントでは出力しない区間（アカウントの有無が分かるため）
+_AUTH_PREFIX = "/auth/"
+_AUTH_EXCLUDED_SPANS = frozenset({"bcrypt"})
+
+
+class ServerTimingMiddleware:
+    """処理時間の内訳を Server-Timing ヘッダーで返す ASGI ミドルウェア"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        log_threshold_ms: float | None = settings.server_timing_log_threshold_ms,
+        allowed_ips: list[str] = settings.server_timing_allowed_ips,
+        admin_token: str | None = settings.admin_api_key,
+    ):
+        self.app = app
+        self.log_threshold_ms = log_threshold_ms
+        self.allowed_networks = [ipaddress.ip_network(ip, strict=False) for ip in allowed_ips]
+        self.admin_token = admin_token
+
+    def is_trusted(self, scope: Scope) -> bool:
+        """内訳を返してよい呼び出し元か"""
+        if self.admin_token:
+            for name, value in scope["headers"]:
+                if name == b"x-admin-token":
+                    return secrets.compare_digest(value, self.admin_token.encode())
+        client = scope.get("client")
+        if not self.allowed_networks or not client:
+            return False
+        try:
+            address = ipaddress.ip_address(client[0])
+        except ValueError:
+            return False
+        return any(address in network for network in self.allowed_networks)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 0
+        trusted = self.is_trusted(scope)
+        exclude = _AUTH_EXCLUDED_SPANS if scope["path"].startswith(_AUTH_PREFIX) else frozenset()
+
+        with collect_timings(scope) as timings:
+
+            async def send_message(message: Message) -> None:
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    if trusted:
+                        MutableHeaders(scope=message).append("server-timing", timings.header(exclude))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_message)
+            finally:
+                if self.log_threshold_ms is not None and timings.elapsed() * 1000 >= self.log_threshold_ms:
+                    logger.info(
+                        "処理時間の内訳: %s status=%d %s",
+                        endpoint_label(scope),
+                        status_code,
+                        " ".join(f"{name}={ms}ms" for name, ms in timings.as_dict().items()),
+                    )
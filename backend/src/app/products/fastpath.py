@@ -0,0 +1,185 @@
+"""
+products/fastpath.py - 商品読み取りの asyncpg 直接実行パス
+
+商品一覧・詳細は最も呼ばれる読み取りクエリのため、ORM（結果プロキシ・
+アイデンティティマップ・インスタンス生成）を経由せず、同じプールから取得した
+asyncpg 接続でプリペアドステートメントを直接実行し、軽量なタプルに変換します。
+
+ProductsService と同じ条件・順序・ページネーション結果を返します。
+PostgreSQL（asyncpg）以外の接続では ProductsService にそのまま委譲します。
+
+エンドポイントのステートメントタイムアウトは SET LOCAL（追加の往復）ではなく
+asyncpg の呼び出しごとの timeout で適用し、超過時は QueryCanceledError（504）に変換します。
+"""
+
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, NamedTuple
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.instrumentation import DB_SPAN
+from app.database.session import LazySession
+from app.database.timeouts import driver_timeout_seconds
+from app.products.schemas import ProductListParams
+from app.products.service import ProductsService
+from app.timing import span
+
+
+class ProductRow(NamedTuple):
+    """商品1行（ProductResponse.model_validate にそのまま渡せる）"""
+
+    id: UUID
+    name: str
+    description: str | None
+    category: str
+    status: str
+    price: float
+    stock: int | None
+    user_id: UUID | None
+    created_at: datetime
+    updated_at: datetime
+
+
+_COLUMNS = ", ".join(ProductRow._fields)
+
+# ソート可能な列（ProductListParams.sort_by で検証済みの値のみ SQL に埋め込む）
+_SORT_COLUMNS = frozenset({"created_at", "name", "price", "updated_at"})
+
+_GET_BY_ID_SQL = f"SELECT {_COLUMNS} FROM products WHERE id = $1"
+
+
+def build_list_sql(params: ProductListParams, cursor: tuple[Any, UUID] | None) -> tuple[str, list[Any]]:
+    """商品一覧の SQL とパラメータを組み立て
+
+    同じ条件の組み合わせは同じ SQL 文字列になるため、
+    asyncpg の接続ごとのステートメントキャッシュで再利用されます。
+
+    Args:
+        params: 一覧取得パラメータ
+        cursor: 前ページ末尾の (ソート列の値, ID)。None なら先頭から
+    """
+    if params.sort_by not in _SORT_COLUMNS:
+        raise ValueError(f"sort_by must be one of {sorted(_SORT_COLUMNS)}")
+
+    conditions: list[str] = []
+    args: list[Any] = []
+
+    def bind(value: Any) -> str:
+        args.append(value)
+        return f"${len(args)}"
+
+    if params.category:
+        conditions.append(f"category = {bind(params.category)}")
+    if params.status:
+        conditions.append(f"status = {bind(params.status)}")
+    if params.date_from:
+        conditions.append(f"created_at >= {bind(params.date_from)}")
+    if params.date_to:
+        conditions.append(f"created_at <= {bind(params.date_to)}")
+    if params.search:
+        pattern = bind(f"%{params.search}%")
+        conditions.append(f"(name ILIKE {pattern} OR description ILIKE {pattern})")
+
+    # Seek Method: (ソート列, id) の行値比較
+    direction = "DESC" if params.sort_order == "desc" else "ASC"
+    if cursor is not None:
+        op = "<" if params.sort_order == "desc" else ">"
+        sort_value, cursor_id = cursor
+        conditions.append(f"({params.sort_by}, id) {op} ({bind(sort_value)}, {bind(cursor_id)})")
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    sql = (
+        f"SELECT {_COLUMNS} FROM products{where} "
+        f"ORDER BY {params.sort_by} {direction}, id {direction} LIMIT {bind(params.limit + 1)}"
+    )
+    return sql, args
+
+
+class ProductsFastPath:
+    """商品読み取りの高速パス"""
+
+    def __init__(self, db_session: AsyncSession):
+        """初期化"""
+        self.db = db_session
+
+    def _is_asyncpg(self) -> bool:
+        return self.db.get_bind().dialect.driver == "asyncpg"
+
+    @asynccontextmanager
+    async def _driver(self) -> AsyncIterator[tuple[Any, float | None]]:
+        """セッションのプールから asyncpg 接続と呼び出しごとのタイムアウト（秒）を取得（読み取り後すぐに返却）"""
+        timeout = None
+        if isinstance(self.db, LazySession):
+            timeout = driver_timeout_seconds(self.db.statement_timeout_ms)
+            await self.db.acquire(set_statement_timeout=timeout is None)
+        try:
+            conn = await self.db.connection()
+            raw = await conn.get_raw_connection()
+            try:
+                yield raw.driver_connection, timeout
+            except TimeoutError as error:
+                # asyncpg はクエリをキャンセルした上で TimeoutError を送出する
+                raise asyncpg.QueryCanceledError("canceling statement due to statement timeout") from error
+        finally:
+            if isinstance(self.db, LazySession):
+                await self.db.release()
+
+    # ーーーーーー 商品取得 ーーーーーー
+
+    async def get_product_by_id(self, product_id: UUID) -> Any:
+        """IDで商品を取得"""
+        if not self._is_asyncpg():
+            return await ProductsService(self.db).get_product_by_id(product_id)
+
+        async with self._driver() as (driver, timeout):
+            with span(DB_SPAN):
+                record = await driver.fetchrow(_GET_BY_ID_SQL, product_id, timeout=timeout)
+        return ProductRow(*record) if record is not None else None
+
+    # ーーーーーー 商品リスト取得 ーーーーーー
+
+    async def list_products(self, params: ProductListParams) -> dict:
+        """商品リストを取得（ProductsService.list_products と同じ結果）"""
+        if not self._is_asyncpg():
+            return await ProductsService(self.db).list_products(params)
+
+        async with self._driver() as (driver, timeout):
+            cursor = None
+            if params.cursor:
+                try:
+                    cursor_id = UUID(params.cursor)
+                except ValueError:
+                    # 無効なカーソルの場合は無視
+                    cursor_id = None
+                if cursor_id is not None:
+                    with span(DB_SPAN):
+                        sort_value = await driver.fetchval(
+                            f"SELECT {params.sort_by} FROM products WHERE id = $1", cursor_id, timeout=timeout
+                        )
+                    if sort_value is not None:
+                        cursor = (sort_value, cursor_id)
+
+            sql, args = build_list_sql(params, cursor)
+            with span(DB_SPAN):
+                records = await driver.fetch(sql, *args, timeout=timeout)
+
+        products = [ProductRow(*record) for record in records]
+
+        # has_more判定
+        has_more = len(products) > params.limit
+        if has_more:
+            products = products[: params.limit]
+
+        return {
+            "items": products,
+            "pagination": {
+                "next_cursor": str(products[-1].id) if products and has_more else None,
+                "has_more": has_more,
+                "returned_count": len(products),
+                "total_count_estimate": None,
+            },
+        }
@@ -8,13 +8,19 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_active_user
-from app.database.db import get_session
+from app.database.db import get_read_session, get_session
 from app.database.models.user import User
+from app.products.fastpath import ProductsFastPath
 from app.products.schemas import ProductCreate, ProductListParams, ProductResponse, ProductUpdate
 from app.products.service import ProductsService
+from app.ratelimit.quota import QuotaTicket, product_row_quota
+from app.timing import span
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# レスポンスモデルへの変換の区間名（Server-Timing）
+SERIALIZE_SPAN = "serialize"
+
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
@@ -35,10 +41,11 @@ async def create_product(
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: UUID,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
+    quota: QuotaTicket | None = Depends(product_row_quota),
 ) -> ProductResponse:
     """商品を取得"""
-    service = ProductsService(db)
+    service = ProductsFastPath(db)
     product = await service.get_product_by_id(product_id)
 
     if not product:
@@ -47,7 +54,10 @@ async def get_product(
             detail="商品が見つかりません",
         )
 
-    return ProductResponse.model_validate(product)
+    if quota is not None:
+        quota.consume(1)
+    with span(SERIALIZE_SPAN):
+        return ProductResponse.model_validate(product)
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -97,9 +107,13 @@ async def list_products(
     cursor: str | None = Query(None, description="ページネーションカーソル"),
     date_from: str | None = Query(None, description="開始日時 (ISO 8601)"),
     date_to: str | None = Query(None, description="終了日時 (ISO 8601)"),
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
+    quota: QuotaTicket | None = Depends(product_row_quota),
 ) -> dict:
-    """商品リストを取得（カーソルベースページネーション）"""
+    """商品リストを取得（カーソルベースページネーション）
+
+    返却した行数をユーザー・IPごとのクォータに加算します。
+    """
     from datetime import datetime
 
     # 日付文字列をdatetimeに変換
@@ -118,11 +132,14 @@ async def list_products(
         date_to=date_to_dt,
     )
 
-    service = ProductsService(db)
+    service = ProductsFastPath(db)
     result = await service.list_products(params)
 
     # ProductResponseに変換
-    items = [ProductResponse.model_validate(item) for item in result["items"]]
+    with span(SERIALIZE_SPAN):
+        items = [ProductResponse.model_validate(item) for item in result["items"]]
+    if quota is not None:
+        quota.consume(len(items))
 
     return {
         "items": items,
@@ -67,7 +67,7 @@ class ProductResponse(ProductBase):
 class ProductListParams(BaseModel):
     """商品リストクエリパラメータ"""
 
-    limit: int = Field(default=100, ge=1, le=100)
+    limit: int = Field(default=100, ge=1, le=1000)
     cursor: str | None = None
     sort_by: str = Field(default="created_at")
     sort_order: str = Field(default="desc")
@@ -0,0 +1,3 @@
+"""
+ratelimit package - レート制限機能
+"""
@@ -0,0 +1,156 @@
+"""
+ratelimit/middleware.py - 認証エンドポイント向けレート制限ミドルウェア
+
+bcrypt を伴う認証エンドポイントへのクレデンシャルスタッフィングを
+IP・メールアドレス・ユーザー単位のトークンバケットで抑止します。
+対象外のパスは辞書参照1回で素通しします。
+"""
+
+import json
+import math
+from dataclasses import dataclass
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth.security import verify_access_token
+from app.config import settings
+from app.ratelimit.storage import BucketStorage, MemoryBucketStorage, RateLimitResult
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """レート制限ルール"""
+
+    scope: str  # "ip" / "email" / "user"
+    per_minute: int
+
+    @property
+    def rate(self) -> float:
+        """1秒あたりの補充トークン数"""
+        return self.per_minute / 60
+
+    @property
+    def capacity(self) -> float:
+        """バケット容量（1分間の上限をバーストとして許容）"""
+        return float(self.per_minute)
+
+
+def default_rules() -> dict[tuple[str, str], list[RateLimitRule]]:
+    """設定値から (メソッド, パス) ごとのルールを構築"""
+    ip = RateLimitRule("ip", settings.rate_limit_ip_per_minute)
+    email = RateLimitRule("email", settings.rate_limit_email_per_minute)
+    user = RateLimitRule("user", settings.rate_limit_user_per_minute)
+    return {
+        ("POST", "/auth/login"): [ip, email],
+        ("POST", "/auth/register"): [ip, email],
+        ("POST", "/auth/request-password-reset"): [ip, email],
+        ("POST", "/auth/change-password"): [ip, user],
+    }
+
+
+class RateLimitMiddleware:
+    """トークンバケット方式のレート制限 ASGI ミドルウェア"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        storage: BucketStorage | None = None,
+        rules: dict[tuple[str, str], list[RateLimitRule]] | None = None,
+    ):
+        self.app = app
+        self.storage = storage or MemoryBucketStorage(settings.rate_limit_compaction_interval_seconds)
+        self.rules = rules if rules is not None else default_rules()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rules = self.rules.get((scope["method"], scope["path"].rstrip("/") or "/"))
+        if not rules:
+            await self.app(scope, receive, send)
+            return
+
+        # メールアドレスを取得するためにボディを読み込み、後段へ再送する
+        body = b""
+        if any(rule.scope == "email" for rule in rules):
+            body = await _read_body(receive)
+            receive = _replay(body, receive)
+
+        endpoint = scope["path"].rstrip("/").rsplit("/", 1)[-1]
+        for rule in rules:
+            identity = _identity(rule.scope, scope, body)
+            if identity is None:
+                continue
+            result = await self.storage.consume(f"{rule.scope}:{identity}:{endpoint}", rule.rate, rule.capacity)
+            if not result.allowed:
+                await _reject(send, result)
+                return
+
+        await self.app(scope, receive, send)
+
+
+def _identity(kind: str, scope: Scope, body: bytes) -> str | None:
+    """ルール種別に応じた識別子を取得"""
+    if kind == "ip":
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    if kind == "email":
+        try:
+            email = json.loads(body).get("email")
+        except (ValueError, AttributeError):
+            return None
+        return email.strip().lower() if isinstance(email, str) else None
+
+    if kind == "user":
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                token = value.decode("latin-1").removeprefix("Bearer ").strip()
+                payload = verify_access_token(token)
+                return payload.get("sub") if payload else None
+    return None
+
+
+async def _read_body(receive: Receive) -> bytes:
+    """リクエストボディをすべて読み込む"""
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+    return b"".join(chunks)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """読み込み済みボディを一度だけ返す receive を作成"""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+async def _reject(send: Send, result: RateLimitResult) -> None:
+    """429 Too Many Requests を返す"""
+    body = json.dumps(
+        {"detail": "リクエストが多すぎます。しばらくしてから再試行してください"}, ensure_ascii=False
+    ).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(result.retry_after)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,248 @@
+"""
+ratelimit/quota.py - 返却行数ベースのクォータ
+
+リクエスト数ではなく返却した行数で、ユーザー・IPごとの使用量を固定ウィンドウで制限します。
+`limit=1000` でカタログ全体を走査するクライアントが他の利用者を圧迫しないようにします。
+
+- 判定・加算はプロセス内の辞書のみ（リクエストごとの DB アクセスなし）
+- 共有ストレージ（PostgreSQL）使用時は一定間隔で未同期の増分を1文の UPSERT で反映し、
+  他のワーカー・ノードを含めた合計を取得
+- 使用量が上限に達していれば 429、それ以外は RateLimit-* ヘッダーで残量を通知
+  （1ページ分の超過は許容し、次のリクエストから拒否）
+"""
+
+import asyncio
+import contextlib
+import logging
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+from app.database.db import engine, request_user_key
+from app.database.models.ratelimit import RowQuotaUsage
+
+logger = logging.getLogger(__name__)
+
+# 1文の UPSERT に含める最大件数（バインドパラメータ数の上限 32767 / 3列）
+_SYNC_CHUNK = 5000
+
+
+@dataclass(frozen=True)
+class QuotaRule:
+    """行数クォータのルール"""
+
+    scope: str  # "ip" / "user"
+    rows: int  # ウィンドウあたりの上限行数
+
+
+class RowQuota:
+    """固定ウィンドウの行数カウンタ"""
+
+    def __init__(
+        self,
+        window_seconds: int = 3600,
+        engine: AsyncEngine | None = None,
+        sync_interval_seconds: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.window_seconds = window_seconds
+        self.engine = engine
+        self.sync_interval_seconds = sync_interval_seconds
+        self._clock = clock
+        self._window_start = self._current_window()
+        # 最終同期時点の共有テーブル上の合計（自ワーカーの同期済み分を含む）
+        self._synced: dict[str, int] = {}
+        # 未同期の増分
+        self._pending: dict[str, int] = {}
+        # 次回の同期で最新の合計を取得するキー
+        self._touched: set[str] = set()
+        self._task: asyncio.Task | None = None
+
+    def _current_window(self) -> int:
+        return int(self._clock() // self.window_seconds) * self.window_seconds
+
+    def _roll(self) -> int:
+        """ウィンドウが切り替わっていればカウンタをリセット"""
+        start = self._current_window()
+        if start != self._window_start:
+            self._window_start = start
+            self._synced.clear()
+            self._pending.clear()
+            self._touched.clear()
+        return start
+
+    def used(self, key: str) -> int:
+        """現在のウィンドウでの使用行数"""
+        self._roll()
+        if self.engine is not None:
+            self._touched.add(key)
+        return self._synced.get(key, 0) + self._pending.get(key, 0)
+
+    def add(self, key: str, rows: int) -> None:
+        """使用行数を加算"""
+        self._roll()
+        self._pending[key] = self._pending.get(key, 0) + rows
+
+    def reset_after(self) -> int:
+        """現在のウィンドウが終わるまでの秒数"""
+        return max(math.ceil(self._window_start + self.window_seconds - self._clock()), 0)
+
+    # ーーーーーー ライフサイクル ーーーーーー
+
+    def start(self) -> None:
+        """共有テーブルとの定期同期を開始（共有ストレージ未使用時は何もしない）"""
+        if self.engine is not None and self._task is None:
+            self._task = asyncio.create_task(self._run_forever(), name="row-quota-sync")
+
+    async def stop(self) -> None:
+        """定期同期を停止し、未同期の増分を反映"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        await self.sync()
+
+    async def _run_forever(self) -> None:
+        window_start = self._window_start
+        while True:
+            await asyncio.sleep(self.sync_interval_seconds)
+            try:
+                await self.sync()
+                if self._window_start != window_start:
+                    window_start = self._window_start
+                    await self.prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("行数クォータの同期に失敗しました")
+
+    # ーーーーーー 同期処理 ーーーーーー
+
+    async def sync(self) -> int:
+        """未同期の増分を共有テーブルへ加算し、参照したキーの最新の合計を取得
+
+        Returns:
+            同期したキー数
+        """
+        if self.engine is None:
+            return 0
+        window_start = self._roll()
+        keys = self._touched | self._pending.keys()
+        if not keys:
+            return 0
+        pending, self._pending = self._pending, {}
+        self._touched = set()
+        rows = [{"key": key, "window_start": window_start, "rows": pending.get(key, 0)} for key in keys]
+
+        totals: dict[str, int] = {}
+        try:
+            async with self.engine.begin() as conn:
+                insert = sqlite.insert if conn.dialect.name == "sqlite" else postgresql.insert
+                for start in range(0, len(rows), _SYNC_CHUNK):
+                    stmt = insert(RowQuotaUsage).values(rows[start : start + _SYNC_CHUNK])
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[RowQuotaUsage.key, RowQuotaUsage.window_start],
+                        set_={"rows": RowQuotaUsage.rows + stmt.excluded.rows},
+                    ).returning(RowQuotaUsage.key, RowQuotaUsage.rows)
+                    totals.update((await conn.execute(stmt)).tuples().all())
+        except Exception:
+            # 反映できなかった増分は戻し、次回に再試行
+            if self._window_start == window_start:
+                for key, count in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + count
+            raise
+
+        if self._window_start == window_start:
+            self._synced.update(totals)
+        return len(rows)
+
+    async def prune(self) -> int:
+        """終了したウィンドウの行を削除
+
+        Returns:
+            削除した行数
+        """
+        if self.engine is None:
+            return 0
+        stmt = delete(RowQuotaUsage).where(RowQuotaUsage.window_start < self._window_start)
+        async with self.engine.begin() as conn:
+            result = await conn.execute(stmt)
+        return int(result.rowcount or 0)
+
+
+class QuotaTicket:
+    """1リクエスト分のクォータ（返却行数が決まった後に consume する）"""
+
+    def __init__(self, quota: RowQuota, limits: list[tuple[str, int]], response: Response):
+        self.quota = quota
+        self.limits = limits
+        self.response = response
+
+    def consume(self, rows: int) -> None:
+        """返却行数を加算し、RateLimit-* ヘッダーを設定"""
+        for key, _ in self.limits:
+            self.quota.add(key, rows)
+        self.response.headers.update(_headers(self.quota, self.limits))
+
+
+def _headers(quota: RowQuota, limits: list[tuple[str, int]]) -> dict[str, str]:
+    """最も残りの少ないルールの RateLimit-* ヘッダー"""
+    key, limit = min(limits, key=lambda item: item[1] - quota.used(item[0]))
+    return {
+        "RateLimit-Limit": str(limit),
+        "RateLimit-Remaining": str(max(limit - quota.used(key), 0)),
+        "RateLimit-Reset": str(quota.reset_after()),
+        "RateLimit-Policy": f"{limit};w={quota.window_seconds}",
+    }
+
+
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def default_rules() -> list[QuotaRule]:
+    """設定値から行数クォータのルールを構築"""
+    return [
+        QuotaRule("ip", settings.product_quota_ip_rows),
+        QuotaRule("user", settings.product_quota_user_rows),
+    ]
+
+
+product_quota = RowQuota(
+    window_seconds=settings.product_quota_window_seconds,
+    engine=engine if settings.rate_limit_storage == "postgres" else None,
+    sync_interval_seconds=settings.product_quota_sync_interval_seconds,
+)
+
+_product_rules = default_rules()
+
+
+async def product_row_quota(request: Request, response: Response) -> QuotaTicket | None:
+    """商品エンドポイントの行数クォータを確認（上限到達時は 429）"""
+    if not settings.product_quota_enabled:
+        return None
+
+    identities = {"ip": _client_ip(request), "user": request_user_key(request)}
+    limits = [
+        (f"products:{rule.scope}:{identities[rule.scope]}", rule.rows)
+        for rule in _product_rules
+        if identities[rule.scope] is not None
+    ]
+
+    if any(product_quota.used(key) >= limit for key, limit in limits):
+        headers = _headers(product_quota, limits)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="取得件数の上限に達しました。しばらくしてから再試行してください",
+            headers={**headers, "Retry-After": headers["RateLimit-Reset"]},
+        )
+    return QuotaTicket(product_quota, limits, response)
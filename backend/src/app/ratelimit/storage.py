@@ -0,0 +1,147 @@
+"""
+ratelimit/storage.py - トークンバケットのストレージ実装
+
+- MemoryBucketStorage: プロセス内の辞書（1リクエストあたり O(1)、アイドルキーを定期的に削除）
+- PostgresBucketStorage: PostgreSQL の1文のUPSERTで複数ノード間で状態を共有
+"""
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.database.models.ratelimit import RateLimitBucket
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    """レート制限の判定結果"""
+
+    allowed: bool
+    remaining: float
+    retry_after: float
+
+
+class BucketStorage(Protocol):
+    """トークンバケットのストレージインターフェース"""
+
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> RateLimitResult:
+        """
+        バケットからトークンを消費
+
+        Args:
+            key: バケットキー（例: "ip:203.0.113.1:login"）
+            rate: 1秒あたりの補充トークン数
+            capacity: バケット容量（バースト上限）
+            cost: 消費するトークン数
+        """
+        ...
+
+
+class MemoryBucketStorage:
+    """プロセス内トークンバケットストレージ"""
+
+    def __init__(self, compaction_interval: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        self.compaction_interval = compaction_interval
+        self._clock = clock
+        # key -> [残りトークン, 最終更新時刻, 満タンになる時刻]
+        self._buckets: dict[str, list[float]] = {}
+        self._last_compaction = clock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> RateLimitResult:
+        """バケットからトークンを消費"""
+        now = self._clock()
+        if now - self._last_compaction >= self.compaction_interval:
+            self.compact(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = capacity
+        else:
+            tokens = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+
+        if tokens >= cost:
+            tokens -= cost
+            allowed = True
+            retry_after = 0.0
+        else:
+            allowed = False
+            retry_after = (cost - tokens) / rate
+
+        self._buckets[key] = [tokens, now, now + (capacity - tokens) / rate]
+        return RateLimitResult(allowed=allowed, remaining=tokens, retry_after=retry_after)
+
+    def compact(self, now: float | None = None) -> int:
+        """満タンまで回復したバケットを削除（状態を持たない新規バケットと等価）
+
+        Returns:
+            int: 削除したキー数
+        """
+        now = self._clock() if now is None else now
+        idle = [key for key, bucket in self._buckets.items() if bucket[2] <= now]
+        for key in idle:
+            del self._buckets[key]
+        self._last_compaction = now
+        return len(idle)
+
+
+class PostgresBucketStorage:
+    """PostgreSQL 共有トークンバケットストレージ
+
+    補充計算と消費を1文の INSERT ... ON CONFLICT DO UPDATE ... WHERE で行います。
+    トークンが足りない場合は更新条件が偽になり行が返らないため、拒否と判定します。
+    """
+
+    def __init__(self, engine: AsyncEngine, compaction_interval: float = 60.0, idle_ttl: float = 3600.0):
+        self.engine = engine
+        self.compaction_interval = compaction_interval
+        self.idle_ttl = idle_ttl
+        self._last_compaction = time.monotonic()
+        self._compaction_task: asyncio.Task | None = None
+
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> RateLimitResult:
+        """バケットからトークンを消費"""
+        if time.monotonic() - self._last_compaction >= self.compaction_interval:
+            self._last_compaction = time.monotonic()
+            if self._compaction_task is None or self._compaction_task.done():
+                # リクエストを待たせないようバックグラウンドで削除
+                self._compaction_task = asyncio.create_task(self.compact())
+
+        now = func.clock_timestamp()
+        elapsed = func.extract("epoch", now - RateLimitBucket.updated_at)
+        refilled = func.least(capacity, RateLimitBucket.tokens + elapsed * rate)
+
+        stmt = insert(RateLimitBucket).values(key=key, tokens=capacity - cost, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RateLimitBucket.key],
+            set_={"tokens": refilled - cost, "updated_at": now},
+            where=refilled >= cost,
+        ).returning(RateLimitBucket.tokens)
+
+        async with self.engine.begin() as conn:
+            remaining = (await conn.execute(stmt)).scalar()
+
+        if remaining is None:
+            return RateLimitResult(allowed=False, remaining=0.0, retry_after=cost / rate)
+        return RateLimitResult(allowed=True, remaining=float(remaining), retry_after=0.0)
+
+    async def compact(self) -> int:
+        """idle_ttl 秒以上更新のないバケットを削除
+
+        Returns:
+            int: 削除した行数
+        """
+        stmt = delete(RateLimitBucket).where(
+            RateLimitBucket.updated_at < func.now() - func.make_interval(0, 0, 0, 0, 0, 0, self.idle_ttl)
+        )
+        async with self.engine.begin() as conn:
+            result = await conn.execute(stmt)
+        return int(result.rowcount or 0)
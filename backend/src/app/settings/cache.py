@@ -0,0 +1,84 @@
+"""
+settings/cache.py - ユーザー設定の読み取りキャッシュ
+
+アプリ起動のたびに呼ばれる GET /settings を DB に問い合わせずに返すための
+プロセス内 LRU キャッシュです。書き込み時は該当ユーザーのエントリを無効化します。
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from uuid import UUID
+
+from app.config import settings
+from app.metrics import cache_requests_total
+from app.settings.schemas import UserSettingsResponse
+
+
+class SettingsCache:
+    """ユーザーごとの設定キャッシュ（TTL 付き LRU）"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.settings_cache_ttl_seconds,
+        max_entries: int = settings.settings_cache_max_entries,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        # user_id -> (有効期限, 設定)
+        self._entries: OrderedDict[UUID, tuple[float, UserSettingsResponse]] = OrderedDict()
+        # 無効化のたびに進む世代番号（無効化と競合した読み取り結果を保存しないため）
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: UUID) -> UserSettingsResponse | None:
+        """キャッシュから設定を取得（期限切れ・未登録は None）"""
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, user_id: UUID, value: UserSettingsResponse, version: int | None = None) -> None:
+        """設定をキャッシュ
+
+        Args:
+            user_id: ユーザーID
+            value: 設定
+            version: DB 読み取り前に取得した `version`。以降に無効化があれば保存しない
+        """
+        if version is not None and version != self.version:
+            return
+        self._entries[user_id] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: UUID) -> None:
+        """ユーザーの設定を無効化"""
+        self.version += 1
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        """すべてのエントリを破棄"""
+        self.version += 1
+        self._entries.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        """キャッシュヒット率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# アプリ全体で共有する設定キャッシュ
+settings_cache = SettingsCache()
+cache_requests_total.set_function(lambda: settings_cache.hits, cache="settings", result="hit")
+cache_requests_total.set_function(lambda: settings_cache.misses, cache="settings", result="miss")
@@ -2,7 +2,7 @@
 settings/router.py - ユーザー設定APIエンドポイント
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.dependencies import get_current_active_user
@@ -10,7 +10,7 @@ from app.auth.schemas import UserResponse
 from app.database.db import get_session
 from app.database.models.user import User
 from app.settings.schemas import DeviceInfo, DeviceListResponse, ProfileUpdate, UserSettingsResponse, UserSettingsUpdate
-from app.settings.service import SettingsService
+from app.settings.service import DEVICE_PAGE_SIZE, SettingsService
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
@@ -59,12 +59,18 @@ async def update_profile(
 
 @router.get("/devices", response_model=DeviceListResponse)
 async def get_devices(
+    limit: int = Query(DEVICE_PAGE_SIZE, ge=1, le=100, description="取得件数"),
+    cursor: str | None = Query(None, description="ページネーションカーソル"),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_session),
 ) -> DeviceListResponse:
-    """デバイス一覧を取得（認証必須）"""
+    """デバイス一覧を取得（認証必須・カーソルベースページネーション）
+
+    同じデバイスのトークンが複数ある場合は最新のもののみ返します。
+    """
     service = SettingsService(db)
-    devices = await service.get_user_devices(current_user.id)
+    result = await service.list_user_devices(current_user.id, limit=limit, cursor=cursor)
+    devices = result["items"]
 
     # RefreshToken から DeviceInfo に変換
     device_list = [
@@ -80,7 +86,7 @@ async def get_devices(
         for device in devices
     ]
 
-    return DeviceListResponse(devices=device_list)
+    return DeviceListResponse(devices=device_list, next_cursor=result["next_cursor"], has_more=result["has_more"])
 
 
 @router.delete("/devices/{device_id}", status_code=status.HTTP_200_OK)
@@ -67,3 +67,5 @@ class DeviceListResponse(BaseModel):
     """デバイス一覧レスポンス"""
 
     devices: list[DeviceInfo]
+    next_cursor: str | None = None
+    has_more: bool = False
@@ -2,16 +2,31 @@
 settings/service.py - ユーザー設定サービス
 """
 
+import base64
 from datetime import UTC, datetime
+from typing import Any
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import and_, exists, or_, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.database.models.settings import UserSettings
 from app.database.models.token import RefreshToken
 from app.database.models.user import User
-from app.settings.schemas import ProfileUpdate, UserSettingsCreate, UserSettingsUpdate
+from app.database.utils import dialect_insert, unique_violation_column
+from app.settings.cache import settings_cache
+from app.settings.schemas import ProfileUpdate, UserSettingsCreate, UserSettingsResponse, UserSettingsUpdate
+
+# 一意制約違反の列 -> エラーメッセージ
+_UNIQUE_VIOLATION_MESSAGES = {
+    "username": "このユーザー名は既に使用されています",
+    "email": "このメールアドレスは既に使用されています",
+}
+
+# デバイス一覧の1ページあたりの件数
+DEVICE_PAGE_SIZE = 50
 
 
 class SettingsService:
@@ -40,92 +55,227 @@ class SettingsService:
         await self.db.refresh(settings)
         return settings
 
-    async def get_or_create_user_settings(self, user_id: UUID) -> UserSettings:
-        """ユーザー設定を取得、存在しない場合は作成"""
-        settings = await self.get_user_settings(user_id)
-        if not settings:
-            settings = await self.create_user_settings(user_id, UserSettingsCreate())
-        return settings
+    async def get_or_create_user_settings(self, user_id: UUID) -> UserSettingsResponse:
+        """ユーザー設定を取得、存在しない場合は作成
+
+        キャッシュにない場合は SELECT で取得し、行がない場合のみ作成します。
+        """
+        cached = settings_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        version = settings_cache.version
+        settings = await self._get_or_insert_user_settings(user_id)
 
-    async def update_user_settings(self, user_id: UUID, schema: UserSettingsUpdate) -> UserSettings:
-        """ユーザー設定を更新"""
-        settings = await self.get_or_create_user_settings(user_id)
+        response = UserSettingsResponse.model_validate(settings)
+        settings_cache.set(user_id, response, version)
+        return response
 
+    async def update_user_settings(self, user_id: UUID, schema: UserSettingsUpdate) -> UserSettingsResponse:
+        """ユーザー設定を更新（未作成の場合はデフォルト値で作成してから更新）"""
         # 更新対象のフィールドのみ更新
         update_data = schema.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(settings, field, value)
+        if not update_data:
+            return UserSettingsResponse.model_validate(await self._get_or_insert_user_settings(user_id))
 
-        settings.updated_at = datetime.now(UTC)
+        settings = await self._upsert_user_settings(user_id, update_data)
+        await self.db.commit()
+        settings_cache.invalidate(user_id)
+
+        return UserSettingsResponse.model_validate(settings)
+
+    async def _get_or_insert_user_settings(self, user_id: UUID) -> UserSettings:
+        """既存の設定を SELECT で取得し、ない場合のみ INSERT ... ON CONFLICT DO NOTHING で作成
+
+        既存行の取得では行ロックや書き込み（WAL）を発生させません。
+        """
+        settings = await self.get_user_settings(user_id)
+        if settings is not None:
+            return settings
 
+        stmt = (
+            dialect_insert(self.db, UserSettings)
+            .values(user_id=user_id)
+            .on_conflict_do_nothing(index_elements=[UserSettings.user_id])
+            .returning(UserSettings)
+        )
+        settings = (await self.db.scalars(stmt)).first()
         await self.db.commit()
-        await self.db.refresh(settings)
+        if settings is None:
+            # 同時に作成された行を取得
+            result = await self.db.execute(select(UserSettings).where(UserSettings.user_id == user_id))
+            settings = result.scalar_one()
         return settings
 
+    async def _upsert_user_settings(self, user_id: UUID, values: dict) -> UserSettings:
+        """INSERT ... ON CONFLICT (user_id) DO UPDATE ... RETURNING で設定を作成・更新"""
+        stmt = dialect_insert(self.db, UserSettings).values(user_id=user_id, **values)
+        stmt = (
+            stmt.on_conflict_do_update(
+                index_elements=[UserSettings.user_id], set_={**values, "updated_at": datetime.now(UTC)}
+            )
+            .returning(UserSettings)
+            .execution_options(populate_existing=True)
+        )
+        return (await self.db.scalars(stmt)).one()
+
+    async def get_user_with_settings(self, user_id: UUID) -> tuple[User, UserSettings | None] | None:
+        """ユーザーと設定を1回の JOIN クエリで取得
+
+        Returns:
+            (ユーザー, 設定) のタプル。設定未作成の場合は設定が None、ユーザーが存在しない場合は None
+        """
+        version = settings_cache.version
+        result = await self.db.execute(
+            select(User, UserSettings)
+            .outerjoin(UserSettings, UserSettings.user_id == User.id)
+            .where(User.id == user_id)
+        )
+        row = result.first()
+        if row is None:
+            return None
+
+        user, settings = row
+        if settings is not None:
+            settings_cache.set(user_id, UserSettingsResponse.model_validate(settings), version)
+        return user, settings
+
     # ーーーーーー プロフィール管理 ーーーーーー
 
     async def update_profile(self, user_id: UUID, schema: ProfileUpdate) -> User:
-        """プロフィールを更新"""
-        result = await self.db.execute(select(User).where(User.id == user_id))
-        user = result.scalars().first()
-
-        if not user:
-            raise ValueError("ユーザーが見つかりません")
+        """プロフィールを更新
 
+        重複チェックは一意制約に任せ、UPDATE ... RETURNING の1文で更新します。
+        """
         # 更新対象のフィールドのみ更新
         update_data = schema.model_dump(exclude_unset=True)
 
-        # ユーザー名の重複チェック
-        if "username" in update_data and update_data["username"] != user.username:
-            existing_user = await self.db.execute(select(User).where(User.username == update_data["username"]))
-            if existing_user.scalars().first():
-                raise ValueError("このユーザー名は既に使用されています")
-
-        # メールアドレスの重複チェック
-        if "email" in update_data and update_data["email"] != user.email:
-            existing_user = await self.db.execute(select(User).where(User.email == update_data["email"]))
-            if existing_user.scalars().first():
-                raise ValueError("このメールアドレスは既に使用されています")
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**update_data, updated_at=datetime.now(UTC))
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
 
-        # 更新実行
-        for field, value in update_data.items():
-            setattr(user, field, value)
+        try:
+            user = (await self.db.scalars(stmt)).first()
+        except IntegrityError as e:
+            await self.db.rollback()
+            column = unique_violation_column(e, User.__table__)
+            raise ValueError(_UNIQUE_VIOLATION_MESSAGES.get(column or "", "ユーザー情報が重複しています")) from e
 
-        user.updated_at = datetime.now(UTC)
+        if not user:
+            raise ValueError("ユーザーが見つかりません")
 
         await self.db.commit()
-        await self.db.refresh(user)
         return user
 
     # ーーーーーー デバイス管理 ーーーーーー
 
-    async def get_user_devices(self, user_id: UUID) -> list[RefreshToken]:
-        """ユーザーのデバイス一覧を取得"""
-        result = await self.db.execute(
+    async def get_user_devices(
+        self, user_id: UUID, limit: int | None = None, cursor: str | None = None
+    ) -> list[RefreshToken]:
+        """ユーザーのデバイス一覧を取得（デバイスごとに最新のトークンのみ）
+
+        部分インデックス (user_id, last_used_at DESC, id DESC) WHERE revoked_at IS NULL を
+        順に走査し、同じデバイスにより新しい有効トークンがある行を除外します。
+
+        Args:
+            user_id: ユーザーID
+            limit: 取得件数（省略時は全件）
+            cursor: 前ページ末尾のカーソル（`encode_device_cursor` で生成）
+        """
+        now = datetime.now(UTC)
+        newer = aliased(RefreshToken)
+        query = (
             select(RefreshToken)
             .where(RefreshToken.user_id == user_id)
             .where(RefreshToken.revoked_at.is_(None))
-            .where(RefreshToken.expires_at > datetime.now(UTC))
-            .order_by(RefreshToken.last_used_at.desc())
+            .where(RefreshToken.expires_at > now)
+            .where(
+                ~exists().where(
+                    newer.user_id == RefreshToken.user_id,
+                    newer.device_id == RefreshToken.device_id,
+                    newer.revoked_at.is_(None),
+                    newer.expires_at > now,
+                    or_(
+                        newer.last_used_at > RefreshToken.last_used_at,
+                        and_(newer.last_used_at == RefreshToken.last_used_at, newer.id > RefreshToken.id),
+                    ),
+                )
+            )
+            .order_by(RefreshToken.last_used_at.desc(), RefreshToken.id.desc())
         )
+
+        # Seek Method: (last_used_at, id) が前ページ末尾より小さい行から取得
+        position = decode_device_cursor(cursor) if cursor else None
+        if position:
+            last_used_at, token_id = position
+            query = query.where(
+                or_(
+                    RefreshToken.last_used_at < last_used_at,
+                    and_(RefreshToken.last_used_at == last_used_at, RefreshToken.id < token_id),
+                )
+            )
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        result = await self.db.execute(query)
         return list(result.scalars().all())
 
+    async def list_user_devices(
+        self, user_id: UUID, limit: int = DEVICE_PAGE_SIZE, cursor: str | None = None
+    ) -> dict[str, Any]:
+        """デバイス一覧を1ページ分取得（キーセットページネーション）"""
+        # limit + 1 で次ページの有無を判定
+        devices = await self.get_user_devices(user_id, limit=limit + 1, cursor=cursor)
+
+        has_more = len(devices) > limit
+        devices = devices[:limit]
+
+        return {
+            "items": devices,
+            "next_cursor": encode_device_cursor(devices[-1]) if devices and has_more else None,
+            "has_more": has_more,
+        }
+
     async def revoke_device(self, user_id: UUID, device_id: str) -> bool:
         """デバイスを無効化（リフレッシュトークンを無効化）"""
+        # 1文のUPDATEで該当デバイスのすべてのトークンを無効化
         result = await self.db.execute(
-            select(RefreshToken)
+            update(RefreshToken)
             .where(RefreshToken.user_id == user_id)
             .where(RefreshToken.device_id == device_id)
             .where(RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(UTC))
+            .returning(RefreshToken.device_id),
+            execution_options={"synchronize_session": False},
         )
-        tokens = result.scalars().all()
 
-        if not tokens:
+        if not result.scalars().all():
             raise ValueError("デバイスが見つかりません")
 
-        # すべてのトークンを無効化
-        for token in tokens:
-            token.revoked_at = datetime.now(UTC)
-
         await self.db.commit()
         return True
+
+
+def encode_device_cursor(device: RefreshToken) -> str:
+    """デバイス一覧のカーソルを生成
+
+    ページ取得中に last_used_at が更新されても位置がずれないよう、
+    トークンIDではなく (last_used_at, id) の値そのものを埋め込みます。
+    """
+    raw = f"{device.last_used_at.isoformat()}|{device.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_device_cursor(cursor: str) -> tuple[datetime, UUID] | None:
+    """デバイス一覧のカーソルを復元（無効なカーソルは None）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        last_used_at, token_id = raw.split("|", 1)
+        return datetime.fromisoformat(last_used_at), UUID(token_id)
+    except ValueError:
+        return None
@@ -0,0 +1,119 @@
+"""
+timing.py - リクエスト処理時間の内訳（Server-Timing）
+
+リクエストごとの収集器（RequestTimings）をコンテキスト変数に置き、
+SQLAlchemy のイベントやサービスのコードから名前付きの区間（span）の時間を加算します。
+
+- db: クエリの実行時間（database/instrumentation.py）
+- auth: アクセストークンの検証とユーザーの取得
+- serialize: レスポンスモデルへの変換
+- bcrypt: パスワードのハッシュ計算・検証
+
+区間は重なってもかまいません（auth 中のクエリは db にも含まれます）。
+記録は辞書への加算のみで、リクエスト外（収集器がない場合）は何もしません。
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from app.metrics import endpoint_label
+
+
+class RequestTimings:
+    """1リクエストの処理時間の内訳"""
+
+    __slots__ = ("started", "scope", "_spans")
+
+    def __init__(self, scope: dict[str, Any] | None = None) -> None:
+        self.started = time.perf_counter()
+        # リクエストの ASGI スコープ（ルーティング後にエンドポイントを特定するため）
+        self.scope = scope
+        # 区間名 -> [合計秒数, 回数]
+        self._spans: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        """区間の時間を加算"""
+        span = self._spans.get(name)
+        if span is None:
+            self._spans[name] = [seconds, 1]
+        else:
+            span[0] += seconds
+            span[1] += 1
+
+    def seconds(self, name: str) -> float:
+        """区間の合計秒数"""
+        span = self._spans.get(name)
+        return span[0] if span is not None else 0.0
+
+    def count(self, name: str) -> int:
+        """区間の回数"""
+        span = self._spans.get(name)
+        return int(span[1]) if span is not None else 0
+
+    def endpoint(self) -> str | None:
+        """リクエストのエンドポイント（"METHOD /route/template"）"""
+        return endpoint_label(self.scope) if self.scope is not None else None
+
+    def elapsed(self) -> float:
+        """収集開始からの経過秒数"""
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> dict[str, float]:
+        """区間名 -> ミリ秒（total は収集開始からの経過時間）"""
+        result = {name: round(seconds * 1000, 3) for name, (seconds, _) in self._spans.items()}
+        result["total"] = round(self.elapsed() * 1000, 3)
+        return result
+
+    def header(self, exclude: frozenset[str] = frozenset()) -> str:
+        """Server-Timing ヘッダーの値（ミリ秒。db はクエリ数を desc に含める。exclude の区間は出力しない）"""
+        parts = []
+        for name, (seconds, count) in self._spans.items():
+            if name in exclude:
+                continue
+            desc = f';desc="{int(count)} queries"' if name == "db" else ""
+            parts.append(f"{name};dur={seconds * 1000:.3f}{desc}")
+        parts.append(f"total;dur={self.elapsed() * 1000:.3f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def collect_timings(scope: dict[str, Any] | None = None) -> Iterator[RequestTimings]:
+    """現在のコンテキストで内訳の収集を開始（すでに収集中ならその収集器を使う）"""
+    timings = _current.get()
+    if timings is not None:
+        yield timings
+        return
+    timings = RequestTimings(scope)
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def current_timings() -> RequestTimings | None:
+    """現在のリクエストの収集器（リクエスト外では None）"""
+    return _current.get()
+
+
+def add_span(name: str, seconds: float) -> None:
+    """現在のリクエストの区間に時間を加算"""
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """ブロックの実行時間を区間として記録"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - started)
@@ -0,0 +1,3 @@
+"""
+tests/integration/__init__.py
+"""
@@ -0,0 +1,75 @@
+"""
+tests/integration/test_pgbouncer.py - PgBouncer（transaction モード）互換性の結合テスト
+
+compose.pgbouncer.yml の PgBouncer に対して実行します。
+DB_PGBOUNCER_TRANSACTION_MODE が未設定の場合はスキップします。
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.auth.sweeper import TokenSweeper
+from app.config import settings
+from app.database.models.product import Product
+from app.database.pool import transaction_pooling_connect_args
+from app.products.fastpath import ProductsFastPath
+from app.products.schemas import ProductListParams
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(not settings.db_pgbouncer_transaction_mode, reason="DB_PGBOUNCER_TRANSACTION_MODE が未設定です"),
+]
+
+
+@pytest.fixture
+async def pooled_engine():
+    """PgBouncer 経由のエンジン（サーバー側の接続より多いクライアント接続を持つ）"""
+    engine = create_async_engine(
+        settings.database_url,
+        pool_size=40,
+        max_overflow=0,
+        connect_args=transaction_pooling_connect_args(),
+    )
+    yield engine
+    await engine.dispose()
+
+
+class TestPgBouncer:
+    """PgBouncer 互換性の結合テストクラス"""
+
+    async def test_concurrent_statements_do_not_collide(self, pooled_engine):
+        """サーバー接続が入れ替わってもプリペアドステートメントが衝突しない"""
+
+        async def worker() -> None:
+            for _ in range(5):
+                async with AsyncSession(pooled_engine) as session:
+                    await session.execute(select(Product.id).limit(1))
+                    await session.execute(text("SELECT count(*) FROM products WHERE status = :status"), {"status": "x"})
+                    products = ProductsFastPath(session)
+                    await products.list_products(ProductListParams(limit=5, sort_by="price"))
+                    await products.get_product_by_id(uuid4())
+
+        await asyncio.gather(*(worker() for _ in range(40)))
+
+    async def test_write_transaction(self, pooled_engine):
+        """トランザクション内の書き込み・読み取りは同じサーバー接続で完結する"""
+        name = f"pgbouncer-test-{uuid4().hex[:8]}"
+        async with AsyncSession(pooled_engine) as session:
+            session.add(Product(name=name, category="pgbouncer", status="active", price=1.0))
+            await session.flush()
+            assert await session.scalar(select(Product.name).where(Product.name == name)) == name
+            await session.rollback()
+
+    @pytest.mark.skipif(not settings.database_direct_url, reason="DATABASE_DIRECT_URL が未設定です")
+    async def test_sweeper_lock_uses_direct_connection(self, pooled_engine):
+        """スイーパーのアドバイザリロックは直接接続で取得し、削除は PgBouncer 経由で行う"""
+        direct = create_async_engine(settings.database_direct_url)
+        try:
+            sweeper = TokenSweeper(pooled_engine, batch_pause_seconds=0, lock_engine=direct)
+            assert await sweeper.sweep_once() is not None
+        finally:
+            await direct.dispose()
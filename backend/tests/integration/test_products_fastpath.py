@@ -0,0 +1,145 @@
+"""
+tests/integration/test_products_fastpath.py - 商品読み取り高速パスの結合テスト
+
+products/fastpath.py の asyncpg 直接実行（(ソート列, id) の行値比較によるシーク・
+カーソルの解決・行の変換）が ProductsService（ORM）と同じページを返すことを、
+DATABASE_URL の PostgreSQL 上で確認します。ソート列はすべて NOT NULL のため
+NULL の並び順は比較の対象外です。
+
+接続できない場合はスキップします。
+"""
+
+import itertools
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database.models.product import Product
+from app.database.session import LazySession
+from app.products.fastpath import ProductsFastPath
+from app.products.schemas import ProductListParams, ProductResponse
+from app.products.service import ProductsService
+
+pytestmark = pytest.mark.integration
+
+SORT_FIELDS = ("created_at", "name", "price", "updated_at")
+
+# 投入する商品数（ソート列の値が重複し、id で順序が決まる行を含む）
+PRODUCT_COUNT = 23
+
+
+@pytest.fixture
+async def session_maker():
+    """DATABASE_URL の PostgreSQL に接続するセッションファクトリ"""
+    engine = create_async_engine(settings.database_url)
+    try:
+        async with engine.connect():
+            pass
+    except (OSError, TimeoutError) as error:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL に接続できません: {error}")
+    yield async_sessionmaker(bind=engine, class_=LazySession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def category(session_maker):
+    """このテスト専用のカテゴリの商品（終了後に削除）"""
+    category = f"fastpath-{uuid4().hex[:8]}"
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    async with session_maker() as session:
+        session.add_all(
+            [
+                Product(
+                    name=f"item-{i % 5}",
+                    description=None if i % 4 == 0 else f"description {i}",
+                    category=category,
+                    status="active" if i % 3 else "draft",
+                    price=float(i % 7 + 1),
+                    stock=i,
+                    created_at=base + timedelta(minutes=i // 2),
+                    updated_at=base + timedelta(minutes=i % 4),
+                )
+                for i in range(PRODUCT_COUNT)
+            ]
+        )
+        await session.commit()
+    yield category
+    async with session_maker() as session:
+        await session.execute(delete(Product).where(Product.category == category))
+        await session.commit()
+
+
+async def _walk(session: AsyncSession, params: ProductListParams, fast: bool) -> list[dict]:
+    """カーソルをたどって全ページを取得"""
+    pages = []
+    cursor = None
+    while True:
+        page_params = params.model_copy(update={"cursor": cursor})
+        if fast:
+            page = await ProductsFastPath(session).list_products(page_params)
+        else:
+            page = await ProductsService(session).list_products(page_params)
+        pages.append(
+            {
+                "items": [ProductResponse.model_validate(item).model_dump() for item in page["items"]],
+                "pagination": page["pagination"],
+            }
+        )
+        cursor = page["pagination"]["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+class TestProductsFastPath:
+    """ProductsFastPath の結合テストクラス"""
+
+    @pytest.mark.parametrize(("sort_by", "sort_order"), list(itertools.product(SORT_FIELDS, ("asc", "desc"))))
+    async def test_pages_match_products_service(self, session_maker, category, sort_by, sort_order):
+        """ソート列・順序ごとに、カーソルでたどった全ページが ProductsService と一致する"""
+        params = ProductListParams(category=category, sort_by=sort_by, sort_order=sort_order, limit=4)
+
+        async with session_maker() as session:
+            fast = await _walk(session, params, fast=True)
+            orm = await _walk(session, params, fast=False)
+
+        assert fast == orm
+        ids = [item["id"] for page in fast for item in page["items"]]
+        assert len(ids) == len(set(ids)) == PRODUCT_COUNT
+
+    @pytest.mark.parametrize(
+        "filters", [{"status": "active"}, {"search": "description 1"}, {"search": "item-3", "status": "draft"}]
+    )
+    async def test_filtered_pages_match_products_service(self, session_maker, category, filters):
+        """ステータス・検索条件付きでも ProductsService と一致する"""
+        params = ProductListParams(category=category, sort_by="price", sort_order="desc", limit=3, **filters)
+
+        async with session_maker() as session:
+            assert await _walk(session, params, fast=True) == await _walk(session, params, fast=False)
+
+    async def test_invalid_and_unknown_cursor(self, session_maker, category):
+        """不正なカーソル・存在しない商品のカーソルは先頭ページとして扱う"""
+        async with session_maker() as session:
+            for cursor in ("not-a-uuid", str(uuid4())):
+                params = ProductListParams(category=category, limit=5, cursor=cursor)
+                fast = await ProductsFastPath(session).list_products(params)
+                orm = await ProductsService(session).list_products(params)
+
+                assert [item.id for item in fast["items"]] == [item.id for item in orm["items"]]
+                assert fast["pagination"] == orm["pagination"]
+
+    async def test_get_product_by_id(self, session_maker, category):
+        """ID 検索の行が ORM と同じレスポンスに変換される"""
+        async with session_maker() as session:
+            page = await ProductsService(session).list_products(
+                ProductListParams(category=category, limit=PRODUCT_COUNT)
+            )
+            for product in page["items"]:
+                row = await ProductsFastPath(session).get_product_by_id(product.id)
+                assert ProductResponse.model_validate(row) == ProductResponse.model_validate(product)
+
+            assert await ProductsFastPath(session).get_product_by_id(uuid4()) is None
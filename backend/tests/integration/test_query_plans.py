@@ -0,0 +1,250 @@
+"""
+tests/integration/test_query_plans.py - 商品一覧クエリの実行計画の回帰テスト
+
+マイグレーションを適用した専用データベース（<DB名>_query_plans）に商品データを投入し、
+ルーターが受け付けるフィルタ・ソート・カーソルのすべての組み合わせについて
+products/fastpath.py が生成する SQL を EXPLAIN して、次を確認します。
+
+- products の Seq Scan がない
+- 大量の行（SORT_ROW_LIMIT 超）を並べ替える Sort がない
+- 等価条件（任意） + (ソート列, id) のインデックスを使っている（日付範囲・検索条件なしの場合）
+
+スキーマやクエリの変更でインデックスが使われなくなると失敗します。
+DATABASE_URL の PostgreSQL に接続できない場合はスキップします。
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import asyncpg
+import pytest
+from sqlalchemy import make_url
+
+from app.config import settings
+from app.products.fastpath import build_list_sql
+from app.products.schemas import ProductListParams
+
+pytestmark = pytest.mark.integration
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# 投入する商品数とカテゴリ数・ステータス（カテゴリ + ステータスで約 1/80 に絞り込まれる）
+PRODUCT_COUNT = 200_000
+CATEGORY_COUNT = 20
+STATUSES = ("active", "inactive", "draft", "archived")
+
+# これを超える行数の Sort は「大量の並べ替え」とみなす
+SORT_ROW_LIMIT = 1_000
+
+SORT_FIELDS = ("created_at", "name", "price", "updated_at")
+# 投入データの基準時刻（created_at は 1 分刻みで過去へ）
+SEED_NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class Combination(NamedTuple):
+    """一覧取得パラメータの組み合わせ"""
+
+    category: bool
+    status: bool
+    date_range: str  # none / from / to / both
+    search: bool
+    sort_by: str
+    sort_order: str
+    cursor: bool
+
+    @property
+    def equality_columns(self) -> tuple[str, ...]:
+        return tuple(column for column, used in (("category", self.category), ("status", self.status)) if used)
+
+    def __str__(self) -> str:
+        parts = [*self.equality_columns, f"date={self.date_range}"]
+        if self.search:
+            parts.append("search")
+        parts.append(f"{self.sort_by}-{self.sort_order}")
+        if self.cursor:
+            parts.append("cursor")
+        return ",".join(parts)
+
+
+COMBINATIONS = [
+    Combination(*values)
+    for values in itertools.product(
+        (False, True),
+        (False, True),
+        ("none", "from", "to", "both"),
+        (False, True),
+        SORT_FIELDS,
+        ("asc", "desc"),
+        (False, True),
+    )
+]
+
+
+def _params(combination: Combination) -> ProductListParams:
+    date_from = SEED_NOW - timedelta(days=60) if combination.date_range in ("from", "both") else None
+    date_to = SEED_NOW - timedelta(days=30) if combination.date_range in ("to", "both") else None
+    return ProductListParams(
+        category="category-03" if combination.category else None,
+        status="active" if combination.status else None,
+        date_from=date_from,
+        date_to=date_to,
+        search="product-1234" if combination.search else None,
+        sort_by=combination.sort_by,
+        sort_order=combination.sort_order,
+        limit=100,
+    )
+
+
+def _dsn(url: str, database: str | None = None) -> str:
+    parsed = make_url(url).set(drivername="postgresql")
+    if database is not None:
+        parsed = parsed.set(database=database)
+    return parsed.render_as_string(hide_password=False)
+
+
+def _migrate(url: str) -> None:
+    """専用データベースへマイグレーションを適用（alembic upgrade head と同じ）"""
+    subprocess.run(
+        [sys.executable, "-c", "from alembic.config import main; main(argv=['upgrade', 'head'])"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": url},
+        check=True,
+        capture_output=True,
+    )
+
+
+async def _seed(conn: asyncpg.Connection) -> None:
+    await conn.execute(
+        f"""
+        INSERT INTO products (id, name, description, category, status, price, stock, created_at, updated_at)
+        SELECT
+            gen_random_uuid(),
+            'product-' || n,
+            'description ' || n,
+            'category-' || lpad((n % {CATEGORY_COUNT})::text, 2, '0'),
+            (ARRAY{list(STATUSES)})[(n / {CATEGORY_COUNT}) % {len(STATUSES)} + 1],
+            (n * 7919 % 100000) / 100.0,
+            n % 100,
+            $1::timestamptz - n * interval '1 minute',
+            $1::timestamptz - (n::bigint * 104729 % {PRODUCT_COUNT}) * interval '1 minute'
+        FROM generate_series(1, {PRODUCT_COUNT}) AS n
+        """,
+        SEED_NOW,
+    )
+    await conn.execute("ANALYZE products")
+
+
+async def _explain(conn: asyncpg.Connection, combination: Combination) -> dict[str, Any]:
+    params = _params(combination)
+    cursor = None
+    if combination.cursor:
+        # ページの途中（中央付近の行）から再開するカーソル
+        row = await conn.fetchrow(
+            f"SELECT {params.sort_by}, id FROM products ORDER BY {params.sort_by}, id OFFSET {PRODUCT_COUNT // 2} LIMIT 1"
+        )
+        cursor = (row[0], row[1])
+    sql, args = build_list_sql(params, cursor)
+    plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *args)
+    return json.loads(plan)[0]["Plan"]
+
+
+async def _index_columns(conn: asyncpg.Connection) -> dict[str, tuple[str, ...]]:
+    """products のインデックス名 -> キー列（INCLUDE 列は含まない）"""
+    rows = await conn.fetch(
+        """
+        SELECT index_class.relname AS name, array_agg(attribute.attname ORDER BY key.position) AS columns
+        FROM pg_index AS i
+        JOIN pg_class AS index_class ON index_class.oid = i.indexrelid
+        CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS key(attnum, position)
+        JOIN pg_attribute AS attribute ON attribute.attrelid = i.indrelid AND attribute.attnum = key.attnum
+        WHERE i.indrelid = 'products'::regclass AND key.position <= i.indnkeyatts
+        GROUP BY index_class.relname
+        """
+    )
+    return {row["name"]: tuple(row["columns"]) for row in rows}
+
+
+class QueryPlans(NamedTuple):
+    """組み合わせごとの実行計画と、products のインデックス定義"""
+
+    plans: dict[Combination, dict[str, Any]]
+    index_columns: dict[str, tuple[str, ...]]
+
+
+async def _collect_plans() -> QueryPlans:
+    database = f"{make_url(settings.database_url).database}_query_plans"
+    try:
+        admin = await asyncpg.connect(_dsn(settings.database_url), timeout=3)
+    except (OSError, TimeoutError, asyncpg.PostgresError) as error:
+        pytest.skip(f"PostgreSQL に接続できません: {error}")
+
+    try:
+        await admin.execute(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+        await admin.execute(f'CREATE DATABASE "{database}"')
+        await asyncio.to_thread(
+            _migrate, make_url(settings.database_url).set(database=database).render_as_string(False)
+        )
+
+        conn = await asyncpg.connect(_dsn(settings.database_url, database))
+        try:
+            await _seed(conn)
+            plans = {combination: await _explain(conn, combination) for combination in COMBINATIONS}
+            return QueryPlans(plans, await _index_columns(conn))
+        finally:
+            await conn.close()
+    finally:
+        await admin.execute(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+        await admin.close()
+
+
+@pytest.fixture(scope="module")
+def query_plans() -> QueryPlans:
+    """すべての組み合わせの実行計画（データベースの作成・投入は1回だけ）"""
+    return asyncio.run(_collect_plans())
+
+
+def _nodes(plan: dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def _is_keyset_index(columns: tuple[str, ...], combination: Combination) -> bool:
+    """等価条件の列（任意） + (ソート列, id) のインデックスか"""
+    return columns[-2:] == (combination.sort_by, "id") and set(columns[:-2]) <= set(combination.equality_columns)
+
+
+@pytest.mark.parametrize("combination", COMBINATIONS, ids=str)
+def test_list_query_plan(query_plans: QueryPlans, combination: Combination):
+    """一覧クエリが Seq Scan・大量の Sort なしで、対応するインデックスを使う"""
+    plan = query_plans.plans[combination]
+    nodes = list(_nodes(plan))
+
+    large_sorts = [node for node in nodes if node["Node Type"] == "Sort" and node["Plan Rows"] > SORT_ROW_LIMIT]
+    assert not large_sorts, f"{large_sorts[0]['Plan Rows']} 行を並べ替えています: {combination}"
+
+    # 前方一致しない ILIKE はインデックスで絞り込めないため、検索条件付きは並べ替えの確認のみ
+    if combination.search:
+        return
+
+    seq_scans = [node for node in nodes if node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "products"]
+    assert not seq_scans, f"products を Seq Scan しています: {combination}"
+
+    # 日付範囲は created_at の範囲で絞り込んだ後に並べ替える計画も正しいため、使用インデックスは問わない
+    if combination.date_range != "none":
+        return
+
+    # (ソート列, id) の前に等価条件の列だけを持つインデックスなら、読んだ順がそのまま結果の順になる
+    scans = [node for node in nodes if node.get("Relation Name") == "products" and "Index Name" in node]
+    keyset_scans = [
+        node for node in scans if _is_keyset_index(query_plans.index_columns.get(node["Index Name"], ()), combination)
+    ]
+    names = [node["Index Name"] for node in scans]
+    assert keyset_scans, f"(ソート列, id) のキーセット用インデックスを使っていません（使用: {names}）: {combination}"
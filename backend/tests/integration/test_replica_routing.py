@@ -0,0 +1,71 @@
+"""
+tests/integration/test_replica_routing.py - リードレプリカ振り分けの結合テスト
+
+compose.replica.yml のプライマリ / ストリーミングレプリカに対して実行します。
+DATABASE_REPLICA_URLS が未設定の場合はスキップします。
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.config import settings
+from app.database.models.product import Product
+from app.database.routing import EngineRouter
+
+pytestmark = [
+    pytest.mark.integration,
+    pytest.mark.skipif(not settings.database_replica_urls, reason="DATABASE_REPLICA_URLS が未設定です"),
+]
+
+
+@pytest.fixture
+async def router():
+    """実環境のプライマリ / レプリカに接続する EngineRouter"""
+    primary = create_async_engine(settings.database_url)
+    replicas = [create_async_engine(url) for url in settings.database_replica_urls]
+    router = EngineRouter(primary, replicas, max_lag_seconds=settings.replica_max_lag_seconds)
+    yield router
+    await router.dispose()
+    await primary.dispose()
+
+
+class TestReplicaRouting:
+    """レプリカ振り分けの結合テストクラス"""
+
+    async def test_replicas_are_healthy(self, router: EngineRouter):
+        """レプリカはヘルスチェックを通過し、読み取りに使われる"""
+        await router.check_replicas()
+
+        assert all(replica.healthy for replica in router.replicas), router.stats()
+        assert router.reader() is not router.primary
+
+    async def test_write_replicates_and_read_your_writes(self, router: EngineRouter):
+        """プライマリへの書き込みがレプリカに届き、書き込み直後はプライマリから読む"""
+        await router.check_replicas()
+        name = f"replica-test-{uuid4().hex[:8]}"
+
+        async with AsyncSession(router.writer()) as session:
+            session.add(Product(name=name, category="replica", status="active", price=1.0))
+            await session.commit()
+        router.mark_write("user-1")
+
+        try:
+            assert router.reader("user-1") is router.primary
+
+            replica = router.reader()
+            async with AsyncSession(replica) as session:
+                for _ in range(50):
+                    found = await session.scalar(select(Product.id).where(Product.name == name))
+                    if found:
+                        break
+                    await session.rollback()
+                    await asyncio.sleep(0.1)
+            assert found is not None
+        finally:
+            async with AsyncSession(router.writer()) as session:
+                await session.execute(delete(Product).where(Product.name == name))
+                await session.commit()
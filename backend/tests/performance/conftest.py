@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.database.pool import transaction_pooling_connect_args
 
 
 @pytest_asyncio.fixture(scope="session")
@@ -26,12 +27,13 @@ async def event_loop():
 
 @pytest_asyncio.fixture(scope="session")
 async def db_engine():
-    """本番DBエンジン（パフォーマンステスト用）"""
+    """本番DBエンジン（パフォーマンステスト用。PgBouncer 経由の設定にも対応）"""
     engine = create_async_engine(
         settings.database_url,
         echo=False,
         pool_size=10,
         max_overflow=20,
+        connect_args=transaction_pooling_connect_args() if settings.db_pgbouncer_transaction_mode else {},
     )
     yield engine
     await engine.dispose()
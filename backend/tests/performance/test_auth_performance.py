@@ -0,0 +1,71 @@
+"""
+tests/performance/test_auth_performance.py - 認証APIパフォーマンステスト
+
+ユーザー登録のスループットと1件あたりのクエリ数を計測します。
+"""
+
+import time
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.schemas import UserRegisterSchema
+from app.auth.service import AuthService
+from app.database.models.user import User
+
+
+@pytest.mark.performance
+class TestAuthPerformance:
+    """認証パフォーマンステストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_register_throughput_and_query_count(self, db_engine, db_session: AsyncSession):
+        """ユーザー登録のスループットと1件あたりのクエリ数
+
+        要件: 登録1件あたり INSERT 1文（重複チェックのSELECTなし）
+        """
+        prefix = f"perf_reg_{uuid4().hex[:8]}"
+        iterations = 20
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        # 接続確立時の初期化クエリを計測対象から除外
+        await db_session.execute(text("SELECT 1"))
+        await db_session.commit()
+
+        service = AuthService(db_session)
+        event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+        start_time = time.perf_counter()
+        try:
+            for i in range(iterations):
+                await service.register_user(
+                    UserRegisterSchema(
+                        username=f"{prefix}_{i}",
+                        email=f"{prefix}_{i}@example.com",
+                        password="PerfPassword123!",
+                    )
+                )
+        finally:
+            elapsed_time = time.perf_counter() - start_time
+            event.remove(db_engine.sync_engine, "before_cursor_execute", record)
+            await db_session.execute(delete(User).where(User.username.like(f"{prefix}_%")))
+            await db_session.commit()
+
+        queries_per_signup = len(statements) / iterations
+        signups_per_second = iterations / elapsed_time
+
+        print("\n" + "=" * 80)
+        print("📈 パフォーマンステスト結果 - ユーザー登録")
+        print("=" * 80)
+        print(f"登録件数: {iterations}件")
+        print(f"スループット: {signups_per_second:.1f} 件/秒")
+        print(f"平均登録時間: {elapsed_time / iterations * 1000:.2f}ms（bcryptを含む）")
+        print(f"1件あたりのクエリ数: {queries_per_signup:.2f}")
+        print("=" * 80)
+
+        assert queries_per_signup <= 1.0, f"登録1件あたりのクエリ数が多すぎます: {queries_per_signup:.2f}"
+        print("✅ 登録1件あたり1クエリで完了しています")
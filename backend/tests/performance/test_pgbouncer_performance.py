@@ -0,0 +1,86 @@
+"""
+tests/performance/test_pgbouncer_performance.py - PgBouncer 経由と直接接続のスループット比較
+
+compose.pgbouncer.yml の PgBouncer（transaction モード）と PostgreSQL に対して実行します。
+DB_PGBOUNCER_TRANSACTION_MODE / DATABASE_DIRECT_URL が未設定の場合はスキップします。
+"""
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from app.config import settings
+from app.database.pool import transaction_pooling_connect_args
+from app.products.fastpath import ProductsFastPath
+from app.products.schemas import ProductListParams
+
+pytestmark = pytest.mark.skipif(
+    not (settings.db_pgbouncer_transaction_mode and settings.database_direct_url),
+    reason="PgBouncer（DB_PGBOUNCER_TRANSACTION_MODE / DATABASE_DIRECT_URL）が未設定です",
+)
+
+# 同時実行数（アプリ側プールより多いクライアントを想定）
+CONCURRENCY = 50
+DURATION_SECONDS = 5.0
+
+
+async def measure_throughput(engine: AsyncEngine) -> tuple[float, int]:
+    """一定時間、商品一覧・詳細の読み取りを並行実行してリクエスト/秒を計測"""
+    params = ProductListParams(limit=20)
+    deadline = time.perf_counter() + DURATION_SECONDS
+    errors = 0
+
+    async def worker() -> int:
+        nonlocal errors
+        done = 0
+        while time.perf_counter() < deadline:
+            try:
+                async with AsyncSession(engine) as session:
+                    products = ProductsFastPath(session)
+                    page = await products.list_products(params)
+                    if page["items"]:
+                        await products.get_product_by_id(page["items"][0].id)
+                done += 1
+            except Exception:
+                errors += 1
+        return done
+
+    start_time = time.perf_counter()
+    counts = await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return sum(counts) / (time.perf_counter() - start_time), errors
+
+
+@pytest.mark.performance
+class TestPgBouncerPerformance:
+    """PgBouncer スループット比較テストクラス"""
+
+    @pytest.mark.asyncio
+    async def test_transaction_pooling_throughput(self):
+        """PgBouncer 経由でもエラーなく、直接接続の半分以上のスループットを出せる"""
+        direct = create_async_engine(settings.database_direct_url, pool_size=CONCURRENCY, max_overflow=0)
+        pooled = create_async_engine(
+            settings.database_url,
+            pool_size=CONCURRENCY,
+            max_overflow=0,
+            connect_args=transaction_pooling_connect_args(),
+        )
+        try:
+            direct_rps, direct_errors = await measure_throughput(direct)
+            pooled_rps, pooled_errors = await measure_throughput(pooled)
+        finally:
+            await direct.dispose()
+            await pooled.dispose()
+
+        print("\n" + "=" * 80)
+        print(f"📈 直接接続 / PgBouncer（transaction モード）スループット（同時実行 {CONCURRENCY}）")
+        print("=" * 80)
+        print(f"直接接続:  {direct_rps:,.0f} リクエスト/秒（エラー {direct_errors}）")
+        print(f"PgBouncer: {pooled_rps:,.0f} リクエスト/秒（エラー {pooled_errors}）")
+        print(f"比率:      {pooled_rps / direct_rps:.2f}倍")
+        print("=" * 80)
+
+        assert pooled_errors == 0, "PgBouncer 経由でエラーが発生しました"
+        assert pooled_rps >= direct_rps * 0.5, "PgBouncer 経由のスループットが直接接続の半分未満です"
+        print("✅ PgBouncer 経由でもスループット要件を満たしています")
@@ -18,6 +18,9 @@ from app.auth.security import create_jwt_token
 from app.config import settings
 from app.database.models.user import User
 from app.main import app
+from app.products.fastpath import ProductsFastPath
+from app.products.schemas import ProductListParams
+from app.products.service import ProductsService
 
 
 @pytest_asyncio.fixture
@@ -222,6 +225,59 @@ class TestProductsPerformance:
 
         print("\n✅ 全てのフィルタパターンでパフォーマンス要件を満たしています")
 
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("sort_by", ["created_at", "name", "price", "updated_at"])
+    @pytest.mark.parametrize("sort_order", ["asc", "desc"])
+    async def test_products_list_sort_performance(self, db_session: AsyncSession, sort_by: str, sort_order: str):
+        """ソート列ごとの商品一覧（初期ページ + カーソルページ、フィルタあり・なし）のパフォーマンステスト
+
+        要件: 応答時間 < 1秒（(ソート列, id) のキーセット用インデックスを使用）
+        """
+        product_count = await get_product_count(db_session)
+
+        if product_count < 100_000:
+            pytest.skip(f"パフォーマンステストには最低10万件のデータが必要です（現在: {product_count:,}件）")
+
+        base_patterns = [
+            ("フィルタなし", f"?sort_by={sort_by}&sort_order={sort_order}&limit=100"),
+            (
+                "複合フィルタ",
+                f"?category=electronics&status=active&sort_by={sort_by}&sort_order={sort_order}&limit=100",
+            ),
+        ]
+
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            for pattern_name, query_params in base_patterns:
+                response = await client.get(f"/products{query_params}", follow_redirects=True)
+                assert response.status_code == 200
+                cursor = response.json()["pagination"].get("next_cursor")
+
+                urls = [f"/products{query_params}"]
+                if cursor:
+                    urls.append(f"/products{query_params}&cursor={cursor}")
+
+                for url in urls:
+                    response_times = []
+                    iterations = 5
+
+                    for _ in range(iterations):
+                        elapsed_time, status_code = await measure_request_time(client, url)
+                        response_times.append(elapsed_time)
+
+                        assert status_code == 200
+
+                    avg_time = statistics.mean(response_times)
+                    page = "カーソルページ" if "cursor=" in url else "初期ページ"
+                    print(f"\n🔃 {sort_by} {sort_order} {pattern_name} {page}: 平均 {avg_time * 1000:.2f}ms")
+
+                    assert avg_time < 1.0, (
+                        f"{sort_by} {sort_order} {pattern_name} {page}の平均応答時間が1秒を超えています: "
+                        f"{avg_time * 1000:.2f}ms"
+                    )
+
+        print(f"✅ {sort_by} {sort_order}: パフォーマンス要件を満たしています")
+
     @pytest.mark.asyncio
     async def test_products_search_performance(self, db_session: AsyncSession, access_token: str):
         """検索機能のパフォーマンステスト
@@ -304,3 +360,40 @@ class TestProductsPerformance:
 
             assert avg_time < 0.5, f"平均応答時間が500msを超えています: {avg_time * 1000:.2f}ms"
             print("✅ 商品詳細取得: パフォーマンス要件を満たしています（< 500ms）")
+
+    @pytest.mark.asyncio
+    async def test_fastpath_rows_per_second(self, db_session: AsyncSession):
+        """asyncpg 直接実行パスと ORM の行スループット比較（limit=1000）
+
+        要件: 高速パスの行/秒が ORM 以上
+        """
+        if await get_product_count(db_session) < 1000:
+            pytest.skip("商品が1000件未満です")
+
+        params = ProductListParams(limit=1000)
+        iterations = 20
+
+        async def measure(service) -> float:
+            # 1回目はステートメント準備を含むため除外
+            await service.list_products(params)
+            start_time = time.perf_counter()
+            rows = 0
+            for _ in range(iterations):
+                result = await service.list_products(params)
+                rows += len(result["items"])
+            return rows / (time.perf_counter() - start_time)
+
+        orm_rows_per_second = await measure(ProductsService(db_session))
+        db_session.expunge_all()
+        fast_rows_per_second = await measure(ProductsFastPath(db_session))
+
+        print("\n" + "=" * 80)
+        print("📈 商品一覧 行スループット（limit=1000）")
+        print("=" * 80)
+        print(f"ORM:      {orm_rows_per_second:,.0f} 行/秒")
+        print(f"高速パス: {fast_rows_per_second:,.0f} 行/秒")
+        print(f"改善率:   {fast_rows_per_second / orm_rows_per_second:.2f}倍")
+        print("=" * 80)
+
+        assert fast_rows_per_second >= orm_rows_per_second, "高速パスが ORM より遅くなっています"
+        print("✅ 高速パスの行スループットが ORM を上回っています")
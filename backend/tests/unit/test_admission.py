@@ -0,0 +1,189 @@
+"""
+unit/test_admission.py - アドミッション制御のユニットテスト
+"""
+
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.metrics import admission_rejected_total
+from app.middleware.admission import AdmissionControlMiddleware, AdmissionQueue, classify_route, default_queues
+
+
+def _scope(method: str, path: str, query: bytes = b"") -> dict:
+    return {"type": "http", "method": method, "path": path, "query_string": query, "headers": []}
+
+
+class TestClassifyRoute:
+    """classify_route テストクラス"""
+
+    @pytest.mark.parametrize(
+        ("method", "path", "query", "expected"),
+        [
+            ("GET", "/products/123", b"", "read"),
+            ("GET", "/products/", b"limit=20", "read"),
+            ("GET", "/products/", b"search=phone", "search"),
+            ("POST", "/auth/login", b"", "auth"),
+            ("POST", "/auth/refresh", b"", "write"),
+            ("PUT", "/settings", b"", "write"),
+            ("GET", "/health/ready", b"", None),
+            ("OPTIONS", "/products/", b"", None),
+        ],
+    )
+    def test_classify(self, method, path, query, expected):
+        """メソッド・パス・検索条件でルートクラスを判定する"""
+        assert classify_route(_scope(method, path, query)) == expected
+
+
+class TestAdmissionQueue:
+    """AdmissionQueue テストクラス"""
+
+    async def test_admits_up_to_limit_then_queues(self):
+        """上限までは即時に実行し、超過分は返却を待って実行する"""
+        queue = AdmissionQueue("test", limit=1, max_queue=1, interval_seconds=1.0)
+
+        assert await queue.acquire() is None
+        waiter = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+        assert queue.queued == 1
+
+        queue.release()
+        assert await waiter is None
+        assert queue.in_flight == 1
+        queue.release()
+        assert queue.in_flight == 0
+
+    async def test_rejects_when_queue_full(self):
+        """待ち行列が満杯なら即座に拒否する"""
+        queue = AdmissionQueue("test", limit=1, max_queue=1, interval_seconds=1.0)
+        await queue.acquire()
+        waiter = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+
+        assert await queue.acquire() == "queue_full"
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert queue.queued == 0
+
+    async def test_times_out(self):
+        """タイムアウトまでに枠が空かなければ拒否する"""
+        queue = AdmissionQueue("test", limit=1, max_queue=10, interval_seconds=0.01)
+        await queue.acquire()
+
+        assert await queue.acquire() == "timeout"
+        assert queue.queued == 0
+        assert queue.in_flight == 1
+
+    async def test_auth_queue_waits_for_bcrypt(self, monkeypatch):
+        """auth は bcrypt 1回分（100ms 超）待ってから空いた枠でも実行できる"""
+        monkeypatch.setattr(settings, "bcrypt_target_ms", 250)
+        monkeypatch.setattr(settings, "admission_auth_concurrency", 1)
+        queue = default_queues()["auth"]
+        assert queue.queue_timeout >= 0.25
+
+        await queue.acquire()
+        waiter = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0.15)
+        queue.release()
+
+        assert await waiter is None
+        # 1回分の待ちでは過負荷と判定しない
+        assert not queue.overloaded
+        queue.release()
+
+    def test_queue_delays_per_class(self, monkeypatch):
+        """CoDel の target / interval と待ち時間上限はクラスごとに上書きできる"""
+        monkeypatch.setattr(settings, "admission_target_delays_ms", {"search": 20.0})
+        monkeypatch.setattr(settings, "admission_intervals_ms", {"search": 400.0})
+        monkeypatch.setattr(settings, "admission_queue_timeouts_ms", {"search": 800.0})
+
+        queues = default_queues()
+
+        assert queues["search"].target_delay_seconds == 0.02
+        assert queues["search"].interval_seconds == 0.4
+        assert queues["search"].queue_timeout == 0.8
+        assert queues["read"].queue_timeout == settings.admission_interval_ms / 1000
+
+    async def test_codel_overload_switches_to_lifo(self):
+        """待ち時間の最小値が目標を超え続けると過負荷とみなし、短いタイムアウト・LIFO に切り替える"""
+        now = [0.0]
+        queue = AdmissionQueue(
+            "test", limit=1, max_queue=10, target_delay_seconds=0.005, interval_seconds=0.1, clock=lambda: now[0]
+        )
+        queue._observe(0.05)
+        now[0] = 0.2
+        queue._observe(0.05)
+
+        assert queue.overloaded
+        assert queue.queue_timeout == 0.005
+
+        await queue.acquire()
+        first = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(queue.acquire())
+        await asyncio.sleep(0)
+        queue.release()
+
+        assert await second is None
+        assert not first.done()
+        queue.release()
+        assert await first is None
+
+    async def test_recovers_from_overload(self):
+        """待ちのない区間があれば過負荷状態を解除する"""
+        now = [0.0]
+        queue = AdmissionQueue("test", limit=1, max_queue=10, interval_seconds=0.1, clock=lambda: now[0])
+        queue.overloaded = True
+
+        queue._observe(0.0)
+        now[0] = 0.2
+        queue._observe(0.0)
+
+        assert not queue.overloaded
+
+
+class TestAdmissionControlMiddleware:
+    """AdmissionControlMiddleware テストクラス"""
+
+    async def test_sheds_with_503(self):
+        """同じクラスが飽和すると 503 + Retry-After、他のクラスは影響を受けない"""
+        admission_rejected_total.clear()
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            if scope["query_string"]:
+                await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        queues = {
+            "search": AdmissionQueue("search", limit=1, max_queue=0),
+            "read": AdmissionQueue("read", limit=1, max_queue=0),
+        }
+        middleware = AdmissionControlMiddleware(app, queues=queues)
+
+        async def call(scope):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            await middleware(scope, None, send)
+            return sent
+
+        running = asyncio.create_task(call(_scope("GET", "/products/", b"search=a")))
+        await asyncio.sleep(0)
+
+        rejected = await call(_scope("GET", "/products/", b"search=b"))
+        assert rejected[0]["status"] == 503
+        assert (b"retry-after", b"1") in rejected[0]["headers"]
+        assert admission_rejected_total.value(route_class="search", reason="queue_full") == 1
+
+        detail = await call(_scope("GET", "/products/1"))
+        assert detail[0]["status"] == 200
+
+        release.set()
+        assert (await running)[0]["status"] == 200
+        assert queues["search"].in_flight == 0
@@ -2,17 +2,39 @@
 unit/test_auth_service.py - 認証サービスのユニットテスト（TDD）
 """
 
-from datetime import timedelta
+import asyncio
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
 from uuid import uuid4
 
 import pytest
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
-
+from fastapi import FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.auth import service as auth_service_module
+from app.auth.dependencies import get_current_user
+from app.auth.router import router as auth_router
 from app.auth.schemas import UserLoginSchema, UserRegisterSchema
+from app.auth.security import (
+    calibrate_bcrypt_rounds,
+    configure_bcrypt_rounds,
+    create_access_token,
+    current_bcrypt_rounds,
+    password_needs_rehash,
+    pwd_context,
+)
 from app.auth.service import AuthService
 from app.auth.utils import verify_password
+from app.database.base import Base
+from app.database.db import get_read_session, get_session
+from app.database.models.token import RefreshToken
 from app.database.models.user import User
+from app.database.utils import unique_violation_column
+from app.products.router import router as products_router
 
 
 class TestAuthService:
@@ -270,3 +292,283 @@ class TestAuthService:
 
         # Assert
         assert user is None
+
+    # ーーーーーー ログアウト・セッション無効化テスト ーーーーーー
+
+    @staticmethod
+    async def _create_tokens(db_session, user, count: int, device_id: str = "device-001"):
+        """テスト用リフレッシュトークンを作成"""
+        tokens = [
+            RefreshToken(
+                user_id=user.id,
+                token_hash=f"{user.username}-{device_id}-{i}",
+                device_id=device_id,
+                expires_at=datetime.now(UTC) + timedelta(days=30),
+            )
+            for i in range(count)
+        ]
+        db_session.add_all(tokens)
+        await db_session.commit()
+        return tokens
+
+    @pytest.mark.asyncio
+    async def test_logout_revokes_device_tokens(self, auth_service, test_user_data, db_session):
+        """ログアウトで指定デバイスのトークンのみ無効化される"""
+        # Arrange
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+        phone = await self._create_tokens(db_session, user, 2, device_id="phone")
+        laptop = await self._create_tokens(db_session, user, 1, device_id="laptop")
+
+        # Act
+        result = await auth_service.logout(user.id, device_id="phone")
+
+        # Assert
+        assert result is True
+        for token in phone + laptop:
+            await db_session.refresh(token)
+        assert all(token.revoked_at is not None for token in phone)
+        assert laptop[0].revoked_at is None
+
+    @pytest.mark.asyncio
+    async def test_logout_without_tokens(self, auth_service, test_user_data):
+        """有効なトークンがない場合は False"""
+        # Arrange
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+
+        # Act & Assert
+        assert await auth_service.logout(user.id) is False
+
+    @pytest.mark.asyncio
+    async def test_revoke_all_sessions_in_chunks(self, auth_service, test_user_data, db_session):
+        """複数ユーザーの全セッションがチャンク単位で無効化される"""
+        # Arrange
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+        other = await auth_service.register_user(
+            UserRegisterSchema(username="otheruser", email="other@example.com", password=test_user_data["password"])
+        )
+        untouched = await auth_service.register_user(
+            UserRegisterSchema(username="keepuser", email="keep@example.com", password=test_user_data["password"])
+        )
+        await self._create_tokens(db_session, user, 7)
+        await self._create_tokens(db_session, other, 4)
+        kept = await self._create_tokens(db_session, untouched, 2)
+
+        # Act
+        revoked = await auth_service.revoke_all_sessions([user.id, other.id], chunk_size=3)
+
+        # Assert
+        assert revoked == 11
+        for token in kept:
+            await db_session.refresh(token)
+            assert token.revoked_at is None
+        assert await auth_service.revoke_all_sessions([user.id, other.id], chunk_size=3) == 0
+
+    @pytest.mark.asyncio
+    async def test_revoke_all_sessions_rejects_access_tokens(self, auth_service, test_user_data, db_session):
+        """全セッション無効化より前に発行されたアクセストークンは拒否され、以後のトークンは使える"""
+        # Arrange
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+        old_token, _ = create_access_token(user.id, user.username)
+
+        async def authenticate(token: str) -> User:
+            credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+            return await get_current_user(SimpleNamespace(state=SimpleNamespace()), credentials, db_session)
+
+        assert (await authenticate(old_token)).id == user.id
+
+        # Act
+        await auth_service.revoke_all_sessions([user.id])
+        db_session.expire_all()
+
+        # Assert
+        with pytest.raises(HTTPException) as exc_info:
+            await authenticate(old_token)
+        assert exc_info.value.status_code == 401
+        assert exc_info.value.detail == "トークンは無効化されています"
+
+        new_token, _ = create_access_token(user.id, user.username)
+        assert (await authenticate(new_token)).id == user.id
+
+    @pytest.mark.asyncio
+    async def test_revoke_all_sessions_applies_before_replica_catches_up(
+        self, auth_service, test_user_data, test_engine
+    ):
+        """レプリカが全セッション無効化を反映する前でも、書き込みエンドポイントは 401 を返す"""
+        # Arrange: 無効化前のユーザー行を持つ（遅延した）レプリカ
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+        old_token, _ = create_access_token(user.id, user.username)
+        replica = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with replica.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(replica) as session:
+            session.add(User(id=user.id, username=user.username, email=user.email, password_hash=user.password_hash))
+            await session.commit()
+
+        def session_from(bound_engine):
+            async def dependency():
+                async with AsyncSession(bound_engine, expire_on_commit=False) as session:
+                    yield session
+
+            return dependency
+
+        app = FastAPI()
+        app.include_router(auth_router)
+        app.include_router(products_router)
+        app.dependency_overrides[get_session] = session_from(test_engine)
+        app.dependency_overrides[get_read_session] = session_from(replica)
+        headers = {"Authorization": f"Bearer {old_token}"}
+
+        # Act
+        await auth_service.revoke_all_sessions([user.id])
+
+        # Assert
+        try:
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                created = await client.post(
+                    "/products/", json={"name": "n", "category": "c", "status": "active", "price": 1.0}, headers=headers
+                )
+                me = await client.get("/auth/me", headers=headers)
+        finally:
+            await replica.dispose()
+
+        assert created.status_code == 401
+        assert created.json()["detail"] == "トークンは無効化されています"
+        # 読み取り専用の /auth/me だけがレプリカを使う（遅延の間は無効化前の状態が見える）
+        assert me.status_code == 200
+
+    # ーーーーーー 1クエリ登録・プロフィール更新テスト ーーーーーー
+
+    @pytest.mark.asyncio
+    async def test_register_user_single_statement(self, auth_service, test_user_data, test_engine):
+        """ユーザー登録は INSERT 1文で完了する"""
+        # Arrange
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+
+        # Act
+        try:
+            await auth_service.register_user(UserRegisterSchema(**test_user_data))
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        # Assert
+        assert len(statements) == 1
+        assert statements[0].startswith("INSERT INTO users")
+
+    @pytest.mark.asyncio
+    async def test_update_user_profile(self, auth_service, test_user_data):
+        """プロフィール更新のテスト"""
+        # Arrange
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+
+        # Act
+        updated = await auth_service.update_user_profile(user.id, username="renamed", email="renamed@example.com")
+
+        # Assert
+        assert updated.username == "renamed"
+        assert updated.email == "renamed@example.com"
+
+    @pytest.mark.asyncio
+    async def test_update_user_profile_duplicate(self, auth_service, test_user_data):
+        """一意制約違反が既存のエラーメッセージに変換される"""
+        # Arrange
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+        user_id = user.id
+        await auth_service.register_user(
+            UserRegisterSchema(username="taken", email="taken@example.com", password=test_user_data["password"])
+        )
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="ユーザー名は既に使用されています"):
+            await auth_service.update_user_profile(user_id, username="taken")
+        with pytest.raises(ValueError, match="メールアドレスは既に使用されています"):
+            await auth_service.update_user_profile(user_id, email="taken@example.com")
+
+    @pytest.mark.parametrize(
+        ("constraint_name", "expected"),
+        [
+            ("idx_users_email", "email"),
+            ("idx_users_username", "username"),
+            ("users_email_key", "email"),
+            ("users_pkey", None),
+        ],
+    )
+    def test_unique_violation_column_postgresql(self, constraint_name, expected):
+        """PostgreSQL の制約名から列を特定する（主キーの id には解決しない）"""
+        orig = Exception("duplicate key value violates unique constraint")
+        orig.constraint_name = constraint_name
+        error = IntegrityError("INSERT INTO users ...", {}, orig)
+
+        assert unique_violation_column(error, User.__table__) == expected
+
+    @pytest.mark.asyncio
+    async def test_update_user_profile_not_found(self, auth_service):
+        """存在しないユーザーの更新テスト"""
+        with pytest.raises(ValueError, match="ユーザーが見つかりません"):
+            await auth_service.update_user_profile(uuid4(), username="nobody")
+
+    # ーーーーーー bcrypt コスト調整テスト ーーーーーー
+
+    @pytest.fixture
+    def restore_crypt_context(self):
+        """テスト後に CryptContext の設定を元に戻す"""
+        original = pwd_context.to_dict()
+        yield
+        pwd_context.load(original)
+
+    def test_calibrate_bcrypt_rounds(self):
+        """目標時間に応じて上下限内のコストが選ばれる"""
+        assert calibrate_bcrypt_rounds(target_ms=0, min_rounds=4, max_rounds=6, samples=1) == 4
+        assert calibrate_bcrypt_rounds(target_ms=60_000, min_rounds=4, max_rounds=6, samples=1) == 6
+
+    def test_configure_bcrypt_rounds(self, restore_crypt_context):
+        """コスト変更後は低いコストのハッシュだけが再ハッシュ対象になる"""
+        configure_bcrypt_rounds(4)
+        old_hash = pwd_context.hash("password")
+        configure_bcrypt_rounds(6)
+        strong_hash = pwd_context.hash("password")
+
+        configure_bcrypt_rounds(5)
+
+        assert current_bcrypt_rounds() == 5
+        assert password_needs_rehash(old_hash)
+        assert not password_needs_rehash(pwd_context.hash("password"))
+        # 別ワーカーが高いコストで作ったハッシュは下げない
+        assert not password_needs_rehash(strong_hash)
+
+    @pytest.mark.asyncio
+    async def test_login_rehashes_outdated_hash(self, auth_service, test_user_data, db_session, restore_crypt_context):
+        """ログイン成功時に古いコストのハッシュがバックグラウンドで更新される"""
+        # Arrange
+        configure_bcrypt_rounds(4)
+        user = await auth_service.register_user(UserRegisterSchema(**test_user_data))
+        configure_bcrypt_rounds(5)
+
+        # Act
+        await auth_service.login_user(
+            UserLoginSchema(email=test_user_data["email"], password=test_user_data["password"])
+        )
+        await asyncio.gather(*auth_service_module._rehash_tasks)
+
+        # Assert
+        result = await db_session.execute(
+            select(User.password_hash).where(User.id == user.id).execution_options(populate_existing=True)
+        )
+        new_hash = result.scalar_one()
+        assert new_hash.startswith("$2b$05$")
+        assert verify_password(test_user_data["password"], new_hash)
+
+    @pytest.mark.asyncio
+    async def test_login_skips_rehash_for_current_hash(self, auth_service, test_user_data):
+        """現在のコストのハッシュでは再ハッシュしない"""
+        await auth_service.register_user(UserRegisterSchema(**test_user_data))
+
+        await auth_service.login_user(
+            UserLoginSchema(email=test_user_data["email"], password=test_user_data["password"])
+        )
+
+        assert not auth_service_module._rehash_tasks
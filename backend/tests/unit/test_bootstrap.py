@@ -0,0 +1,119 @@
+"""
+unit/test_bootstrap.py - 起動時初期データ取得のユニットテスト
+"""
+
+import pytest
+from sqlalchemy import delete, event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.bootstrap.service import PRODUCTS_ENDPOINT, BootstrapService, response_etag
+from app.database.db import engine_router, read_session
+from app.database.models.product import Product
+from app.database.models.settings import UserSettings
+from app.database.models.user import User
+from app.database.timeouts import statement_timeout_ms
+from app.settings.cache import settings_cache
+
+
+class TestBootstrapService:
+    """BootstrapService テストクラス"""
+
+    @pytest.fixture
+    async def test_user(self, db_session: AsyncSession) -> User:
+        """ページサイズ10の設定を持つテスト用ユーザー"""
+        user = User(username="bootuser", email="boot@example.com", password_hash="hash")
+        db_session.add(user)
+        await db_session.commit()
+        db_session.add(UserSettings(user_id=user.id, theme="dark", default_page_size=10))
+        db_session.add_all(
+            [Product(name=f"Product {i}", price=100.0, category="electronics", status="active") for i in range(15)]
+        )
+        await db_session.commit()
+        return user
+
+    @pytest.fixture
+    def bootstrap_service(self, test_engine, db_session: AsyncSession) -> BootstrapService:
+        """テスト用エンジンに接続する BootstrapService"""
+        return BootstrapService(
+            db_session, async_sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        )
+
+    async def test_load(self, bootstrap_service: BootstrapService, test_user: User):
+        """ユーザー・設定・default_page_size 件の商品をまとめて返す"""
+        result = await bootstrap_service.load(test_user)
+
+        assert result.user.id == test_user.id
+        assert result.settings.theme == "dark"
+        assert len(result.products.items) == 10
+        assert result.products.pagination.has_more is True
+        assert result.products.pagination.next_cursor == str(result.products.items[-1].id)
+
+    async def test_load_last_page(self, bootstrap_service: BootstrapService, test_user: User, db_session):
+        """商品がページサイズ以下なら次ページなし"""
+        user = User(username="bootuser2", email="boot2@example.com", password_hash="hash")
+        db_session.add(user)
+        await db_session.commit()
+        db_session.add(UserSettings(user_id=user.id, default_page_size=20))
+        await db_session.commit()
+
+        result = await bootstrap_service.load(user)
+
+        assert len(result.products.items) == 15
+        assert result.products.pagination.has_more is False
+        assert result.products.pagination.next_cursor is None
+
+    async def test_etag_is_stable(self, bootstrap_service: BootstrapService, test_user: User):
+        """内容が変わらなければ ETag も変わらず、本体なしの計算と組み立て後の計算が一致する"""
+        first = response_etag(await bootstrap_service.load(test_user))
+        second = response_etag(await bootstrap_service.load(test_user))
+
+        assert first == second
+        assert await bootstrap_service.etag(test_user) == first
+
+    async def test_etag_changes_with_content(self, bootstrap_service: BootstrapService, test_user: User, db_session):
+        """1ページ目の商品の更新・削除・設定の変更で ETag が変わる"""
+        etags = [await bootstrap_service.etag(test_user)]
+        newest = (await bootstrap_service.load(test_user)).products.items[0]
+
+        product = await db_session.get(Product, newest.id)
+        product.price = 200.0
+        await db_session.commit()
+        etags.append(await bootstrap_service.etag(test_user))
+
+        await db_session.execute(delete(Product).where(Product.id == newest.id))
+        await db_session.commit()
+        etags.append(await bootstrap_service.etag(test_user))
+
+        settings = await db_session.scalar(select(UserSettings).where(UserSettings.user_id == test_user.id))
+        settings.default_page_size = 20
+        await db_session.commit()
+        settings_cache.invalidate(test_user.id)
+        etags.append(await bootstrap_service.etag(test_user))
+
+        assert len(set(etags)) == 4
+        assert etags[-1] == response_etag(await bootstrap_service.load(test_user))
+
+    async def test_etag_reads_only_versions(self, bootstrap_service: BootstrapService, test_user: User, test_engine):
+        """If-None-Match の判定では商品の ID と updated_at だけを読む"""
+        await bootstrap_service.etag(test_user)
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            await bootstrap_service.etag(test_user)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        product_queries = [statement for statement in statements if "FROM products" in statement]
+        assert len(product_queries) == 1
+        assert "description" not in product_queries[0]
+
+    async def test_products_read_as_list_endpoint(self):
+        """商品は GET /products/ と同じラベル・タイムアウトの読み取り用セッションで読む"""
+        async with read_session(PRODUCTS_ENDPOINT, "user-1") as session:
+            assert session.endpoint == "GET /products/"
+            assert session.statement_timeout_ms == statement_timeout_ms("GET /products/")
+            assert session.bind is engine_router.reader("user-1")
@@ -0,0 +1,173 @@
+"""
+unit/test_db_pool.py - コネクションプール計測・上限調整のユニットテスト
+"""
+
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import Settings
+from app.database.pool import InstrumentedPool, PoolController, transaction_pooling_connect_args
+from app.metrics import (
+    db_pool_checkout_seconds,
+    db_pool_connections,
+    db_pool_connections_opened_total,
+    db_pool_timeouts_total,
+)
+
+
+class TestInstrumentedPool:
+    """InstrumentedPool テストクラス"""
+
+    @pytest.fixture
+    async def engine(self, tmp_path):
+        """pool_size=1 / max_overflow=1 の計測付きエンジン"""
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedPool,
+            pool_size=1,
+            max_overflow=1,
+            pool_timeout=0.1,
+        )
+        engine.pool.instrument("test")
+        yield engine
+        await engine.dispose()
+        for metric in (db_pool_checkout_seconds, db_pool_connections_opened_total, db_pool_timeouts_total):
+            metric.clear()
+        for state in ("in_use", "idle", "overflow", "capacity"):
+            db_pool_connections.remove(pool="test", state=state)
+
+    async def test_records_checkout_and_gauges(self, engine):
+        """チェックアウト時間・接続数を記録する"""
+        async with engine.connect() as conn1, engine.connect() as conn2:
+            await conn1.execute(text("SELECT 1"))
+            await conn2.execute(text("SELECT 1"))
+            assert db_pool_connections.value(pool="test", state="in_use") == 2
+            assert db_pool_connections.value(pool="test", state="overflow") == 1
+            assert db_pool_connections.value(pool="test", state="capacity") == 2
+
+        (series,) = db_pool_checkout_seconds.snapshot()
+        assert series["labels"] == {"pool": "test"}
+        assert series["count"] == 2
+        assert db_pool_connections_opened_total.value(pool="test") == 2
+        assert db_pool_connections.value(pool="test", state="in_use") == 0
+
+        window = engine.pool.take_window()
+        assert window.checkouts == 2
+        assert window.peak_in_use == 2
+
+    async def test_records_timeout(self, engine):
+        """上限到達で pool_timeout を超えるとタイムアウトを記録する"""
+        async with engine.connect(), engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+        assert db_pool_timeouts_total.value(pool="test") == 1
+        assert engine.pool.take_window().timeouts == 1
+
+    async def test_resize(self, engine):
+        """上限を変更すると同時接続数が変わる（pool_size 未満にはならない）"""
+        engine.pool.resize(3)
+        async with engine.connect(), engine.connect(), engine.connect():
+            assert engine.pool.checkedout() == 3
+
+        engine.pool.resize(0)
+        assert engine.pool.capacity() == 1
+
+    async def test_recreate_keeps_label(self, engine):
+        """dispose で作り直したプールもラベルを引き継ぐ"""
+        await engine.dispose()
+
+        assert isinstance(engine.pool, InstrumentedPool)
+        assert engine.pool.label == "test"
+
+
+class TestPoolController:
+    """PoolController テストクラス"""
+
+    @pytest.fixture
+    async def engine(self, tmp_path):
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedPool,
+            pool_size=2,
+            max_overflow=2,
+            pool_timeout=0.05,
+        )
+        engine.pool.instrument("controller")
+        yield engine
+        await engine.dispose()
+
+    async def test_grows_on_timeouts(self, engine):
+        """タイムアウトが発生したら上限を引き上げる（max_connections まで）"""
+        controller = PoolController([engine], max_connections=5, target_wait_seconds=0.01, step=2)
+
+        async with engine.connect(), engine.connect(), engine.connect(), engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+        controller.adjust()
+        assert engine.pool.capacity() == 5
+
+    async def test_shrinks_when_idle(self, engine):
+        """待ちがなく使用数が少なければ pool_size まで縮小する"""
+        controller = PoolController([engine], max_connections=10, target_wait_seconds=0.01, step=2)
+
+        async with engine.connect():
+            pass
+        controller.adjust()
+        assert engine.pool.capacity() == 2
+
+        controller.adjust()
+        assert engine.pool.capacity() == 2
+
+    async def test_keeps_capacity_when_busy(self, engine):
+        """上限付近まで使われている間は縮小しない"""
+        controller = PoolController([engine], max_connections=10, target_wait_seconds=1.0, step=2)
+
+        async with engine.connect(), engine.connect(), engine.connect():
+            pass
+        controller.adjust()
+        assert engine.pool.capacity() == 4
+
+    async def test_start_stop(self, engine):
+        """バックグラウンドタスクを開始・停止できる"""
+        controller = PoolController([engine], max_connections=10, interval_seconds=0.01)
+
+        controller.start()
+        await asyncio.sleep(0.05)
+        await controller.stop()
+
+        assert controller._task is None
+        assert engine.pool.capacity() == 2
+
+
+class TestTransactionPoolingConnectArgs:
+    """transaction_pooling_connect_args テストクラス"""
+
+    def test_disables_statement_caches(self):
+        """ステートメントキャッシュを無効化する"""
+        args = transaction_pooling_connect_args()
+
+        assert args["statement_cache_size"] == 0
+        assert args["prepared_statement_cache_size"] == 0
+
+    def test_unique_statement_names(self):
+        """ステートメント名は呼び出しごとに一意"""
+        name_func = transaction_pooling_connect_args()["prepared_statement_name_func"]
+
+        names = {name_func() for _ in range(100)}
+        assert len(names) == 100
+        assert all(name.startswith("__asyncpg_") for name in names)
+
+    def test_requires_direct_url(self):
+        """transaction モードでは直接接続の URL がないと設定の読み込みに失敗する"""
+        with pytest.raises(ValidationError, match="DATABASE_DIRECT_URL"):
+            Settings(db_pgbouncer_transaction_mode=True, database_direct_url=None)
+
+        configured = Settings(db_pgbouncer_transaction_mode=True, database_direct_url="postgresql+asyncpg://db/app")
+        assert configured.database_direct_url == "postgresql+asyncpg://db/app"
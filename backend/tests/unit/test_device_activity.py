@@ -0,0 +1,128 @@
+"""
+unit/test_device_activity.py - デバイス利用時刻の遅延書き込みのユニットテスト
+"""
+
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.activity import DeviceActivityBuffer
+from app.auth.security import verify_access_token
+from app.auth.service import AuthService
+from app.database.models.token import RefreshToken
+from app.database.models.user import User
+
+
+class TestDeviceActivityBuffer:
+    """DeviceActivityBuffer テストクラス"""
+
+    @pytest.fixture
+    async def test_user(self, db_session: AsyncSession) -> User:
+        """デバイス2台分のトークンを持つテスト用ユーザー"""
+        user = User(username="activityuser", email="activity@example.com", password_hash="hash")
+        db_session.add(user)
+        await db_session.commit()
+
+        old = datetime.now(UTC) - timedelta(days=1)
+        db_session.add_all(
+            [
+                RefreshToken(
+                    user_id=user.id,
+                    token_hash=f"hash-{device_id}",
+                    device_id=device_id,
+                    expires_at=datetime.now(UTC) + timedelta(days=30),
+                    last_used_at=old,
+                )
+                for device_id in ("phone", "tablet")
+            ]
+        )
+        await db_session.commit()
+        return user
+
+    def test_touch_coalesces_per_device(self, test_engine):
+        """同じデバイスへの記録は最新時刻の1件にまとまる"""
+        buffer = DeviceActivityBuffer(test_engine)
+        user_id = uuid4()
+        now = datetime.now(UTC)
+
+        buffer.touch(user_id, "phone", now)
+        buffer.touch(user_id, "phone", now - timedelta(seconds=5))
+        buffer.touch(user_id, "phone", now + timedelta(seconds=5))
+        buffer.touch(user_id, "tablet", now)
+
+        assert len(buffer) == 2
+        assert buffer._pending[(user_id, "phone")] == now + timedelta(seconds=5)
+
+    def test_touch_is_bounded(self, test_engine):
+        """上限を超える新規デバイスは破棄され、フラッシュが要求される"""
+        buffer = DeviceActivityBuffer(test_engine, max_entries=2)
+
+        for device_id in ("a", "b", "c"):
+            buffer.touch(uuid4(), device_id)
+
+        assert len(buffer) == 2
+        assert buffer.dropped == 1
+        assert buffer._flush_requested.is_set()
+
+    async def test_flush(self, test_engine, db_session: AsyncSession, test_user: User):
+        """バッファの内容が last_used_at に反映される"""
+        buffer = DeviceActivityBuffer(test_engine)
+        now = datetime.now(UTC).replace(microsecond=0)
+        buffer.touch(test_user.id, "phone", now)
+
+        assert await buffer.flush() == 1
+        assert len(buffer) == 0
+
+        result = await db_session.execute(
+            select(RefreshToken.device_id, RefreshToken.last_used_at).order_by(RefreshToken.device_id)
+        )
+        rows = {device_id: last_used_at.replace(tzinfo=UTC) for device_id, last_used_at in result.all()}
+        assert rows["phone"] == now
+        assert rows["tablet"] < now
+
+    async def test_flush_keeps_newer_value(self, test_engine, db_session: AsyncSession, test_user: User):
+        """DB 上の時刻より古い記録では上書きしない"""
+        buffer = DeviceActivityBuffer(test_engine)
+        buffer.touch(test_user.id, "phone", datetime.now(UTC) - timedelta(days=2))
+
+        await buffer.flush()
+
+        result = await db_session.execute(select(RefreshToken.last_used_at).where(RefreshToken.device_id == "phone"))
+        assert result.scalar_one().replace(tzinfo=UTC) > datetime.now(UTC) - timedelta(days=2)
+
+    async def test_stop_flushes_pending(self, test_engine, test_user: User):
+        """停止時に残りが反映される"""
+        buffer = DeviceActivityBuffer(test_engine, flush_interval_seconds=3600)
+        buffer.start()
+        buffer.touch(test_user.id, "tablet")
+
+        await buffer.stop()
+
+        assert len(buffer) == 0
+        assert buffer.flushed == 1
+
+    async def test_stop_swallows_flush_error(self, test_engine, test_user: User, monkeypatch, caplog):
+        """停止時の反映に失敗しても例外を送出せずログに記録する"""
+        buffer = DeviceActivityBuffer(test_engine, flush_interval_seconds=3600)
+        buffer.touch(test_user.id, "tablet")
+
+        async def fail() -> int:
+            raise ConnectionError("database is gone")
+
+        monkeypatch.setattr(buffer, "flush", fail)
+
+        await buffer.stop()
+
+        assert any("停止時のデバイス利用時刻の反映に失敗しました" in record.getMessage() for record in caplog.records)
+
+    def test_access_token_device_claim(self, db_session: AsyncSession):
+        """デバイスIDを指定したアクセストークンにはクレームが含まれる"""
+        token = AuthService(db_session).create_access_token(str(uuid4()), device_id="phone")
+
+        payload = verify_access_token(token)
+
+        assert payload is not None
+        assert payload["device_id"] == "phone"
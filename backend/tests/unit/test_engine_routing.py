@@ -0,0 +1,90 @@
+"""
+unit/test_engine_routing.py - 読み取り/書き込みエンジンルーティングのユニットテスト
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import routing
+from app.database.routing import EngineRouter
+
+
+class TestEngineRouter:
+    """EngineRouter テストクラス"""
+
+    @pytest.fixture
+    async def engines(self):
+        """プライマリ1台 + レプリカ2台（接続しないダミー）"""
+        engines = [create_async_engine(f"sqlite+aiosqlite:///file:db{i}?mode=memory&uri=true") for i in range(3)]
+        yield engines
+        for engine in engines:
+            await engine.dispose()
+
+    def test_without_replicas(self, engines):
+        """レプリカ未設定ならプライマリを使う"""
+        router = EngineRouter(engines[0])
+
+        assert router.reader() is engines[0]
+        assert router.writer() is engines[0]
+
+    def test_round_robin(self, engines):
+        """正常なレプリカを順に使う"""
+        primary, replica1, replica2 = engines
+        router = EngineRouter(primary, [replica1, replica2])
+
+        assert [router.reader() for _ in range(4)] == [replica1, replica2, replica1, replica2]
+
+    def test_excludes_unhealthy_and_lagging(self, engines):
+        """停止・遅延したレプリカは除外し、全滅ならプライマリへフォールバック"""
+        primary, replica1, replica2 = engines
+        router = EngineRouter(primary, [replica1, replica2], max_lag_seconds=5)
+
+        router.replicas[0].healthy = False
+        assert {router.reader() for _ in range(3)} == {replica2}
+
+        router.replicas[1].lag_seconds = 30
+        assert router.reader() is primary
+        assert router.primary_fallbacks == 1
+
+    def test_read_your_writes(self, engines):
+        """書き込んだユーザーの読み取りは一定時間プライマリに固定される"""
+        now = [0.0]
+        primary, replica1, replica2 = engines
+        router = EngineRouter(primary, [replica1, replica2], sticky_seconds=10, clock=lambda: now[0])
+
+        router.mark_write("user-1")
+
+        assert router.reader("user-1") is primary
+        assert router.reader("user-2") is not primary
+
+        now[0] = 11
+        assert router.reader("user-1") is not primary
+        assert router.stats()["sticky_users"] == 0
+
+    async def test_health_check_marks_failures(self, engines):
+        """遅延を取得できないレプリカは除外される"""
+        primary, replica1, _ = engines
+        router = EngineRouter(primary, [replica1], health_check_interval_seconds=1)
+
+        # SQLite には pg_is_in_recovery() がないため失敗する
+        await router.check_replicas()
+
+        assert router.replicas[0].healthy is False
+        assert router.replicas[0].last_error is not None
+        assert router.reader() is primary
+
+    @pytest.mark.parametrize(("receiver_status", "healthy"), [("streaming", True), ("stopping", False), (None, False)])
+    async def test_health_check_requires_streaming(self, engines, monkeypatch, receiver_status, healthy):
+        """WAL レシーバーがストリーミング中でないレプリカは遅延 0 でも除外される"""
+        status = f"'{receiver_status}'" if receiver_status else "NULL"
+        monkeypatch.setattr(
+            routing, "_LAG_QUERY", text(f"SELECT 1 AS in_recovery, {status} AS receiver_status, 0 AS lag")
+        )
+        primary, replica1, _ = engines
+        router = EngineRouter(primary, [replica1], health_check_interval_seconds=1)
+
+        await router.check_replicas()
+
+        assert router.replicas[0].healthy is healthy
+        assert (router.reader() is replica1) is healthy
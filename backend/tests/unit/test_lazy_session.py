@@ -0,0 +1,73 @@
+"""
+unit/test_lazy_session.py - 接続を早期に返却するセッションのユニットテスト
+"""
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database.models.user import User
+from app.database.session import LazySession
+from app.metrics import db_pool_wait_seconds
+
+
+class TestLazySession:
+    """LazySession テストクラス"""
+
+    @pytest.fixture
+    def session_maker(self, test_engine):
+        """テスト用エンジンに接続する LazySession のファクトリ"""
+        return async_sessionmaker(bind=test_engine, class_=LazySession, expire_on_commit=False)
+
+    async def test_no_connection_until_first_query(self, session_maker):
+        """クエリを実行するまで接続を取得しない"""
+        async with session_maker() as session:
+            assert not session.in_transaction()
+
+    async def test_read_releases_connection(self, session_maker):
+        """読み取り専用のクエリ後は接続を返却し、結果は読み出せる"""
+        async with session_maker() as session:
+            session.add(User(username="lazyuser", email="lazy@example.com", password_hash="hash"))
+            await session.commit()
+
+            result = await session.execute(select(User).where(User.username == "lazyuser"))
+
+            assert not session.in_transaction()
+            user = result.scalars().one()
+            assert user.email == "lazy@example.com"
+
+    async def test_write_keeps_transaction(self, session_maker):
+        """書き込み後は commit までトランザクションを保持する"""
+        async with session_maker() as session:
+            await session.execute(insert(User).values(username="lazy2", email="lazy2@example.com", password_hash="h"))
+            await session.execute(select(User))
+
+            assert session.in_transaction()
+            await session.commit()
+            assert not session.in_transaction()
+
+    async def test_pending_changes_keep_transaction(self, session_maker):
+        """未フラッシュの変更があるうちは接続を返却しない"""
+        async with session_maker() as session:
+            session.add(User(username="lazy3", email="lazy3@example.com", password_hash="hash"))
+            await session.execute(select(User))
+
+            assert session.in_transaction()
+
+    async def test_for_update_keeps_transaction(self, session_maker):
+        """行ロックを取る SELECT では接続を保持する"""
+        async with session_maker() as session:
+            await session.execute(select(User).with_for_update())
+
+            assert session.in_transaction()
+
+    async def test_pool_wait_recorded_per_endpoint(self, session_maker):
+        """接続取得の待ち時間がエンドポイントごとに記録される"""
+        async with session_maker() as session:
+            session.endpoint = "GET /lazy-test"
+            await session.execute(select(User))
+            await session.execute(select(User))
+
+        samples = [s for s in db_pool_wait_seconds.snapshot() if s["labels"]["endpoint"] == "GET /lazy-test"]
+        # 2回目は返却後に再取得するため2件
+        assert samples[0]["count"] == 2
@@ -0,0 +1,248 @@
+"""
+unit/test_metrics.py - メトリクス出力・集約・リクエスト計測のユニットテスト
+"""
+
+import json
+import os
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.database.instrumentation import DB_SPAN, instrument_queries
+from app.main import app as main_app
+from app.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MultiProcessExporter,
+    cache_requests_total,
+    collect,
+    http_request_db_queries,
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    merge,
+    registry,
+    render,
+)
+from app.middleware.metrics import MetricsMiddleware
+from app.settings.cache import settings_cache
+from app.timing import collect_timings, span
+
+
+@pytest.fixture
+def temporary_metrics():
+    """テスト用のメトリクスを登録し、終了時にレジストリから外す"""
+    names: list[str] = []
+
+    def register(metric):
+        names.append(metric.name)
+        return metric
+
+    yield register
+    for name in names:
+        registry.pop(name, None)
+
+
+class TestRender:
+    """render テストクラス"""
+
+    def test_counter_and_gauge(self, temporary_metrics):
+        """HELP / TYPE 行とラベル付きの値を出力する"""
+        counter = temporary_metrics(Counter("test_events_total", "イベント数", labelnames=("kind",)))
+        gauge = temporary_metrics(Gauge("test_queue_depth", "待ち行列の長さ"))
+        counter.inc(kind="a")
+        counter.inc(2, kind='b"\\')
+        gauge.set_function(lambda: 3)
+
+        output = render()
+
+        assert "# HELP test_events_total イベント数\n# TYPE test_events_total counter\n" in output
+        assert 'test_events_total{kind="a"} 1.0\n' in output
+        assert 'test_events_total{kind="b\\"\\\\"} 2.0\n' in output
+        assert "# TYPE test_queue_depth gauge\ntest_queue_depth 3.0\n" in output
+
+    def test_histogram(self, temporary_metrics):
+        """累積バケット・合計・件数を出力する"""
+        histogram = temporary_metrics(Histogram("test_latency_seconds", "レイテンシ", ("route",), buckets=(0.1, 1.0)))
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        histogram.observe(5.0, route="/a")
+
+        output = render()
+
+        assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1\n' in output
+        assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2\n' in output
+        assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3\n' in output
+        assert 'test_latency_seconds_sum{route="/a"} 5.55\n' in output
+        assert 'test_latency_seconds_count{route="/a"} 3\n' in output
+
+    def test_settings_cache_counters(self):
+        """設定キャッシュのヒット・ミス数を公開する"""
+        hits, misses = settings_cache.hits, settings_cache.misses
+
+        assert cache_requests_total.value(cache="settings", result="hit") == hits
+        assert cache_requests_total.value(cache="settings", result="miss") == misses
+
+
+class TestMerge:
+    """merge テストクラス"""
+
+    def test_sums_series(self, temporary_metrics):
+        """同じラベルの値を合算し、片方にしかない系列も残す"""
+        counter = temporary_metrics(Counter("test_merge_total", "合算", labelnames=("kind",)))
+        histogram = temporary_metrics(Histogram("test_merge_seconds", "合算", buckets=(1.0,)))
+        counter.inc(kind="a")
+        histogram.observe(0.5)
+        first = json.loads(json.dumps(collect()))
+        counter.inc(kind="b")
+        histogram.observe(2.0)
+        second = collect()
+
+        families = {family["name"]: family for family in merge([first, second])}
+
+        counts = {sample["labels"]["kind"]: sample["value"] for sample in families["test_merge_total"]["samples"]}
+        assert counts == {"a": 2.0, "b": 1.0}
+        (sample,) = families["test_merge_seconds"]["samples"]
+        assert sample["buckets"] == [(1.0, 2), (float("inf"), 3)]
+        assert sample["count"] == 3
+        assert sample["sum"] == pytest.approx(3.0)
+
+
+class TestMultiProcessExporter:
+    """MultiProcessExporter テストクラス"""
+
+    def _write_worker(self, directory, pid: int, families: list) -> None:
+        (directory / f"{pid}.json").write_text(json.dumps({"pid": pid, "families": families}))
+
+    def test_aggregates_workers(self, tmp_path, temporary_metrics):
+        """他ワーカーのファイルと自プロセスの値を合算する（終了済みワーカーのゲージは除外）"""
+        counter = temporary_metrics(Counter("test_worker_total", "ワーカー"))
+        gauge = temporary_metrics(Gauge("test_worker_busy", "ワーカー"))
+        counter.inc()
+        gauge.set(1)
+        other = [
+            {
+                "name": "test_worker_total",
+                "type": "counter",
+                "help": "ワーカー",
+                "samples": [{"labels": {}, "value": 5}],
+            },
+            {"name": "test_worker_busy", "type": "gauge", "help": "ワーカー", "samples": [{"labels": {}, "value": 2}]},
+        ]
+        self._write_worker(tmp_path, os.getppid(), other)
+        self._write_worker(tmp_path, 2**22 + 1, other)
+
+        exporter = MultiProcessExporter(str(tmp_path))
+        families = {family["name"]: family for family in exporter.collect()}
+
+        assert families["test_worker_total"]["samples"][0]["value"] == 11
+        assert families["test_worker_busy"]["samples"][0]["value"] == 3
+
+    def test_write_skips_own_file(self, tmp_path, temporary_metrics):
+        """自プロセスのファイルは読まずに最新値を使う"""
+        counter = temporary_metrics(Counter("test_own_total", "自プロセス"))
+        counter.inc()
+        exporter = MultiProcessExporter(str(tmp_path))
+        exporter.write()
+        counter.inc()
+
+        families = {family["name"]: family for family in exporter.collect()}
+
+        assert (tmp_path / f"{os.getpid()}.json").exists()
+        assert families["test_own_total"]["samples"][0]["value"] == 2
+
+    async def test_start_stop(self, tmp_path):
+        """停止時に最終値を書き出す"""
+        exporter = MultiProcessExporter(str(tmp_path / "metrics"), interval_seconds=60)
+        exporter.start()
+        await exporter.stop()
+
+        assert exporter._task is None
+        assert (tmp_path / "metrics" / f"{os.getpid()}.json").exists()
+
+    def test_without_directory(self):
+        """ディレクトリ未設定時は自プロセスの値のみ"""
+        exporter = MultiProcessExporter(None)
+        exporter.start()
+
+        assert exporter._task is None
+        assert [family["name"] for family in exporter.collect()] == list(registry)
+
+
+class TestQueryInstrumentation:
+    """クエリ計測テストクラス"""
+
+    async def test_counts_queries_in_context(self, test_engine):
+        """収集中のコンテキストで実行したクエリだけを数える"""
+        instrument_queries(test_engine)
+        async with test_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+            with collect_timings() as timings:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+                with span(DB_SPAN):
+                    pass
+
+            await conn.execute(text("SELECT 3"))
+
+        assert timings.count(DB_SPAN) == 3
+        assert timings.seconds(DB_SPAN) > 0
+
+
+class TestMetricsMiddleware:
+    """MetricsMiddleware テストクラス"""
+
+    @pytest.fixture
+    def client(self, test_engine):
+        instrument_queries(test_engine)
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def get_item(item_id: int) -> dict:
+            async with test_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await conn.execute(text("SELECT 2"))
+            return {"id": item_id}
+
+        @app.get("/fail")
+        async def fail() -> dict:
+            raise RuntimeError("boom")
+
+        app.add_middleware(MetricsMiddleware)
+        yield AsyncClient(transport=ASGITransport(app=app, raise_app_exceptions=False), base_url="http://test")
+        http_request_duration_seconds.clear()
+        http_request_db_queries.clear()
+
+    def _series(self, histogram: Histogram) -> dict:
+        return {tuple(sample["labels"].values()): sample for sample in histogram.snapshot()}
+
+    async def test_records_by_route_template(self, client):
+        """ルートテンプレート・ステータスごとに処理時間とクエリ数を記録する"""
+        async with client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+            await client.get("/missing/path")
+            await client.get("/fail")
+
+        durations = self._series(http_request_duration_seconds)
+        assert durations[("GET", "/items/{item_id}", "200")]["count"] == 2
+        assert durations[("GET", "unmatched", "404")]["count"] == 1
+        assert durations[("GET", "/fail", "500")]["count"] == 1
+
+        queries = self._series(http_request_db_queries)[("GET", "/items/{item_id}")]
+        assert queries["sum"] == 4
+        assert http_requests_in_flight.value(method="GET") == 0
+
+    async def test_metrics_endpoint(self):
+        """GET /metrics は Prometheus 形式を返す"""
+        async with AsyncClient(transport=ASGITransport(app=main_app), base_url="http://test") as client:
+            await client.get("/health")
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
@@ -0,0 +1,82 @@
+"""
+unit/test_products_fastpath.py - 商品読み取り高速パスのユニットテスト
+"""
+
+from datetime import UTC, datetime
+from uuid import uuid4
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.products.fastpath import ProductRow, ProductsFastPath, build_list_sql
+from app.products.schemas import ProductListParams, ProductResponse
+from app.products.service import ProductsService
+
+
+class TestBuildListSql:
+    """build_list_sql テストクラス"""
+
+    def test_default(self):
+        """条件なしはソートと LIMIT のみ"""
+        sql, args = build_list_sql(ProductListParams(limit=10), None)
+
+        assert sql.endswith("FROM products ORDER BY created_at DESC, id DESC LIMIT $1")
+        assert args == [11]
+
+    def test_filters_and_cursor(self):
+        """フィルタとカーソルが番号付きパラメータになる"""
+        cursor_id = uuid4()
+        params = ProductListParams(
+            category="books", status="active", search="abc", sort_by="price", sort_order="asc", limit=5
+        )
+
+        sql, args = build_list_sql(params, (100.0, cursor_id))
+
+        assert (
+            "WHERE category = $1 AND status = $2 AND (name ILIKE $3 OR description ILIKE $3) "
+            "AND (price, id) > ($4, $5) ORDER BY price ASC, id ASC LIMIT $6"
+        ) in sql
+        assert args == ["books", "active", "%abc%", 100.0, cursor_id, 6]
+
+    def test_same_shape_same_sql(self):
+        """値が違っても条件の組み合わせが同じなら SQL は同一（ステートメントを再利用）"""
+        sql1, _ = build_list_sql(ProductListParams(category="a", limit=10), None)
+        sql2, _ = build_list_sql(ProductListParams(category="b", limit=50), None)
+
+        assert sql1 == sql2
+
+
+class TestProductsFastPath:
+    """ProductsFastPath テストクラス"""
+
+    async def test_delegates_to_products_service_without_asyncpg(self, db_session: AsyncSession, monkeypatch):
+        """asyncpg 以外の接続では ProductsService に委譲する
+
+        asyncpg の SQL と ProductsService の一致は tests/integration/test_products_fastpath.py で確認します。
+        """
+        calls = []
+
+        async def list_products(self, params):
+            calls.append(("list", params))
+            return {"items": [], "pagination": {}}
+
+        async def get_product_by_id(self, product_id):
+            calls.append(("get", product_id))
+
+        monkeypatch.setattr(ProductsService, "list_products", list_products)
+        monkeypatch.setattr(ProductsService, "get_product_by_id", get_product_by_id)
+        params = ProductListParams(limit=2)
+        product_id = uuid4()
+
+        assert await ProductsFastPath(db_session).list_products(params) == {"items": [], "pagination": {}}
+        assert await ProductsFastPath(db_session).get_product_by_id(product_id) is None
+        assert calls == [("list", params), ("get", product_id)]
+
+    def test_row_validates_as_response(self):
+        """ProductRow は ProductResponse にそのまま変換できる"""
+        now = datetime.now(UTC)
+        row = ProductRow(uuid4(), "name", None, "books", "active", 1.5, 3, None, now, now)
+
+        response = ProductResponse.model_validate(row)
+
+        assert response.price == 1.5
+        assert response.category == "books"
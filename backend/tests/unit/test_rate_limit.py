@@ -0,0 +1,244 @@
+"""
+unit/test_rate_limit.py - レート制限のユニットテスト
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import exc, func, select
+
+from app.database.models.ratelimit import RowQuotaUsage
+from app.ratelimit import quota as quota_module
+from app.ratelimit.middleware import RateLimitMiddleware, RateLimitRule
+from app.ratelimit.quota import QuotaRule, QuotaTicket, RowQuota, product_row_quota
+from app.ratelimit.storage import MemoryBucketStorage
+
+
+class FakeClock:
+    """テスト用の手動クロック"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestMemoryBucketStorage:
+    """インメモリトークンバケットのテストクラス"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def storage(self, clock):
+        return MemoryBucketStorage(compaction_interval=60.0, clock=clock)
+
+    async def test_allows_up_to_capacity(self, storage):
+        """容量分のリクエストは許可され、超過分は拒否される"""
+        results = [await storage.consume("ip:1.2.3.4", rate=1.0, capacity=3) for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert results[-1].retry_after == pytest.approx(1.0)
+
+    async def test_refills_over_time(self, storage, clock):
+        """時間経過でトークンが補充される"""
+        for _ in range(3):
+            await storage.consume("ip:1.2.3.4", rate=1.0, capacity=3)
+        assert (await storage.consume("ip:1.2.3.4", rate=1.0, capacity=3)).allowed is False
+
+        clock.now += 1.0
+
+        assert (await storage.consume("ip:1.2.3.4", rate=1.0, capacity=3)).allowed is True
+
+    async def test_keys_are_independent(self, storage):
+        """キーごとに独立したバケットを持つ"""
+        await storage.consume("email:a@example.com", rate=1.0, capacity=1)
+
+        assert (await storage.consume("email:a@example.com", rate=1.0, capacity=1)).allowed is False
+        assert (await storage.consume("email:b@example.com", rate=1.0, capacity=1)).allowed is True
+
+    async def test_compaction_removes_idle_keys(self, storage, clock):
+        """満タンに戻ったバケットは定期的に削除される"""
+        await storage.consume("ip:idle", rate=1.0, capacity=5)
+        clock.now += 10.0
+        await storage.consume("ip:active", rate=1.0, capacity=5)
+
+        removed = storage.compact()
+
+        assert removed == 1
+        assert len(storage) == 1
+
+
+class TestRateLimitMiddleware:
+    """レート制限ミドルウェアのテストクラス"""
+
+    @pytest.fixture
+    def client(self):
+        """2回/分のメール制限を持つテスト用アプリ"""
+        app = FastAPI()
+
+        @app.post("/auth/login")
+        async def login(payload: dict) -> dict:
+            return {"email": payload["email"]}
+
+        @app.get("/products")
+        async def products() -> dict:
+            return {"items": []}
+
+        app.add_middleware(
+            RateLimitMiddleware,
+            storage=MemoryBucketStorage(),
+            rules={("POST", "/auth/login"): [RateLimitRule("ip", 100), RateLimitRule("email", 2)]},
+        )
+        return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def test_limits_by_email(self, client):
+        """同一メールアドレスへの連続ログインは429になる"""
+        async with client:
+            statuses = [
+                (await client.post("/auth/login", json={"email": "User@example.com", "password": "x"})).status_code
+                for _ in range(3)
+            ]
+            other = await client.post("/auth/login", json={"email": "other@example.com", "password": "x"})
+
+        assert statuses == [200, 200, 429]
+        assert other.status_code == 200
+
+    async def test_rejection_has_retry_after(self, client):
+        """429 レスポンスに Retry-After ヘッダーが付く"""
+        async with client:
+            for _ in range(2):
+                await client.post("/auth/login", json={"email": "a@example.com", "password": "x"})
+            response = await client.post("/auth/login", json={"email": "a@example.com", "password": "x"})
+
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+
+    async def test_body_is_forwarded(self, client):
+        """読み込んだボディが後段のエンドポイントに渡される"""
+        async with client:
+            response = await client.post("/auth/login", json={"email": "a@example.com", "password": "x"})
+
+        assert response.json() == {"email": "a@example.com"}
+
+    async def test_unlimited_paths_pass_through(self, client):
+        """対象外のパスは制限されない"""
+        async with client:
+            statuses = [(await client.get("/products")).status_code for _ in range(5)]
+
+        assert statuses == [200] * 5
+
+
+class TestRowQuota:
+    """行数クォータのテストクラス"""
+
+    @pytest.fixture
+    def clock(self):
+        clock = FakeClock()
+        clock.now = 7200.0
+        return clock
+
+    def test_counts_rows_per_window(self, clock):
+        """ウィンドウ内の行数を集計し、ウィンドウが変わるとリセットする"""
+        quota = RowQuota(window_seconds=3600, clock=clock)
+        quota.add("ip:1", 100)
+        quota.add("ip:1", 50)
+
+        assert quota.used("ip:1") == 150
+        assert quota.used("ip:2") == 0
+
+        clock.now += 1800
+        assert quota.reset_after() == 1800
+
+        clock.now += 1800
+        assert quota.used("ip:1") == 0
+
+    async def test_sync_shares_usage_across_workers(self, test_engine, clock):
+        """同期すると他のワーカーの使用量を含めた合計が見える"""
+        worker1 = RowQuota(window_seconds=3600, engine=test_engine, clock=clock)
+        worker2 = RowQuota(window_seconds=3600, engine=test_engine, clock=clock)
+
+        worker1.add("user:a", 300)
+        worker2.add("user:a", 200)
+        assert worker2.used("user:a") == 200
+
+        await worker1.sync()
+        await worker2.sync()
+        assert worker2.used("user:a") == 500
+
+        # 増分のないキーも、参照していれば最新の合計を取得する
+        worker1.used("user:a")
+        await worker1.sync()
+        assert worker1.used("user:a") == 500
+
+    async def test_failed_sync_keeps_pending(self, test_engine, clock):
+        """同期に失敗した増分は次回に持ち越す"""
+        quota = RowQuota(window_seconds=3600, engine=test_engine, clock=clock)
+        quota.add("user:a", 10)
+        async with test_engine.begin() as conn:
+            await conn.run_sync(RowQuotaUsage.__table__.drop)
+
+        with pytest.raises(exc.OperationalError):
+            await quota.sync()
+
+        assert quota.used("user:a") == 10
+
+    async def test_prune_old_windows(self, test_engine, clock):
+        """終了したウィンドウの行を削除する"""
+        quota = RowQuota(window_seconds=3600, engine=test_engine, clock=clock)
+        quota.add("user:a", 10)
+        await quota.sync()
+
+        clock.now += 3600
+        quota.add("user:a", 5)
+        await quota.sync()
+        assert await quota.prune() == 1
+
+        async with test_engine.connect() as conn:
+            assert (await conn.execute(select(func.count()).select_from(RowQuotaUsage))).scalar() == 1
+
+
+class TestProductRowQuota:
+    """商品エンドポイントの行数クォータ依存関係のテストクラス"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        """IP ごと 250 行 / ユーザーごと 100 行のクォータを持つテスト用アプリ"""
+        monkeypatch.setattr(quota_module, "product_quota", RowQuota(window_seconds=3600))
+        monkeypatch.setattr(quota_module, "_product_rules", [QuotaRule("ip", 250), QuotaRule("user", 100)])
+        monkeypatch.setattr(quota_module, "request_user_key", lambda request: request.headers.get("x-user"))
+        app = FastAPI()
+
+        @app.get("/products")
+        async def products(limit: int, quota: QuotaTicket | None = Depends(product_row_quota)) -> dict:
+            quota.consume(limit)
+            return {"items": [None] * limit}
+
+        return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def test_counts_rows_and_sets_headers(self, client):
+        """返却行数を加算し、RateLimit-* ヘッダーで残量を通知する"""
+        async with client:
+            response = await client.get("/products", params={"limit": 40})
+
+        assert response.headers["ratelimit-limit"] == "250"
+        assert response.headers["ratelimit-remaining"] == "210"
+        assert response.headers["ratelimit-policy"] == "250;w=3600"
+        assert int(response.headers["ratelimit-reset"]) <= 3600
+
+    async def test_rejects_after_limit(self, client):
+        """使用量が上限に達すると 429 を返す（ユーザーのクォータが先に尽きる）"""
+        async with client:
+            first = await client.get("/products", params={"limit": 100}, headers={"x-user": "u1"})
+            rejected = await client.get("/products", params={"limit": 1}, headers={"x-user": "u1"})
+            anonymous = await client.get("/products", params={"limit": 1})
+
+        assert first.status_code == 200
+        assert first.headers["ratelimit-remaining"] == "0"
+        assert rejected.status_code == 429
+        assert rejected.headers["ratelimit-limit"] == "100"
+        assert int(rejected.headers["retry-after"]) >= 1
+        assert anonymous.status_code == 200
+        assert anonymous.headers["ratelimit-remaining"] == "149"
@@ -0,0 +1,209 @@
+"""
+unit/test_request_timeouts.py - ステートメントタイムアウト・切断時キャンセルのユニットテスト
+"""
+
+import asyncio
+
+import pytest
+from fastapi import Request
+from sqlalchemy import exc, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.database import session as session_module
+from app.database.models.user import User
+from app.database.session import LazySession
+from app.database.timeouts import (
+    database_error_handler,
+    driver_timeout_seconds,
+    is_statement_timeout,
+    set_local_statement_timeout,
+    statement_timeout_ms,
+)
+from app.metrics import db_pool_exhausted_total, db_statement_timeouts_total, http_requests_cancelled_total
+from app.middleware.cancellation import RequestCancellationMiddleware
+
+
+class _QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+class _FakeConnection:
+    """発行した SQL を記録する接続"""
+
+    def __init__(self, dialect_name: str):
+        self.dialect = type("Dialect", (), {"name": dialect_name})()
+        self.statements: list[str] = []
+
+    def exec_driver_sql(self, sql: str) -> None:
+        self.statements.append(sql)
+
+
+def _request(path: str = "/products/") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+
+
+class TestStatementTimeout:
+    """ステートメントタイムアウト テストクラス"""
+
+    def test_endpoint_budgets(self, monkeypatch):
+        """エンドポイントごとの予算（既定値と同じなら None）"""
+        monkeypatch.setattr(settings, "statement_timeout_ms", 30_000)
+        monkeypatch.setattr(
+            settings,
+            "statement_timeouts_ms",
+            {"GET /auth/me": 30_000, "GET /products/": 2_000, "DELETE /products/{product_id}": 0},
+        )
+
+        assert statement_timeout_ms("GET /products/") == 2_000
+        assert statement_timeout_ms("GET /products/{product_id}") == 1_000
+        assert statement_timeout_ms("DELETE /products/{product_id}") == 0
+        assert statement_timeout_ms("GET /auth/me") is None
+        assert statement_timeout_ms("GET /settings") is None
+
+    def test_set_local_only_on_postgresql(self):
+        """SET LOCAL は PostgreSQL の接続にのみ発行する"""
+        postgres, sqlite = _FakeConnection("postgresql"), _FakeConnection("sqlite")
+
+        set_local_statement_timeout(postgres, 1500)
+        set_local_statement_timeout(sqlite, 1500)
+
+        assert postgres.statements == ["SET LOCAL statement_timeout = 1500"]
+        assert sqlite.statements == []
+
+    async def test_lazy_session_applies_per_transaction(self, test_engine, monkeypatch):
+        """LazySession はトランザクションを開始するたびにタイムアウトを設定する"""
+        calls = []
+        monkeypatch.setattr(session_module, "set_local_statement_timeout", lambda conn, ms: calls.append(ms))
+        session_maker = async_sessionmaker(bind=test_engine, class_=LazySession)
+
+        async with session_maker() as session:
+            await session.execute(select(User))
+            assert calls == []
+
+            session.statement_timeout_ms = 1000
+            await session.execute(select(User))
+            await session.execute(select(User))
+
+        assert calls == [1000, 1000]
+
+    async def test_lazy_session_skips_set_local_for_driver_timeout(self, test_engine, monkeypatch):
+        """acquire(set_statement_timeout=False) ではトランザクション開始時に SET LOCAL を発行しない"""
+        calls = []
+        monkeypatch.setattr(session_module, "set_local_statement_timeout", lambda conn, ms: calls.append(ms))
+        session_maker = async_sessionmaker(bind=test_engine, class_=LazySession)
+
+        async with session_maker() as session:
+            session.statement_timeout_ms = 1000
+            await session.acquire(set_statement_timeout=False)
+            await session.release()
+            await session.execute(select(User))
+
+        assert calls == [1000]
+
+    def test_driver_timeout_seconds(self, monkeypatch):
+        """既定値より短い予算のみドライバーのタイムアウト（秒）に変換する"""
+        monkeypatch.setattr(settings, "statement_timeout_ms", 30_000)
+
+        assert driver_timeout_seconds(1_000) == 1.0
+        assert driver_timeout_seconds(None) is None
+        assert driver_timeout_seconds(0) is None
+        assert driver_timeout_seconds(60_000) is None
+
+        monkeypatch.setattr(settings, "statement_timeout_ms", 0)
+        assert driver_timeout_seconds(60_000) == 60.0
+
+    def test_is_statement_timeout(self):
+        """SQLSTATE 57014 をタイムアウトと判定する（SQLAlchemy でラップされていても）"""
+        wrapped = exc.OperationalError("SELECT 1", {}, _QueryCanceled())
+
+        assert is_statement_timeout(_QueryCanceled())
+        assert is_statement_timeout(wrapped)
+        assert not is_statement_timeout(exc.OperationalError("SELECT 1", {}, Exception()))
+
+    async def test_error_handler(self):
+        """タイムアウトは 504、プール枯渇は 503 + Retry-After、その他は再送出"""
+        db_statement_timeouts_total.clear()
+        db_pool_exhausted_total.clear()
+
+        response = await database_error_handler(_request(), exc.OperationalError("SELECT 1", {}, _QueryCanceled()))
+        assert response.status_code == 504
+        assert db_statement_timeouts_total.value(endpoint="GET /products/") == 1
+
+        response = await database_error_handler(_request(), exc.TimeoutError())
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert db_pool_exhausted_total.value(endpoint="GET /products/") == 1
+
+        with pytest.raises(exc.IntegrityError):
+            await database_error_handler(_request(), exc.IntegrityError("INSERT", {}, Exception()))
+
+
+class TestRequestCancellationMiddleware:
+    """RequestCancellationMiddleware テストクラス"""
+
+    @staticmethod
+    def _receive(messages: list[dict], disconnect: asyncio.Event):
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        return receive
+
+    async def test_cancels_on_disconnect(self):
+        """応答前にクライアントが切断するとハンドラをキャンセルする"""
+        http_requests_cancelled_total.clear()
+        disconnect = asyncio.Event()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def app(scope, receive, send):
+            await receive()
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def send(message):
+            raise AssertionError("応答は送信されない")
+
+        middleware = RequestCancellationMiddleware(app)
+        scope = {"type": "http", "method": "GET", "path": "/products/"}
+        call = asyncio.create_task(
+            middleware(scope, self._receive([{"type": "http.request", "body": b""}], disconnect), send)
+        )
+        await started.wait()
+        disconnect.set()
+        await asyncio.wait_for(call, 1)
+
+        assert cancelled.is_set()
+        assert http_requests_cancelled_total.value(endpoint="GET /products/") == 1
+
+    async def test_passes_body_and_response(self):
+        """ボディと応答はそのまま受け渡し、応答後の切断ではキャンセルしない"""
+        http_requests_cancelled_total.clear()
+        disconnect = asyncio.Event()
+        sent = []
+
+        async def app(scope, receive, send):
+            first, second = await receive(), await receive()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": first["body"] + second["body"]})
+            disconnect.set()
+            await asyncio.sleep(0.01)
+
+        async def send(message):
+            sent.append(message)
+
+        middleware = RequestCancellationMiddleware(app)
+        messages = [
+            {"type": "http.request", "body": b"ab", "more_body": True},
+            {"type": "http.request", "body": b"cd", "more_body": False},
+        ]
+        await middleware({"type": "http", "method": "POST", "path": "/x"}, self._receive(messages, disconnect), send)
+
+        assert sent[-1]["body"] == b"abcd"
+        assert http_requests_cancelled_total.value(endpoint="POST /x") == 0
@@ -0,0 +1,160 @@
+"""
+unit/test_revocation.py - アクセストークン失効リストのユニットテスト
+"""
+
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.revocation import BloomFilter, RevocationList, revocation_list
+from app.auth.security import create_access_token, decode_jwt_token
+from app.auth.service import AuthService
+from app.database.models.token import RevokedAccessToken
+
+
+class TestBloomFilter:
+    """Bloomフィルタのテストクラス"""
+
+    def test_no_false_negatives(self):
+        """追加したキーは必ず含まれると判定される"""
+        bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+        keys = [str(uuid4()) for _ in range(1_000)]
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate_within_bound(self):
+        """容量内では偽陽性率が設定値付近に収まる"""
+        bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+        for _ in range(10_000):
+            bloom.add(str(uuid4()))
+
+        trials = 20_000
+        false_positives = sum(1 for _ in range(trials) if str(uuid4()) in bloom)
+
+        # 統計的なゆらぎを考慮して設定値の2倍を上限とする
+        assert false_positives / trials < 0.02
+        assert bloom.estimated_false_positive_rate() == pytest.approx(0.01, rel=0.5)
+
+    def test_invalid_parameters(self):
+        """不正なパラメータは ValueError"""
+        with pytest.raises(ValueError):
+            BloomFilter(capacity=0, error_rate=0.01)
+        with pytest.raises(ValueError):
+            BloomFilter(capacity=100, error_rate=1.5)
+
+
+class TestRevocationList:
+    """失効リストのテストクラス"""
+
+    @pytest.fixture
+    def revocations(self):
+        """空の失効リスト"""
+        return RevocationList(capacity=1_000, error_rate=0.001)
+
+    def test_is_revoked(self, revocations):
+        """追加した jti のみが失効と判定される"""
+        jti = str(uuid4())
+        revocations.add(jti, datetime.now(UTC) + timedelta(hours=1))
+
+        assert revocations.is_revoked(jti) is True
+        assert revocations.is_revoked(str(uuid4())) is False
+        assert revocations.is_revoked(None) is False
+
+    def test_expired_entry_not_revoked(self, revocations):
+        """期限切れのエントリは失効扱いしない"""
+        jti = str(uuid4())
+        revocations.add(jti, datetime.now(UTC) - timedelta(seconds=1))
+
+        assert revocations.is_revoked(jti) is False
+
+    def test_prune(self, revocations):
+        """prune で期限切れエントリが除去される"""
+        live, expired = str(uuid4()), str(uuid4())
+        revocations.add(live, datetime.now(UTC) + timedelta(hours=1))
+        revocations.add(expired, datetime.now(UTC) - timedelta(hours=1))
+
+        removed = revocations.prune()
+
+        assert removed == 1
+        assert len(revocations) == 1
+        assert revocations.is_revoked(live) is True
+
+    def test_stats_tracks_false_positives(self, revocations):
+        """偽陽性の実測値が統計に反映される"""
+        revocations.add(str(uuid4()), datetime.now(UTC) + timedelta(hours=1))
+        for _ in range(1_000):
+            revocations.is_revoked(str(uuid4()))
+
+        stats = revocations.stats()
+        assert stats["entries"] == 1
+        assert stats["false_positives"] == stats["bloom_hits"]
+        assert stats["observed_false_positive_rate"] <= 1.0
+
+    async def test_load_from_table(self, revocations, db_session: AsyncSession):
+        """テーブルから有効期限内の jti のみロードされる"""
+        live, expired = str(uuid4()), str(uuid4())
+        db_session.add_all(
+            [
+                RevokedAccessToken(jti=live, expires_at=datetime.now(UTC) + timedelta(hours=1)),
+                RevokedAccessToken(jti=expired, expires_at=datetime.now(UTC) - timedelta(hours=1)),
+            ]
+        )
+        await db_session.commit()
+
+        loaded = await revocations.load(db_session)
+
+        assert loaded == 1
+        assert revocations.is_revoked(live) is True
+        assert revocations.is_revoked(expired) is False
+
+    async def test_revoke_access_token(self, db_session: AsyncSession):
+        """AuthService 経由の失効がテーブルとメモリの両方に反映される"""
+        token, _ = create_access_token(uuid4(), "revokeuser")
+        payload = decode_jwt_token(token)
+        expires_at = datetime.fromtimestamp(payload["exp"], UTC)
+
+        service = AuthService(db_session)
+        await service.revoke_access_token(payload["jti"], expires_at)
+
+        row = await db_session.get(RevokedAccessToken, payload["jti"])
+        assert row is not None
+        assert revocation_list.is_revoked(payload["jti"]) is True
+        revocation_list.clear()
+
+    async def test_rolled_back_revoke_not_cached(self, db_session: AsyncSession):
+        """ロールバックされた失効はメモリに残らない"""
+        jti = str(uuid4())
+
+        await revocation_list.revoke(db_session, jti, datetime.now(UTC) + timedelta(hours=1))
+        await db_session.rollback()
+
+        assert revocation_list.is_revoked(jti) is False
+        assert await db_session.get(RevokedAccessToken, jti) is None
+
+    async def test_reconnect_relistens_and_reloads(self, revocations, test_engine, db_session: AsyncSession):
+        """購読接続が切断されたら LISTEN し直し、切断中の失効をテーブルから補完する"""
+        listened = []
+
+        async def listen(engine):
+            listened.append(engine)
+
+        revocations._listen = listen
+        revocations._listener_engine = test_engine
+        missed = str(uuid4())
+        db_session.add(RevokedAccessToken(jti=missed, expires_at=datetime.now(UTC) + timedelta(hours=1)))
+        await db_session.commit()
+
+        revocations._on_termination(None)
+        await revocations._reconnect_task
+
+        assert listened == [test_engine]
+        assert revocations.is_revoked(missed) is True
+        assert revocations._reconnect_task is None
+
+        await revocations.stop_listener()
+        revocations._on_termination(None)
+        assert revocations._reconnect_task is None
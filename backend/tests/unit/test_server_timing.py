@@ -0,0 +1,126 @@
+"""
+unit/test_server_timing.py - 処理時間の内訳（Server-Timing）のユニットテスト
+"""
+
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.database.instrumentation import instrument_queries
+from app.middleware.server_timing import ServerTimingMiddleware
+from app.timing import RequestTimings, add_span, collect_timings, span
+
+
+class TestRequestTimings:
+    """RequestTimings テストクラス"""
+
+    def test_header(self):
+        """区間ごとの合計（ミリ秒）と total を出力し、db はクエリ数を含める"""
+        timings = RequestTimings()
+        timings.add("db", 0.002)
+        timings.add("db", 0.0015)
+        timings.add("serialize", 0.0005)
+
+        header = timings.header()
+
+        assert header.startswith('db;dur=3.500;desc="2 queries", serialize;dur=0.500, total;dur=')
+        assert timings.count("db") == 2
+        assert timings.count("auth") == 0
+
+    def test_nested_collection_reuses_collector(self):
+        """収集中に collect_timings を呼んでも同じ収集器に記録する"""
+        with collect_timings() as outer:
+            with collect_timings() as inner:
+                add_span("auth", 0.001)
+            with span("serialize"):
+                pass
+
+        assert inner is outer
+        assert outer.count("auth") == 1
+        assert outer.count("serialize") == 1
+
+    def test_no_collector(self):
+        """リクエスト外では何も記録しない"""
+        add_span("db", 1.0)
+        with span("db"):
+            pass
+
+        with collect_timings() as timings:
+            pass
+        assert timings.count("db") == 0
+
+
+class TestServerTimingMiddleware:
+    """ServerTimingMiddleware テストクラス"""
+
+    def _client(
+        self, test_engine, log_threshold_ms: float | None = None, allowed_ips: list[str] | None = None
+    ) -> AsyncClient:
+        instrument_queries(test_engine)
+        app = FastAPI()
+
+        @app.get("/items")
+        async def items() -> dict:
+            async with test_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            with span("serialize"):
+                return {"items": []}
+
+        @app.post("/auth/login")
+        async def login() -> dict:
+            add_span("bcrypt", 0.25)
+            return {}
+
+        app.add_middleware(
+            ServerTimingMiddleware,
+            log_threshold_ms=log_threshold_ms,
+            allowed_ips=allowed_ips or [],
+            admin_token="admin-secret",
+        )
+        return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+    async def test_header(self, test_engine):
+        """管理トークン付きのレスポンスに db / serialize / total の内訳を付ける"""
+        async with self._client(test_engine) as client:
+            response = await client.get("/items", headers={"X-Admin-Token": "admin-secret"})
+
+        names = [part.split(";")[0] for part in response.headers["server-timing"].split(", ")]
+        assert names == ["db", "serialize", "total"]
+        assert '"1 queries"' in response.headers["server-timing"]
+
+    @pytest.mark.parametrize(
+        ("headers", "allowed_ips", "expected"),
+        [
+            ({}, None, False),
+            ({"X-Admin-Token": "wrong"}, None, False),
+            ({}, ["127.0.0.0/8"], True),
+            ({}, ["10.0.0.1"], False),
+        ],
+    )
+    async def test_header_only_for_trusted_callers(self, test_engine, headers, allowed_ips, expected):
+        """管理トークンまたは許可 IP の呼び出し元にのみヘッダーを返す"""
+        async with self._client(test_engine, allowed_ips=allowed_ips) as client:
+            response = await client.get("/items", headers=headers)
+
+        assert ("server-timing" in response.headers) is expected
+
+    async def test_auth_excludes_bcrypt(self, test_engine):
+        """/auth/ では信頼できる呼び出し元にも bcrypt の区間を返さない"""
+        async with self._client(test_engine) as client:
+            response = await client.post("/auth/login", headers={"X-Admin-Token": "admin-secret"})
+
+        assert "bcrypt" not in response.headers["server-timing"]
+        assert response.headers["server-timing"].startswith("total;dur=")
+
+    @pytest.mark.parametrize(("threshold", "logged"), [(None, False), (0.0, True), (60_000.0, False)])
+    async def test_log_threshold(self, test_engine, caplog, threshold, logged):
+        """閾値以上かかったリクエストの内訳をログに出力する"""
+        with caplog.at_level(logging.INFO, logger="app.middleware.server_timing"):
+            async with self._client(test_engine, log_threshold_ms=threshold) as client:
+                await client.get("/items")
+
+        messages = [record.getMessage() for record in caplog.records]
+        assert any(message.startswith("処理時間の内訳: GET /items status=200 db=") for message in messages) is logged
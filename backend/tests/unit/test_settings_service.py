@@ -6,13 +6,14 @@ from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.models.settings import UserSettings
 from app.database.models.token import RefreshToken
 from app.database.models.user import User
-from app.settings.schemas import ProfileUpdate, UserSettingsCreate, UserSettingsUpdate
+from app.settings.cache import SettingsCache, settings_cache
+from app.settings.schemas import ProfileUpdate, UserSettingsCreate, UserSettingsResponse, UserSettingsUpdate
 from app.settings.service import SettingsService
 
 
@@ -108,6 +109,11 @@ class TestSettingsService:
         assert settings.user_id == user.id
         assert settings.theme == "light"  # デフォルト値
 
+        # 作成済みの行は再作成しない
+        settings_cache.invalidate(user.id)
+        again = await service.get_or_create_user_settings(user.id)
+        assert again.id == settings.id
+
     async def test_update_user_settings(self, db_session: AsyncSession, test_user: User, test_settings: UserSettings):
         """ユーザー設定更新テスト"""
         service = SettingsService(db_session)
@@ -131,6 +137,105 @@ class TestSettingsService:
         # 他のフィールドは変更されていないはず
         assert settings.default_page_size == 50
 
+    async def test_update_user_settings_creates_missing(self, db_session: AsyncSession, test_user: User):
+        """設定未作成のユーザーでも UPSERT で作成・更新される"""
+        service = SettingsService(db_session)
+
+        settings = await service.update_user_settings(test_user.id, UserSettingsUpdate(theme="dark"))
+
+        assert settings.theme == "dark"
+        assert settings.default_page_size == 100
+
+    async def test_get_or_create_user_settings_cached(
+        self, test_engine, db_session: AsyncSession, test_user: User, test_settings: UserSettings
+    ):
+        """2回目以降の取得はキャッシュから返り、更新で無効化される"""
+        service = SettingsService(db_session)
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        await service.get_or_create_user_settings(test_user.id)
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            cached = await service.get_or_create_user_settings(test_user.id)
+            assert statements == []
+            assert cached.theme == "dark"
+
+            await service.update_user_settings(test_user.id, UserSettingsUpdate(theme="light"))
+            statements.clear()
+            refreshed = await service.get_or_create_user_settings(test_user.id)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        # 既存行はロック・書き込みなしの SELECT のみで取得する
+        assert len(statements) == 1
+        assert statements[0].lstrip().upper().startswith("SELECT")
+        assert refreshed.theme == "light"
+
+    async def test_get_user_with_settings(
+        self, test_engine, db_session: AsyncSession, test_user: User, test_settings: UserSettings
+    ):
+        """ユーザーと設定を1クエリで取得できる"""
+        service = SettingsService(db_session)
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            result = await service.get_user_with_settings(test_user.id)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+        assert result is not None
+        user, settings = result
+        assert user.id == test_user.id
+        assert settings is not None
+        assert settings.theme == "dark"
+        assert settings_cache.get(test_user.id) is not None
+
+    async def test_get_user_with_settings_without_settings(self, db_session: AsyncSession, test_user: User):
+        """設定未作成の場合は設定が None"""
+        service = SettingsService(db_session)
+
+        assert await service.get_user_with_settings(test_user.id) == (test_user, None)
+        assert await service.get_user_with_settings(uuid4()) is None
+
+    def test_settings_cache_ttl_and_lru(self):
+        """キャッシュは TTL 経過と上限超過で破棄される"""
+        now = [0.0]
+        cache = SettingsCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+        users = [uuid4() for _ in range(3)]
+        value = UserSettingsResponse(
+            id=uuid4(), user_id=users[0], created_at=datetime.now(UTC), updated_at=datetime.now(UTC)
+        )
+
+        for user_id in users:
+            cache.set(user_id, value)
+        assert cache.get(users[0]) is None
+        assert cache.get(users[2]) is value
+
+        now[0] = 11
+        assert cache.get(users[2]) is None
+
+    def test_settings_cache_skips_stale_write(self):
+        """読み取り中に無効化された結果は保存されない"""
+        cache = SettingsCache()
+        user_id = uuid4()
+        value = UserSettingsResponse(
+            id=uuid4(), user_id=user_id, created_at=datetime.now(UTC), updated_at=datetime.now(UTC)
+        )
+
+        version = cache.version
+        cache.invalidate(user_id)
+        cache.set(user_id, value, version)
+
+        assert cache.get(user_id) is None
+
     # ーーーーーー プロフィール管理テスト ーーーーーー
 
     async def test_update_profile_username(self, db_session: AsyncSession, test_user: User):
@@ -286,6 +391,81 @@ class TestSettingsService:
         assert len(devices) == 1
         assert devices[0].device_id == "device-001"
 
+    async def test_get_user_devices_newest_token_per_device(self, db_session: AsyncSession, test_user: User):
+        """同じデバイスのトークンは最新の1件のみ返される"""
+        now = datetime.now(UTC)
+        db_session.add_all(
+            [
+                RefreshToken(
+                    user_id=test_user.id,
+                    token_hash=f"hash{i}",
+                    device_id="device-001",
+                    expires_at=now + timedelta(days=30),
+                    last_used_at=now - timedelta(minutes=i),
+                )
+                for i in range(3)
+            ]
+        )
+        await db_session.commit()
+
+        service = SettingsService(db_session)
+        devices = await service.get_user_devices(test_user.id)
+
+        assert len(devices) == 1
+        assert devices[0].token_hash == "hash0"
+
+    async def test_list_user_devices_pagination(self, db_session: AsyncSession, test_user: User):
+        """カーソルで重複・欠落なくページを辿れる"""
+        now = datetime.now(UTC)
+        db_session.add_all(
+            [
+                RefreshToken(
+                    user_id=test_user.id,
+                    token_hash=f"hash{i}",
+                    device_id=f"device-{i:03d}",
+                    expires_at=now + timedelta(days=30),
+                    # 同時刻のデバイスも含めて ID で順序を確定させる
+                    last_used_at=now - timedelta(minutes=i // 2),
+                )
+                for i in range(7)
+            ]
+        )
+        await db_session.commit()
+
+        service = SettingsService(db_session)
+        seen: list[str] = []
+        cursor = None
+        pages = 0
+        while True:
+            page = await service.list_user_devices(test_user.id, limit=3, cursor=cursor)
+            seen.extend(device.device_id for device in page["items"])
+            pages += 1
+            if not page["has_more"]:
+                assert page["next_cursor"] is None
+                break
+            cursor = page["next_cursor"]
+
+        assert pages == 3
+        assert sorted(seen) == [f"device-{i:03d}" for i in range(7)]
+        assert len(set(seen)) == 7
+
+    async def test_list_user_devices_invalid_cursor(self, db_session: AsyncSession, test_user: User):
+        """無効なカーソルは無視して先頭から返す"""
+        db_session.add(
+            RefreshToken(
+                user_id=test_user.id,
+                token_hash="hash1",
+                device_id="device-001",
+                expires_at=datetime.now(UTC) + timedelta(days=30),
+            )
+        )
+        await db_session.commit()
+
+        service = SettingsService(db_session)
+        page = await service.list_user_devices(test_user.id, cursor="not-a-cursor")
+
+        assert [device.device_id for device in page["items"]] == ["device-001"]
+
     async def test_revoke_device(self, db_session: AsyncSession, test_user: User):
         """デバイス無効化テスト"""
         # テスト用デバイスを作成
@@ -0,0 +1,234 @@
+"""
+unit/test_slow_query_log.py - スロークエリログのユニットテスト
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from types import SimpleNamespace
+from uuid import UUID
+
+import pytest
+from sqlalchemy import text
+
+from app.admin.router import list_slow_queries
+from app.database.instrumentation import instrument_queries
+from app.database.slowlog import (
+    NO_EXPLAIN_OPTION,
+    SlowQueryLog,
+    is_analyzable,
+    normalize_sql,
+    redact_parameters,
+    slow_query_log,
+)
+from app.timing import collect_timings
+
+
+class FakeConnection:
+    """EXPLAIN の実行を記録する接続"""
+
+    def __init__(self, engine: "FakePostgresEngine"):
+        self.engine = engine
+
+    async def execution_options(self, **options):
+        self.engine.options.update(options)
+        return self
+
+    async def exec_driver_sql(self, statement, parameters=None):
+        self.engine.statements.append((statement, parameters))
+        plan = json.dumps([{"Plan": {"Node Type": "Index Scan"}}])
+        return SimpleNamespace(scalar=lambda: plan)
+
+    async def rollback(self):
+        self.engine.rolled_back = True
+
+
+class FakePostgresEngine:
+    """PostgreSQL の AsyncEngine の代わり"""
+
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self):
+        self.statements: list = []
+        self.options: dict = {}
+        self.rolled_back = False
+
+    @asynccontextmanager
+    async def connect(self):
+        yield FakeConnection(self)
+
+
+class TestNormalize:
+    """normalize_sql / redact_parameters テストクラス"""
+
+    @pytest.mark.parametrize(
+        ("statement", "expected"),
+        [
+            ("SELECT * FROM products WHERE id = $1", "SELECT * FROM products WHERE id = ?"),
+            (
+                "SELECT name FROM products\n  WHERE category = 'books' AND price > 10.5 LIMIT 101",
+                "SELECT name FROM products WHERE category = ? AND price > ? LIMIT ?",
+            ),
+            ("DELETE FROM t WHERE id IN ($1, $2, $3)", "DELETE FROM t WHERE id IN (...)"),
+            ("SELECT $1::VARCHAR, col_1 FROM t_2", "SELECT ?::VARCHAR, col_1 FROM t_2"),
+            ("UPDATE users SET name = %(name)s WHERE id = ?", "UPDATE users SET name = ? WHERE id = ?"),
+        ],
+    )
+    def test_normalize_sql(self, statement, expected):
+        """リテラル・プレースホルダを ? に、IN リストと空白をまとめる"""
+        assert normalize_sql(statement) == expected
+
+    def test_redact_parameters(self):
+        """文字列はマスクし、ID・数値・日時は残す"""
+        user_id = UUID("12345678-1234-5678-1234-567812345678")
+        at = datetime(2026, 1, 1, tzinfo=UTC)
+
+        assert redact_parameters(("user@example.com", user_id, 10, None, at)) == [
+            "<redacted str(16)>",
+            str(user_id),
+            10,
+            None,
+            at.isoformat(sep=" "),
+        ]
+        assert redact_parameters({"token": b"secret"}) == {"token": "<redacted bytes(6)>"}
+        assert redact_parameters([(1,), (2,)], executemany=True) == "<2 rows>"
+
+
+class TestSlowQueryLog:
+    """SlowQueryLog テストクラス"""
+
+    def test_ring_buffer(self):
+        """上限を超えると古い記録から捨て、新しい順に返す"""
+        log = SlowQueryLog(threshold_ms=0, max_entries=2)
+        for index in range(3):
+            log.record(None, f"SELECT {index}", (), False, 0.5, None)
+
+        assert len(log) == 2
+        assert [entry.id for entry in log.entries()] == [3, 2]
+        assert [entry.id for entry in log.entries(limit=1)] == [3]
+
+    async def test_records_from_engine_events(self, test_engine, monkeypatch, caplog):
+        """閾値以上のクエリをエンドポイント付きで記録し、構造化ログを出力する"""
+        monkeypatch.setattr(slow_query_log, "threshold_seconds", 0.0)
+        instrument_queries(test_engine)
+        scope = {"method": "GET", "route": SimpleNamespace(path="/products/")}
+        try:
+            with collect_timings(scope):
+                async with test_engine.connect() as conn:
+                    await conn.execute(text("SELECT :name"), {"name": "secret"})
+            (entry,) = slow_query_log.entries(limit=1)
+        finally:
+            slow_query_log.clear()
+
+        assert entry.endpoint == "GET /products/"
+        assert entry.statement == "SELECT ?"
+        assert entry.parameters == ["<redacted str(6)>"]
+        # SQLite は EXPLAIN の対象外
+        assert entry.explain == "skipped"
+        assert any(record.getMessage().startswith("スロークエリ: {") for record in caplog.records)
+
+    async def test_explain_sampled_select(self):
+        """PostgreSQL の SELECT は別接続で EXPLAIN (ANALYZE, BUFFERS) を取得してロールバックする"""
+        engine = FakePostgresEngine()
+        log = SlowQueryLog(threshold_ms=0, explain_sample_rate=1.0)
+
+        entry = log.record(engine, "SELECT * FROM products WHERE id = $1", ("x",), False, 1.0, None)
+        assert entry.explain == "pending"
+        await asyncio.sleep(0)
+        await log.stop()
+
+        assert entry.explain == "captured"
+        assert entry.plan == [{"Plan": {"Node Type": "Index Scan"}}]
+        assert engine.statements[0][0].startswith("SET LOCAL statement_timeout")
+        assert engine.statements[1] == (
+            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM products WHERE id = $1",
+            ("x",),
+        )
+        assert engine.options == {"skip_slow_query_log": True}
+        assert engine.rolled_back is True
+        assert entry.analyzed is True
+
+    @pytest.mark.parametrize(
+        "statement",
+        [
+            "UPDATE products SET stock = 0",
+            "SELECT * FROM products FOR UPDATE",
+            "WITH d AS (DELETE FROM t) SELECT 1",
+            "SELECT pg_try_advisory_lock($1)",
+            "SELECT pg_notify($1, $2)",
+            "SELECT nextval('seq') FROM products",
+            "SELECT count(*) FROM products",
+        ],
+    )
+    async def test_plain_explain_with_side_effects(self, statement):
+        """再実行すると副作用のありうる文は ANALYZE なしの EXPLAIN（実行しない）にする"""
+        engine = FakePostgresEngine()
+        log = SlowQueryLog(threshold_ms=0, explain_sample_rate=1.0)
+
+        entry = log.record(engine, statement, (), False, 1.0, None)
+        await asyncio.sleep(0)
+        await log.stop()
+
+        assert entry.explain == "captured"
+        assert entry.analyzed is False
+        assert engine.statements[1][0] == f"EXPLAIN (FORMAT JSON) {statement}"
+
+    @pytest.mark.parametrize(
+        ("statement", "expected"),
+        [
+            ("SELECT * FROM products WHERE id = $1", True),
+            ("SELECT id FROM products WHERE (price, id) < ($1, $2) AND category IN ($3, $4)", True),
+            ("SELECT $1::VARCHAR(255), name FROM products WHERE name = 'f(x)'", True),
+            ("SELECT id FROM products WHERE EXISTS (SELECT 1 FROM users WHERE users.id = products.user_id)", True),
+            ("SELECT 1", False),
+            ("SELECT pg_advisory_unlock($1)", False),
+            ("SELECT x FROM generate_series(1, 3) AS x", False),
+            ("SELECT lower(name) FROM products", False),
+            ("SELECT * FROM products FOR SHARE", False),
+        ],
+    )
+    def test_is_analyzable(self, statement, expected):
+        """テーブルから読むだけで関数を呼ばない SELECT のみ ANALYZE の対象"""
+        assert is_analyzable(statement) is expected
+
+    async def test_no_explain_option(self, test_engine, monkeypatch):
+        """NO_EXPLAIN_OPTION を付けた接続のクエリは記録のみで EXPLAIN しない"""
+        monkeypatch.setattr(slow_query_log, "threshold_seconds", 0.0)
+        calls = []
+        monkeypatch.setattr(slow_query_log, "record", lambda *args, **kwargs: calls.append(kwargs))
+        instrument_queries(test_engine)
+
+        async with test_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"), execution_options={NO_EXPLAIN_OPTION: True})
+            await conn.execution_options(**{NO_EXPLAIN_OPTION: True})
+            await conn.execute(text("SELECT 3"))
+
+        assert [call["explain"] for call in calls] == [True, False, False]
+
+    async def test_one_explain_at_a_time(self):
+        """実行中の EXPLAIN があれば次の取得は見送る"""
+        log = SlowQueryLog(threshold_ms=0, explain_sample_rate=1.0)
+        engine = FakePostgresEngine()
+
+        first = log.record(engine, "SELECT 1", (), False, 1.0, None)
+        second = log.record(engine, "SELECT 2", (), False, 1.0, None)
+        await log.stop()
+
+        assert first.explain != "skipped"
+        assert second.explain == "skipped"
+
+    async def test_admin_endpoint(self, monkeypatch):
+        """管理APIで新しい順に取得できる"""
+        monkeypatch.setattr(slow_query_log, "threshold_ms", 200.0)
+        try:
+            slow_query_log.record(None, "SELECT 1", (), False, 0.3, "GET /products/")
+            slow_query_log.record(None, "SELECT 2", (), False, 0.4, None)
+            response = await list_slow_queries(limit=1)
+        finally:
+            slow_query_log.clear()
+
+        assert response.threshold_ms == 200.0
+        assert response.total == 2
+        assert [entry.statement for entry in response.entries] == ["SELECT ?"]
@@ -0,0 +1,115 @@
+"""
+unit/test_token_sweeper.py - 期限切れトークン削除タスクのユニットテスト
+"""
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.auth.sweeper import TokenSweeper
+from app.database.models.token import PasswordResetToken, RefreshToken
+from app.database.models.user import User
+
+
+class TestTokenSweeper:
+    """TokenSweeper テストクラス"""
+
+    @pytest.fixture
+    async def test_user(self, db_session: AsyncSession) -> User:
+        """テスト用ユーザーを作成"""
+        user = User(username="sweepuser", email="sweep@example.com", password_hash="hash")
+        db_session.add(user)
+        await db_session.commit()
+        await db_session.refresh(user)
+        return user
+
+    @staticmethod
+    def _refresh_token(user: User, name: str, expires_in: timedelta, revoked_ago: timedelta | None = None):
+        now = datetime.now(UTC)
+        return RefreshToken(
+            user_id=user.id,
+            token_hash=f"hash-{name}",
+            device_id=name,
+            expires_at=now + expires_in,
+            revoked_at=now - revoked_ago if revoked_ago is not None else None,
+        )
+
+    async def test_sweep_deletes_expired_and_old_revoked(self, test_engine, db_session: AsyncSession, test_user):
+        """期限切れ・保持期間を過ぎた無効化済みトークンのみ削除される"""
+        now = datetime.now(UTC)
+        db_session.add_all(
+            [
+                self._refresh_token(test_user, "live", timedelta(days=1)),
+                self._refresh_token(test_user, "expired", timedelta(days=-1)),
+                self._refresh_token(test_user, "revoked-old", timedelta(days=1), revoked_ago=timedelta(days=8)),
+                self._refresh_token(test_user, "revoked-recent", timedelta(days=1), revoked_ago=timedelta(hours=1)),
+                PasswordResetToken(user_id=test_user.id, token_hash="reset-live", expires_at=now + timedelta(hours=1)),
+                PasswordResetToken(user_id=test_user.id, token_hash="reset-old", expires_at=now - timedelta(hours=1)),
+            ]
+        )
+        await db_session.commit()
+
+        sweeper = TokenSweeper(test_engine, retention=timedelta(days=7))
+        deleted = await sweeper.sweep_once()
+
+        assert deleted is not None
+        assert deleted["refresh_tokens_expired"] == 1
+        assert deleted["refresh_tokens_revoked"] == 1
+        assert deleted["password_reset_tokens_expired"] == 1
+
+        remaining = await db_session.execute(select(RefreshToken.device_id).order_by(RefreshToken.device_id))
+        assert list(remaining.scalars()) == ["live", "revoked-recent"]
+        assert sweeper.stats.runs == 1
+        assert sweeper.stats.deleted["refresh_tokens_expired"] == 1
+
+    async def test_sweep_in_small_batches(self, test_engine, db_session: AsyncSession, test_user):
+        """バッチサイズを超える件数も複数バッチで削除される"""
+        db_session.add_all([self._refresh_token(test_user, f"expired-{i}", timedelta(days=-1)) for i in range(25)])
+        await db_session.commit()
+
+        sweeper = TokenSweeper(test_engine, batch_size=10, batch_pause_seconds=0)
+        deleted = await sweeper.sweep_once()
+
+        assert deleted is not None
+        assert deleted["refresh_tokens_expired"] == 25
+        count = await db_session.execute(select(func.count()).select_from(RefreshToken))
+        assert count.scalar() == 0
+
+    async def test_max_batches_per_run(self, test_engine, db_session: AsyncSession, test_user):
+        """1回の実行で削除するバッチ数に上限がある"""
+        db_session.add_all([self._refresh_token(test_user, f"expired-{i}", timedelta(days=-1)) for i in range(25)])
+        await db_session.commit()
+
+        sweeper = TokenSweeper(test_engine, batch_size=10, batch_pause_seconds=0, max_batches_per_run=2)
+        deleted = await sweeper.sweep_once()
+
+        assert deleted is not None
+        assert deleted["refresh_tokens_expired"] == 20
+
+    async def test_lock_engine(self, test_engine, db_session: AsyncSession, test_user):
+        """リーダー選出のロックは lock_engine の接続で取得し、削除は engine で行う"""
+        db_session.add(self._refresh_token(test_user, "expired", timedelta(days=-1)))
+        await db_session.commit()
+        lock_engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        connect_calls = []
+        event.listen(lock_engine.sync_engine, "connect", lambda *_: connect_calls.append(1))
+
+        try:
+            sweeper = TokenSweeper(test_engine, batch_pause_seconds=0, lock_engine=lock_engine)
+            deleted = await sweeper.sweep_once()
+        finally:
+            await lock_engine.dispose()
+
+        assert deleted is not None
+        assert deleted["refresh_tokens_expired"] == 1
+        assert connect_calls == [1]
+
+    async def test_start_and_stop(self, test_engine):
+        """バックグラウンドタスクを開始・停止できる"""
+        sweeper = TokenSweeper(test_engine, interval_seconds=3600)
+        sweeper.start()
+        await sweeper.stop()
+
+        assert sweeper._task is None
@@ -0,0 +1,210 @@
+"""
+unit/test_user_import.py - ユーザー一括インポートのユニットテスト
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from uuid import UUID, uuid4
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.admin import router as admin_router
+from app.admin.jobs import UserImportJobRunner
+from app.admin.service import UserImportService, hashing_executor, parse_rows
+from app.auth.utils import verify_password
+from app.config import settings
+from app.database.models.user import User
+from app.database.models.user_import import UserImportJob
+
+CSV_DATA = (
+    b"username,email,password\n"
+    b"alice,alice@example.com,AlicePass123!\n"
+    b"bob,bob@example.com,BobPass123!\n"
+    b"existing,other@example.com,OtherPass123!\n"
+    b"weak,weak@example.com,weakpass\n"
+    b"bademail,not-an-email,BadEmail123!\n"
+)
+
+
+@pytest.fixture(scope="module")
+def executor() -> Iterator[ProcessPoolExecutor]:
+    """ハッシュ計算用プロセスプール（テスト間で再利用）"""
+    with hashing_executor(2) as pool:
+        yield pool
+
+
+class TestUserImportService:
+    """UserImportService テストクラス"""
+
+    @pytest.fixture
+    async def existing_user(self, db_session: AsyncSession) -> User:
+        """重複検出用の既存ユーザー"""
+        user = User(username="existing", email="existing@example.com", password_hash="hash")
+        db_session.add(user)
+        await db_session.commit()
+        return user
+
+    def test_parse_csv(self, tmp_path: Path):
+        """CSV を行番号付きで分解できる"""
+        path = tmp_path / "users.csv"
+        path.write_bytes(b"\xef\xbb\xbfusername,email,password\r\nalice,alice@example.com,Secret123!\r\n")
+
+        rows = list(parse_rows(path, "csv"))
+
+        assert rows == [(2, {"username": "alice", "email": "alice@example.com", "password": "Secret123!"})]
+
+    def test_parse_unknown_format(self, tmp_path: Path):
+        """未対応フォーマットは ValueError"""
+        path = tmp_path / "users.xml"
+        path.write_bytes(b"")
+
+        with pytest.raises(ValueError, match="未対応のフォーマットです"):
+            list(parse_rows(path, "xml"))
+
+    async def test_import_csv(
+        self, db_session: AsyncSession, existing_user: User, executor: ProcessPoolExecutor, tmp_path: Path
+    ):
+        """有効な行は作成され、重複・検証エラーは行番号付きで報告される"""
+        path = tmp_path / "users.csv"
+        path.write_bytes(CSV_DATA)
+
+        service = UserImportService(db_session, executor, workers=2, batch_size=2)
+        report = await service.import_users(path, "csv")
+
+        assert report.total == 5
+        assert report.created == 2
+        assert [row["line"] for row in report.conflicts] == [4]
+        assert [row["line"] for row in report.invalid] == [5, 6]
+        assert report.users_per_second_per_core > 0
+
+        result = await db_session.execute(select(User).where(User.username == "alice"))
+        alice = result.scalars().one()
+        assert alice.is_active is True
+        assert verify_password("AlicePass123!", alice.password_hash)
+
+    async def test_import_ndjson(self, db_session: AsyncSession, executor: ProcessPoolExecutor, tmp_path: Path):
+        """NDJSON の入力を取り込める"""
+        lines = [
+            {"username": "carol", "email": "carol@example.com", "password": "CarolPass123!"},
+            {"username": "carol2", "email": "carol@example.com", "password": "CarolPass123!"},
+        ]
+        path = tmp_path / "users.ndjson"
+        path.write_text("\n".join(json.dumps(line) for line in lines))
+
+        service = UserImportService(db_session, executor, workers=1)
+        report = await service.import_users(path, "ndjson")
+
+        # ファイル内のメールアドレス重複も衝突として報告される
+        assert report.created == 1
+        assert [row["line"] for row in report.conflicts] == [2]
+
+
+class TestUserImportJobRunner:
+    """UserImportJobRunner テストクラス"""
+
+    @pytest.fixture
+    async def runner(self, test_engine) -> AsyncIterator[UserImportJobRunner]:
+        """テスト用エンジンでジョブを実行するランナー"""
+        runner = UserImportJobRunner(
+            async_sessionmaker(bind=test_engine, class_=AsyncSession, expire_on_commit=False),
+            workers=1,
+            batch_size=2,
+        )
+        runner.start()
+        yield runner
+        await runner.stop()
+
+    @staticmethod
+    async def _wait(runner: UserImportJobRunner, job_id) -> UserImportJob:
+        """ジョブの終了を待つ"""
+        for _ in range(600):
+            job = await runner.get(job_id)
+            if job is not None and job.status in ("succeeded", "failed"):
+                return job
+            await asyncio.sleep(0.05)
+        raise AssertionError("インポートジョブが終了しませんでした")
+
+    async def test_submit_runs_in_background(self, runner: UserImportJobRunner, tmp_path: Path):
+        """ジョブは登録後に待機状態で返り、バックグラウンドで完了して結果と一時ファイルの削除が記録される"""
+        path = tmp_path / "upload"
+        path.write_bytes(CSV_DATA)
+
+        job = await runner.submit(path, "csv", "users.csv")
+        assert job.status == "queued"
+
+        job = await self._wait(runner, job.id)
+
+        assert job.status == "succeeded"
+        assert job.started_at is not None and job.finished_at is not None
+        assert job.report["created"] == 3
+        assert [row["line"] for row in job.report["invalid"]] == [5, 6]
+        assert job.report["users_per_second"] > 0
+        assert not path.exists()
+
+    async def test_failure_is_recorded(self, runner: UserImportJobRunner, tmp_path: Path):
+        """インポートが失敗したジョブはエラーとともに failed になる"""
+        path = tmp_path / "upload"
+        path.write_bytes(b"")
+
+        job = await self._wait(runner, (await runner.submit(path, "xml")).id)
+
+        assert job.status == "failed"
+        assert "未対応のフォーマットです" in job.error
+        assert not path.exists()
+
+    async def test_submit_requires_start(self, test_engine, tmp_path: Path):
+        """プロセスプールの作成前は登録せず、一時ファイルを削除する"""
+        runner = UserImportJobRunner(async_sessionmaker(bind=test_engine, class_=AsyncSession))
+        path = tmp_path / "upload"
+        path.write_bytes(CSV_DATA)
+
+        with pytest.raises(RuntimeError):
+            await runner.submit(path, "csv")
+        assert not path.exists()
+
+    async def test_endpoint_returns_job(self, runner: UserImportJobRunner, monkeypatch):
+        """アップロードは 202 でジョブを返し、ジョブの取得で結果を確認できる"""
+        monkeypatch.setattr(settings, "admin_api_key", "admin-token")
+        monkeypatch.setattr(admin_router, "user_import_jobs", runner)
+        app = FastAPI()
+        app.include_router(admin_router.router)
+        headers = {"X-Admin-Token": "admin-token"}
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(
+                "/admin/users/import", files={"file": ("users.csv", CSV_DATA)}, headers=headers
+            )
+            assert response.status_code == 202
+            job_id = UUID(response.json()["id"])
+
+            await self._wait(runner, job_id)
+            response = await client.get(f"/admin/users/import/{job_id}", headers=headers)
+            missing = await client.get(f"/admin/users/import/{uuid4()}", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "succeeded"
+        assert response.json()["report"]["created"] == 3
+        assert missing.status_code == 404
+
+    async def test_endpoint_rejects_unknown_format(self, runner: UserImportJobRunner, monkeypatch):
+        """未対応フォーマットはジョブを登録せず 400"""
+        monkeypatch.setattr(settings, "admin_api_key", "admin-token")
+        monkeypatch.setattr(admin_router, "user_import_jobs", runner)
+        app = FastAPI()
+        app.include_router(admin_router.router)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post(
+                "/admin/users/import?format=xml",
+                files={"file": ("users.xml", b"<users/>")},
+                headers={"X-Admin-Token": "admin-token"},
+            )
+
+        assert response.status_code == 400
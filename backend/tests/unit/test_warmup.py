@@ -0,0 +1,85 @@
+"""
+unit/test_warmup.py - 起動時ウォームアップのユニットテスト
+"""
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.base import Base
+from app.database.warmup import DatabaseWarmup, database_warmup
+from app.main import app
+
+
+class TestDatabaseWarmup:
+    """DatabaseWarmup テストクラス"""
+
+    async def test_run(self, test_engine):
+        """ホットなクエリをすべて実行して ready になる"""
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        warmup = DatabaseWarmup([test_engine], connections=1)
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            state = await warmup.run()
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+        assert state.ready is True
+        assert state.connections == 1
+        # SELECT 1 + 商品一覧 4ソート列 x 2順序 x 5フィルタ + カーソル 4ソート列 x 2 + 商品ID検索 + ユーザーID検索
+        # （カーソル付きの続きのページは asyncpg のみ）
+        assert state.statements == 51
+        assert len(statements) == 51
+        assert any("LIKE" in statement for statement in statements)
+        assert state.pending_engines == []
+
+    async def test_replica_failure_does_not_block_ready(self, test_engine):
+        """レプリカが失敗してもプライマリが完了すれば ready になり、レプリカは再試行する"""
+        replica = create_async_engine("sqlite+aiosqlite:///file:warmup-replica?mode=memory&uri=true")
+        warmup = DatabaseWarmup([test_engine, replica], connections=1)
+
+        try:
+            # レプリカにはテーブルがないため失敗する
+            with pytest.raises(RuntimeError):
+                await warmup.run()
+
+            assert warmup.state.ready is True
+            assert warmup.state.pending_engines == [replica.url.render_as_string(hide_password=True)]
+            assert warmup.state.last_error is not None
+
+            async with replica.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            state = await warmup.run()
+        finally:
+            await replica.dispose()
+
+        assert state.pending_engines == []
+        assert state.last_error is None
+        assert state.connections == 2
+
+    async def test_start_and_stop(self, test_engine):
+        """バックグラウンドタスクを開始・停止できる"""
+        warmup = DatabaseWarmup([test_engine], connections=1)
+        warmup.start()
+        await warmup.stop()
+
+        assert warmup._task is None
+
+    async def test_readiness_probe(self, monkeypatch):
+        """ウォームアップ完了まで readiness は 503、liveness は常に 200"""
+        monkeypatch.setattr(database_warmup.state, "ready", False)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/health/live")).status_code == 200
+            assert (await client.get("/health/ready")).status_code == 503
+
+            monkeypatch.setattr(database_warmup.state, "ready", True)
+            response = await client.get("/health/ready")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"